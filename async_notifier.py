@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+import httpx
+
+from config import (
+    TELEGRAM_API_URL,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE_PER_MIN,
+    TELEGRAM_TOKEN,
+)
+from ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_MAX_RETRIES = 5
+
+
+class TelegramError(Exception):
+    """Falha ao chamar a Bot API. permanent=True para erros que nao adianta repetir
+    (ex.: 400 com Markdown invalido, 403 bot removido do chat)."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class AsyncTelegramNotifier:
+    """Cliente assincrono da Bot API com um unico httpx.AsyncClient (keep-alive).
+
+    Os limites do Telegram sao aplicados antes do envio: um token bucket global
+    e um por chat (grupos, com chat_id negativo, tem limite por minuto). Chats
+    diferentes sao atendidos em paralelo; um 429 pausa apenas o chat afetado.
+    """
+
+    def __init__(
+        self,
+        token: str = TELEGRAM_TOKEN,
+        api_url: str = TELEGRAM_API_URL,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_rate_per_min: float = TELEGRAM_GROUP_RATE_PER_MIN,
+    ):
+        self.base_url = f"{api_url}/bot{token}"
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate_per_min / 60
+        # Capacidade 1: nenhuma janela de 1s ultrapassa a taxa (sem rajada inicial)
+        self._global = TokenBucket(global_rate)
+        self._chats: dict[str, TokenBucket] = {}
+        self._client: httpx.AsyncClient | None = None
+        self.rate_limited = 0  # quantidade de 429 recebidos
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=15,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        key = str(chat_id)
+        bucket = self._chats.get(key)
+        if bucket is None:
+            rate = self.group_rate if key.startswith("-") else self.chat_rate
+            bucket = self._chats[key] = TokenBucket(rate)
+        return bucket
+
+    async def call(self, method: str, chat_id, payload: dict) -> dict:
+        """Chama um metodo da Bot API respeitando os limites; retorna o "result".
+
+        Levanta TelegramError se a chamada falhar.
+        """
+        bucket = self._chat_bucket(chat_id)
+        for attempt in range(_MAX_RETRIES):
+            await bucket.acquire()
+            await self._global.acquire()
+            try:
+                resp = await self.client.post(f"/{method}", json={"chat_id": chat_id, **payload})
+            except httpx.HTTPError as e:
+                logger.error("Erro na requisicao Telegram (%s): %s", method, e)
+                raise TelegramError(f"Erro de conexao: {e}") from e
+            if resp.status_code == 200:
+                return resp.json().get("result")
+            if resp.status_code == 429:
+                self.rate_limited += 1
+                retry_after = resp.json().get("parameters", {}).get("retry_after", 19)
+                logger.warning("Rate limit Telegram no chat %s. Pausando %ds...", chat_id, retry_after)
+                bucket.pause(retry_after)
+                continue
+            logger.error("Falha ao chamar Telegram %s: %s", method, resp.text)
+            raise TelegramError(resp.text, permanent=resp.status_code in (400, 403))
+
+        logger.error("Falha apos %d tentativas ao chamar Telegram %s", _MAX_RETRIES, method)
+        raise TelegramError(f"Rate limit apos {_MAX_RETRIES} tentativas")
+
+    async def send_text(self, chat_id, text: str, **extra) -> dict:
+        """Envia uma mensagem MarkdownV2; retorna a mensagem criada (com message_id)."""
+        payload = {
+            "text": text,
+            "parse_mode": "MarkdownV2",
+            "disable_web_page_preview": False,
+            **extra,
+        }
+        return await self.call("sendMessage", chat_id, payload)
+
+    async def edit_text(self, chat_id, message_id, text: str, **extra) -> dict:
+        """Substitui o texto de uma mensagem ja enviada (conta no mesmo rate limit).
+
+        Se o texto nao mudou, o Telegram responde 400 "message is not modified";
+        isso conta como sucesso e retorna {"message_id": message_id}.
+        """
+        payload = {
+            "message_id": int(message_id),
+            "text": text,
+            "parse_mode": "MarkdownV2",
+            "disable_web_page_preview": False,
+            **extra,
+        }
+        try:
+            return await self.call("editMessageText", chat_id, payload)
+        except TelegramError as e:
+            if "message is not modified" in str(e):
+                return {"message_id": int(message_id)}
+            raise
+
+    async def send_many(self, messages: list[tuple]) -> list:
+        """Envia [(chat_id, texto), ...] concorrentemente, mantendo a ordem por chat.
+
+        Retorna, na mesma ordem, a mensagem criada ou o TelegramError da falha.
+        """
+        return await asyncio.gather(
+            *(self.send_text(chat_id, text) for chat_id, text in messages),
+            return_exceptions=True,
+        )
+
+
+class BackgroundNotifier:
+    """Roda um AsyncTelegramNotifier num event loop em thread propria.
+
+    submit() retorna imediatamente, entao o loop dos scrapers nunca espera pelo
+    Telegram (nem por rate limit).
+    """
+
+    def __init__(self, notifier: AsyncTelegramNotifier | None = None):
+        self.notifier = notifier or AsyncTelegramNotifier()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="telegram", daemon=True)
+        self._pending: set[Future] = set()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, chat_id, text: str, **extra) -> Future:
+        future = asyncio.run_coroutine_threadsafe(
+            self.notifier.send_text(chat_id, text, **extra), self._loop
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stop(self, timeout: float | None = 60) -> None:
+        """Aguarda as mensagens pendentes (ate timeout) e encerra o loop."""
+        for future in list(self._pending):
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        asyncio.run_coroutine_threadsafe(self.notifier.aclose(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,97 @@
+"""
+Benchmark dos perfis de lancamento do Chromium (browsers.LAUNCH_PROFILES).
+
+    python bench_browser.py                      # pagina data: local, 5 rodadas
+    python bench_browser.py --url https://www.casan.com.br/licitacoes/editais
+    python bench_browser.py --source CASAN       # scraper inteiro por perfil
+
+Por perfil, mede o lancamento (launch + contexto + pagina), a carga da URL e o
+pico de RSS e o numero de processos da arvore do Chromium. Com --source roda
+scraper.run() em cada perfil e compara tempo, CPU/RSS do navegador (runstats)
+e itens parseados: mesmo numero de itens no nojs indica fonte que dispensa JS.
+"""
+import argparse
+import statistics
+import time
+
+from playwright.sync_api import sync_playwright
+
+import procstats
+import runstats
+from browsers import LAUNCH_PROFILES
+
+_PAGE = "data:text/html,<title>bench</title><table>" + "<tr><td>linha</td></tr>" * 500 + "</table>"
+
+
+def _bench_page(p, profile: dict, url: str) -> dict:
+    sampler = runstats.BrowserSampler(interval=0.05)
+    t0 = time.perf_counter()
+    browser = p.chromium.launch(headless=True, args=profile["args"])
+    sampler.start()
+    try:
+        page = browser.new_context(**profile["context"]).new_page()
+        t1 = time.perf_counter()
+        page.goto(url, wait_until="load", timeout=60_000)
+        t2 = time.perf_counter()
+        sampler.sample()
+        processes = len(procstats.browser_processes())
+    finally:
+        sampler.stop()
+        browser.close()
+    return {
+        "startup": t1 - t0,
+        "load": t2 - t1,
+        "rss": sampler.peak_rss,
+        "cpu": sampler.cpu_seconds,
+        "processes": processes,
+    }
+
+
+def bench_profiles(names: list[str], url: str, runs: int) -> None:
+    print(f"\n{'perfil':<10} {'inicio ms':>10} {'carga ms':>10} {'RSS MB':>8} {'CPU s':>7} {'procs':>6}")
+    with sync_playwright() as p:
+        for name in names:
+            results = [_bench_page(p, LAUNCH_PROFILES[name], url) for _ in range(runs)]
+            median = {k: statistics.median(r[k] for r in results) for k in results[0]}
+            print(
+                f"{name:<10} {median['startup'] * 1000:>10.0f} {median['load'] * 1000:>10.0f} "
+                f"{median['rss'] / 1e6:>8.1f} {median['cpu']:>7.2f} {median['processes']:>6.0f}"
+            )
+
+
+def bench_source(source: str, names: list[str]) -> None:
+    from scrapers import SCRAPERS
+
+    cls = type(next(s for s in SCRAPERS if s.name.lower() == source.lower()))
+    print(f"\n{cls.name}: {'perfil':<10} {'tempo s':>8} {'CPU s':>7} {'RSS MB':>8} {'itens':>6}")
+    for name in names:
+        scraper = cls()
+        scraper.launch_profile = name
+        runs = []
+        t0 = time.perf_counter()
+        with runstats.record(cls.name, runs, enabled=True):
+            items = scraper.run()
+        row = runs[0]
+        print(
+            f"{'':<{len(cls.name) + 1}} {name:<10} {time.perf_counter() - t0:>8.1f} "
+            f"{row['browser_cpu_seconds']:>7.2f} {row['browser_peak_rss'] / 1e6:>8.1f} {len(items):>6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os perfis de lancamento do Chromium")
+    parser.add_argument("--profiles", default=",".join(LAUNCH_PROFILES), help="perfis separados por virgula")
+    parser.add_argument("--runs", type=int, default=5, help="rodadas por perfil (mediana)")
+    parser.add_argument("--url", default=_PAGE, help="pagina carregada em cada rodada")
+    parser.add_argument("--source", help="roda o scraper da fonte em cada perfil (acessa o portal)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.profiles.split(",") if n.strip()]
+    if args.source:
+        bench_source(args.source, names)
+    else:
+        bench_profiles(names, args.url, args.runs)
+
+
+if __name__ == "__main__":
+    main()
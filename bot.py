@@ -0,0 +1,168 @@
+"""
+Bot de detalhes sob demanda (LAZY_DETAILS=true).
+
+Os alertas saem sem o enriquecimento caro (itens do modal do ME Compras,
+objeto completo do BNC) e com um botao "Ver itens/detalhes". Este loop le os
+cliques via getUpdates (long polling, como no chat_id.py), busca o detalhe so
+da licitacao clicada, guarda no banco (cache por licitacao) e responde na
+conversa, em resposta ao alerta. Roda em thread propria dentro do main.py ou
+como processo separado:
+
+    python bot.py
+"""
+import logging
+import threading
+
+import requests
+
+from config import TELEGRAM_API_URL, TELEGRAM_TOKEN
+from db import init_db
+from notifier import format_details_message
+from scrapers import SCRAPERS
+from storage import BaseStorage, get_storage
+
+logger = logging.getLogger(__name__)
+
+_CALLBACK_PREFIX = "det:"
+_RETRY_DELAY = 5  # s entre getUpdates que falharam (rede, 409 de outro consumidor, webhook)
+
+
+class DetailsBot:
+    def __init__(
+        self,
+        storage: BaseStorage | None = None,
+        scrapers: list | None = None,
+        token: str = TELEGRAM_TOKEN,
+        api_url: str = TELEGRAM_API_URL,
+        poll_timeout: int = 30,
+    ):
+        self.storage = storage or get_storage()
+        self.scrapers = {s.name: s for s in (SCRAPERS if scrapers is None else scrapers)}
+        self.base_url = f"{api_url}/bot{token}"
+        self.poll_timeout = poll_timeout
+        self._session = requests.Session()
+        self._offset = None
+        self.answered = 0
+        self.fetched = 0  # detalhes buscados no portal (cache miss)
+
+    def _api(self, method: str, payload: dict, http_timeout: float = 15) -> dict | list | None:
+        resp = self._session.post(f"{self.base_url}/{method}", json=payload, timeout=http_timeout)
+        data = resp.json()
+        if not data.get("ok"):
+            logger.warning("[BOT] %s falhou: %s", method, data.get("description"))
+            return None
+        return data.get("result")
+
+    def poll_once(self) -> int | None:
+        """Um getUpdates (long polling); trata os cliques e retorna quantos chegaram.
+
+        None se o Telegram recusou o getUpdates (ok: false, ex.: 409 Conflict).
+        """
+        payload = {"timeout": self.poll_timeout, "allowed_updates": ["callback_query"]}
+        if self._offset is not None:
+            payload["offset"] = self._offset
+        updates = self._api("getUpdates", payload, http_timeout=self.poll_timeout + 10)
+        if updates is None:
+            return None
+        for update in updates:
+            # Confirma o update ja no proximo getUpdates, mesmo se o tratamento falhar
+            self._offset = update["update_id"] + 1
+            query = update.get("callback_query")
+            if query and str(query.get("data", "")).startswith(_CALLBACK_PREFIX):
+                try:
+                    self.handle_callback(query)
+                except Exception as e:
+                    logger.error("[BOT] Erro ao tratar clique: %s", e, exc_info=True)
+        return len(updates)
+
+    def _details(self, notice: dict) -> dict:
+        """Detalhes do cache; sem cache, busca no portal pelo scraper da fonte."""
+        if notice.get("details") is not None:
+            return notice["details"]
+        # Base: o que ja foi salvo; o portal sobrescreve com o que encontrar
+        details = {k: notice.get(k) for k in ("obj", "itens", "total_itens")}
+        scraper = self.scrapers.get(notice.get("source"))
+        if scraper is not None and scraper.lazy_details:
+            details.update({k: v for k, v in scraper.fetch_details(notice).items() if v})
+            self.fetched += 1
+        self.storage.save_details(notice["id"], details)
+        return details
+
+    def handle_callback(self, query: dict) -> None:
+        notice_id = query["data"][len(_CALLBACK_PREFIX):]
+        message = query.get("message") or {}
+        chat_id = message.get("chat", {}).get("id")
+
+        notice = self.storage.get_notice(notice_id)
+        if notice is None:
+            self._api(
+                "answerCallbackQuery",
+                {"callback_query_id": query["id"], "text": "Licitacao nao encontrada"},
+            )
+            return
+        # Responde ao clique antes da busca (que pode levar segundos no navegador)
+        cached = notice.get("details") is not None
+        answer = {"callback_query_id": query["id"]}
+        if not cached:
+            answer["text"] = "Buscando detalhes no portal..."
+        self._api("answerCallbackQuery", answer)
+        logger.info("[BOT] Detalhes de '%s' (%s)", notice["title"], "cache" if cached else "portal")
+
+        details = self._details(notice)
+        self._api("sendMessage", {
+            "chat_id": chat_id,
+            "text": format_details_message(notice, details, notice.get("source") or "-"),
+            "parse_mode": "MarkdownV2",
+            "reply_to_message_id": message.get("message_id"),
+            "disable_web_page_preview": True,
+        })
+        self.answered += 1
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                received = self.poll_once()
+            except requests.RequestException as e:
+                logger.warning("[BOT] Erro no getUpdates: %s", e)
+                received = None
+            except Exception as e:
+                # Resposta inesperada nao pode matar a thread em silencio
+                logger.error("[BOT] Erro inesperado no getUpdates: %s", e, exc_info=True)
+                received = None
+            if received is None:
+                stop.wait(_RETRY_DELAY)
+
+
+class BotThread:
+    """Roda o DetailsBot em thread propria (usado pelo main.py com LAZY_DETAILS)."""
+
+    def __init__(self, bot: DetailsBot | None = None):
+        self.bot = bot or DetailsBot()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.bot.run, args=(self._stop,), name="bot", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        # O getUpdates em curso termina sozinho em ate poll_timeout; thread daemon
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    init_db(require=("LAZY_DETAILS",))
+    logger.info("Bot de detalhes iniciado")
+    try:
+        DetailsBot().run(threading.Event())
+    except KeyboardInterrupt:
+        logger.info("Bot encerrado pelo usuario")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Circuit breaker por fonte, consultado pelo main.py antes de cada scraper.
+
+    fechado --(BREAKER_FAILURES falhas seguidas)--> aberto
+    aberto  --(backoff vencido + checagem HTTP ok)--> meio-aberto
+    meio-aberto --(execucao completa ok)--> fechado
+    meio-aberto/checagem falhou --> aberto, com o dobro do backoff
+
+Enquanto aberta, a fonte e pulada sem abrir navegador (nada de 60 s de goto +
+30 s de seletor por ciclo) e as demais seguem no ritmo normal. O backoff e
+BREAKER_BASE_DELAY * 2^(aberturas - 1), limitado a BREAKER_MAX_DELAY, com
+jitter de metade do intervalo para as fontes nao voltarem todas juntas.
+
+Falha = excecao no processamento. Os scrapers levantam em erro de navegacao
+(portal fora do ar) e retornam [] so quando a listagem esta de fato vazia,
+como CASAN e Sanesul no inicio do ano: listagem vazia nao abre o circuito.
+"""
+import logging
+import random
+import time
+from datetime import datetime
+
+from config import BREAKER_BASE_DELAY, BREAKER_FAILURES, BREAKER_MAX_DELAY, BREAKER_PROBE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff(
+    attempt: int, base_delay: float = BREAKER_BASE_DELAY, max_delay: float = BREAKER_MAX_DELAY
+) -> float:
+    """Espera da `attempt`-esima abertura seguida (1, 2, ...): exponencial com jitter."""
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failures: int = BREAKER_FAILURES,
+        base_delay: float = BREAKER_BASE_DELAY,
+        max_delay: float = BREAKER_MAX_DELAY,
+    ):
+        self.name = name
+        self.threshold = failures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = CLOSED
+        self.failures = 0  # falhas seguidas
+        self.opens = 0  # aberturas seguidas (expoente do backoff)
+        self.open_until = 0.0
+
+    def _open(self) -> None:
+        self.opens += 1
+        self.state = OPEN
+        self.open_until = time.time() + backoff(self.opens, self.base_delay, self.max_delay)
+        logger.warning(
+            "[BREAKER] [%s] Aberto apos %d falhas; nova tentativa as %s",
+            self.name, self.failures, datetime.fromtimestamp(self.open_until).strftime("%H:%M:%S"),
+        )
+
+    def allow(self, probe) -> bool:
+        """True se a fonte deve rodar agora. `probe()` (HTTP barato) so roda
+        quando o backoff venceu; se falhar, o circuito reabre."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.time() < self.open_until:
+            return False
+        try:
+            ok = probe()
+        except Exception as e:
+            logger.info("[BREAKER] [%s] Checagem falhou: %s", self.name, e)
+            ok = False
+        if not ok:
+            self._open()
+            return False
+        logger.info("[BREAKER] [%s] Checagem ok; execucao de teste (meio-aberto)", self.name)
+        self.state = HALF_OPEN
+        return True
+
+    def record(self, ok: bool) -> None:
+        """Resultado da execucao completa da fonte."""
+        if ok:
+            if self.state != CLOSED:
+                logger.info("[BREAKER] [%s] Fechado: fonte respondeu", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.opens = 0
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self._open()
+
+
+class BreakerBoard:
+    """Um CircuitBreaker por fonte, criado na primeira consulta."""
+
+    def __init__(self, probe_timeout: float = BREAKER_PROBE_TIMEOUT):
+        self.probe_timeout = probe_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name)
+        return self.breakers[name]
+
+    def allow(self, scraper) -> bool:
+        return self.get(scraper.name).allow(lambda: scraper.probe(self.probe_timeout))
+
+    def record(self, scraper, ok: bool) -> None:
+        self.get(scraper.name).record(ok)
+
+    def open_count(self) -> int:
+        return sum(1 for b in self.breakers.values() if b.state != CLOSED)
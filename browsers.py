@@ -0,0 +1,314 @@
+"""
+Navegadores remotos: em vez de abrir um Chromium local por scraper, conecta a
+navegadores ja iniciados em outra maquina (ou num servidor local nos testes).
+
+    BROWSER_ENDPOINTS=http://pool-1:9222,ws://pool-2:3000/
+
+Cada endpoint e um de:
+
+    http(s)://host:9222                  Chromium com --remote-debugging-port
+    ws(s)://host:9222/devtools/browser/  (CDP, connect_over_cdp)
+    ws(s)://host:3000/...                servidor do Playwright
+                                         (npx playwright run-server, launchServer)
+
+A escolha segue BROWSER_ENDPOINT_STRATEGY: round_robin (rodizio) ou
+least_loaded (menos abas abertas no endpoint, somando todos os processos que o
+usam, lidas no /json/list do CDP; servidor Playwright nao expoe a carga e conta
+so os navegadores deste processo). Empate segue o rodizio. Um endpoint que
+recusa conexao vai para o fim da fila por BROWSER_ENDPOINT_COOLDOWN s e o
+proximo e tentado; se todos falharem, abre o Chromium local quando
+BROWSER_LOCAL_FALLBACK=true.
+
+Sem BROWSER_ENDPOINTS, launch() equivale ao p.chromium.launch(headless=True) de
+sempre. Com navegador remoto, o custo de CPU/RSS do runstats e do memwatch fica
+na maquina do pool (procstats so ve processos locais).
+
+Perfil persistente (BROWSER_PERSISTENT=true, fontes com persistent_profile):
+cada fonte roda num contexto com user-data-dir proprio em BROWSER_PROFILE_DIR,
+entao JS, CSS e fontes dos portais vem do cache em disco (limitado a
+BROWSER_CACHE_MB) nas visitas seguintes. Os cookies sao apagados ao abrir: o
+fluxo continua o de uma sessao nova (login do ME Compras), so o cache e
+reaproveitado. O perfil e recriado do zero quando passa de BROWSER_PROFILE_MAX_MB
+ou de BROWSER_PROFILE_MAX_AGE dias. So vale para Chromium local.
+
+Perfis de lancamento (LAUNCH_PROFILES): cada scraper escolhe o seu em
+launch_profile; BROWSER_LAUNCH_PROFILE forca um para todos. Os args so valem
+para Chromium local (o remoto ja vem lancado); as opcoes de contexto valem
+sempre. Custo de cada perfil: python bench_browser.py.
+
+    default   Chromium headless padrao do Playwright
+    minimal   sem GPU/rasterizador por software, audio no proprio processo,
+              sem site-per-process (um renderer a menos por iframe de outro
+              dominio) e janela 800x600
+    nojs      minimal com JavaScript desligado, para paginas renderizadas
+              no servidor
+"""
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from config import (
+    BROWSER_CACHE_MB,
+    BROWSER_ENDPOINT_COOLDOWN,
+    BROWSER_ENDPOINT_STRATEGY,
+    BROWSER_ENDPOINT_TIMEOUT,
+    BROWSER_ENDPOINTS,
+    BROWSER_LAUNCH_PROFILE,
+    BROWSER_LOCAL_FALLBACK,
+    BROWSER_PROFILE_DIR,
+    BROWSER_PROFILE_MAX_AGE,
+    BROWSER_PROFILE_MAX_MB,
+)
+
+logger = logging.getLogger(__name__)
+
+# Background networking, extensoes e audio mudo ja sao padrao do Playwright;
+# ficam explicitos para o perfil valer igual fora dele
+_MINIMAL_ARGS = [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--mute-audio",
+    "--disable-features=AudioServiceOutOfProcess,IsolateOrigins,site-per-process,Translate,MediaRouter",
+    "--window-size=800,600",
+]
+_SMALL_VIEWPORT = {"width": 800, "height": 600}
+_LOAD_TIMEOUT = 2  # s; consulta de carga lenta nao pode atrasar o lancamento
+
+LAUNCH_PROFILES = {
+    "default": {"args": [], "context": {}},
+    "minimal": {"args": _MINIMAL_ARGS, "context": {"viewport": _SMALL_VIEWPORT}},
+    "nojs": {
+        "args": _MINIMAL_ARGS,
+        "context": {"viewport": _SMALL_VIEWPORT, "java_script_enabled": False},
+    },
+}
+
+
+def launch_profile(name: str) -> dict:
+    """Perfil pelo nome (BROWSER_LAUNCH_PROFILE, se definido, vale para todos)."""
+    name = BROWSER_LAUNCH_PROFILE or name
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Perfil de lancamento desconhecido: {name}")
+    return LAUNCH_PROFILES[name]
+
+
+def is_cdp(endpoint: str) -> bool:
+    """CDP (connect_over_cdp) ou protocolo do servidor Playwright (connect)."""
+    return endpoint.startswith(("http://", "https://")) or "/devtools/" in endpoint
+
+
+class BrowserEndpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.in_use = 0  # navegadores conectados por este processo
+        self.failed_until = 0.0
+
+    def load(self) -> int:
+        """Abas abertas no endpoint (todos os processos) pelo /json/list do CDP.
+
+        Servidor Playwright ou consulta que falha: navegadores deste processo.
+        """
+        if not is_cdp(self.url):
+            return self.in_use
+        parts = urlsplit(self.url)
+        scheme = "https" if parts.scheme in ("https", "wss") else "http"
+        try:
+            resp = requests.get(f"{scheme}://{parts.netloc}/json/list", timeout=_LOAD_TIMEOUT)
+            resp.raise_for_status()
+            return sum(1 for target in resp.json() if target.get("type") == "page")
+        except (requests.RequestException, ValueError) as e:
+            logger.debug("[BROWSER] Carga de %s indisponivel: %s", self.url, e)
+            return self.in_use
+
+    def connect(self, p, timeout: float = BROWSER_ENDPOINT_TIMEOUT):
+        if is_cdp(self.url):
+            return p.chromium.connect_over_cdp(self.url, timeout=timeout * 1000)
+        return p.chromium.connect(self.url, timeout=timeout * 1000)
+
+
+class EndpointPool:
+    def __init__(
+        self,
+        endpoints: list[str] = BROWSER_ENDPOINTS,
+        strategy: str = BROWSER_ENDPOINT_STRATEGY,
+        cooldown: float = BROWSER_ENDPOINT_COOLDOWN,
+        local_fallback: bool = BROWSER_LOCAL_FALLBACK,
+    ):
+        self.endpoints = [BrowserEndpoint(url) for url in endpoints]
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.local_fallback = local_fallback
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def _candidates(self) -> list[BrowserEndpoint]:
+        """Endpoints na ordem de tentativa; os em quarentena vao para o fim."""
+        with self._lock:
+            start = next(self._next) % len(self.endpoints)
+            order = self.endpoints[start:] + self.endpoints[:start]
+        now = time.time()
+        ready = [e for e in order if e.failed_until <= now]
+        if self.strategy == "least_loaded":
+            # Consulta fora do lock (rede); sort estavel mantem o rodizio nos empates
+            loads = {e.url: e.load() for e in ready}
+            ready.sort(key=lambda e: loads[e.url])
+        return ready + [e for e in order if e.failed_until > now]
+
+    def _acquire(self, endpoint: BrowserEndpoint, browser):
+        with self._lock:
+            endpoint.in_use += 1
+
+        def release(_browser):
+            with self._lock:
+                endpoint.in_use -= 1
+
+        # close() do scraper desconecta (sem fechar o navegador remoto) e dispara o evento
+        browser.on("disconnected", release)
+        return browser
+
+    def launch(self, p, **launch_options):
+        """Navegador para um scraper: remoto se houver endpoints, senao local."""
+        if not self.endpoints:
+            return p.chromium.launch(headless=True, **launch_options)
+        errors = []
+        for endpoint in self._candidates():
+            try:
+                browser = endpoint.connect(p)
+            except Exception as e:
+                endpoint.failed_until = time.time() + self.cooldown
+                logger.warning("[BROWSER] Falha ao conectar em %s: %s", endpoint.url, e)
+                errors.append(e)
+                continue
+            logger.debug("[BROWSER] Conectado em %s (%d em uso)", endpoint.url, endpoint.in_use + 1)
+            return self._acquire(endpoint, browser)
+        if self.local_fallback:
+            logger.warning("[BROWSER] Nenhum endpoint respondeu; abrindo Chromium local")
+            return p.chromium.launch(headless=True, **launch_options)
+        raise errors[-1]
+
+    def in_use(self) -> int:
+        return sum(e.in_use for e in self.endpoints)
+
+
+POOL = EndpointPool()
+
+
+def launch(p, **launch_options):
+    """Abre (ou conecta a) um navegador pelo POOL do processo."""
+    return POOL.launch(p, **launch_options)
+
+
+# ----------------------------------------------------------------------
+# Perfil persistente por fonte
+# ----------------------------------------------------------------------
+
+_CREATED = ".created"  # marca a criacao do perfil (idade para a limpeza)
+_profile_locks: dict[str, threading.Lock] = {}
+_profile_locks_guard = threading.Lock()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # arquivo temporario do Chromium sumiu no meio da varredura
+    return total
+
+
+def prune_profile(
+    path: str, max_mb: float = BROWSER_PROFILE_MAX_MB, max_age_days: float = BROWSER_PROFILE_MAX_AGE
+) -> None:
+    """Apaga o perfil grande ou velho demais (o proximo launch cria um novo)."""
+    if not os.path.isdir(path):
+        return
+    marker = os.path.join(path, _CREATED)
+    age_days = (time.time() - os.path.getmtime(marker)) / 86400 if os.path.exists(marker) else 0
+    size_mb = _dir_size(path) / 1e6
+    if size_mb <= max_mb and age_days <= max_age_days:
+        return
+    logger.info("[BROWSER] Recriando perfil %s (%.0f MB, %.1f dias)", path, size_mb, age_days)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class PersistentBrowser:
+    """Imita o Browser que os scrapers usam (new_context + close) sobre um
+    contexto persistente. O contexto so abre no new_context(), que traz as
+    opcoes (user_agent...) exigidas ja no launch_persistent_context."""
+
+    def __init__(self, p, path: str, lock: threading.Lock, stealth: bool = False, **launch_options):
+        self.p = p
+        self.path = path
+        self.lock = lock
+        self.stealth = stealth
+        self.launch_options = launch_options
+        self.context = None
+        self.fallback = None  # navegador comum se o perfil estiver preso a outro processo
+
+    def _open(self, context_options: dict):
+        args = list(self.launch_options.get("args", []))
+        args.append(f"--disk-cache-size={int(BROWSER_CACHE_MB * 1024 * 1024)}")
+        if self.stealth:
+            # O playwright_stealth nao intercepta launch_persistent_context
+            args.append("--disable-blink-features=AutomationControlled")
+        options = {**self.launch_options, "args": args}
+        context = self.p.chromium.launch_persistent_context(
+            self.path, headless=True, **options, **context_options
+        )
+        if self.stealth:
+            from playwright_stealth import Stealth
+
+            Stealth().apply_stealth_sync(context)
+        context.clear_cookies()
+        return context
+
+    def new_context(self, **context_options):
+        if self.context is None:
+            try:
+                self.context = self._open(context_options)
+            except Exception as e:
+                # Outro no na mesma maquina com o perfil aberto (SingletonLock)
+                logger.warning("[BROWSER] Perfil %s indisponivel, sem cache: %s", self.path, e)
+                self.fallback = launch(self.p, **self.launch_options)
+                self.context = self.fallback.new_context(**context_options)
+        return self.context
+
+    def close(self) -> None:
+        try:
+            if self.fallback is not None:
+                self.fallback.close()
+            elif self.context is not None:
+                self.context.close()
+        finally:
+            self.lock.release()
+
+
+def persistent(p, source: str, stealth: bool = False, **launch_options):
+    """Navegador com o perfil persistente da fonte; None se indisponivel
+    (perfil em uso por outra thread, como o bot no fetch_details)."""
+    name = "".join(c if c.isalnum() else "_" for c in source)
+    path = os.path.abspath(os.path.join(BROWSER_PROFILE_DIR, name))
+    with _profile_locks_guard:
+        lock = _profile_locks.setdefault(path, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        prune_profile(path)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+            open(os.path.join(path, _CREATED), "w").close()
+    except OSError as e:
+        lock.release()
+        logger.warning("[BROWSER] Perfil %s indisponivel: %s", path, e)
+        return None
+    return PersistentBrowser(p, path, lock, stealth, **launch_options)
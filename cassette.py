@@ -0,0 +1,261 @@
+"""
+Gravacao e reproducao do trafego dos scrapers (CASSETTE_MODE), para rodar e
+medir qualquer fonte sem rede e sempre com as mesmas respostas.
+
+    CASSETTE_MODE=record python test_fiep.py     # acessa o portal e grava
+    CASSETTE_MODE=replay python test_fiep.py     # offline, mesmas respostas
+
+Cada fonte ganha uma pasta em CASSETTE_DIR com arquivos HAR 1.2:
+
+    browser-1.har, browser-2.har...   um por contexto do Playwright, gravados
+                                      pelo route_from_har(update=True)
+    http.har                          requisicoes do requests (probe, detalhes
+                                      do BNC) via adaptador de sessao
+
+Na reproducao, Playwright (context.route) e requests (CassetteAdapter) buscam
+a resposta no mesmo indice: metodo + URL, preferindo o corpo identico (POST de
+paginacao) e, entre respostas iguais, a ordem gravada; a ultima se repete se a
+fonte pedir mais vezes. Requisicao nao gravada e abortada (ConnectionError no
+requests). Gravar limpa a pasta da fonte na primeira execucao do processo.
+
+Senhas do config (ME_PASSWORD) sao trocadas por "<redacted>" nos arquivos; o
+login reproduzido casa pelo metodo + URL. As esperas fixas dos scrapers
+(wait_for_timeout) continuam valendo: a reproducao tira so a latencia da rede.
+"""
+import base64
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, quote_plus
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config import CASSETTE_DIR, CASSETTE_MODE, ME_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+_REDACTED = "<redacted>"
+_SECRETS = [s for s in (ME_PASSWORD,) if s]
+# Corpo da reproducao ja vem decodificado e com tamanho proprio
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def redact(text: str | None) -> str | None:
+    if not text:
+        return text
+    for secret in _SECRETS:
+        for variant in {secret, quote(secret), quote_plus(secret)}:
+            text = text.replace(variant, _REDACTED)
+    return text
+
+
+def _body(content: dict) -> bytes:
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+def _headers(entry: dict) -> dict:
+    return {
+        h["name"]: h["value"]
+        for h in entry["response"].get("headers", [])
+        if h["name"].lower() not in _DROP_HEADERS
+    }
+
+
+class Cassette:
+    def __init__(self, source: str, mode: str = CASSETTE_MODE, directory: str = CASSETTE_DIR):
+        name = "".join(c if c.isalnum() else "_" for c in source)
+        self.source = source
+        self.mode = mode
+        self.path = os.path.join(directory, name)
+        self.browsers = 0  # contextos gravados por este processo
+        self._http: list[dict] = []
+        self._index: dict[tuple, list[dict]] = defaultdict(list)
+        self._served: dict[tuple, int] = defaultdict(int)
+        self._session = None
+        self._lock = threading.Lock()
+        if mode == RECORD:
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.makedirs(self.path)
+        else:
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Reproducao
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        files = sorted(glob.glob(os.path.join(self.path, "browser-*.har")), key=_har_number)
+        files.append(os.path.join(self.path, "http.har"))
+        total = 0
+        for path in files:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for entry in json.load(f)["log"]["entries"]:
+                    request = entry["request"]
+                    self._index[(request["method"], request["url"])].append(entry)
+                    total += 1
+        if not total:
+            logger.warning("[CASSETTE] [%s] Nada gravado em %s", self.source, self.path)
+        logger.info("[CASSETTE] [%s] %d respostas carregadas de %s", self.source, total, self.path)
+
+    def lookup(self, method: str, url: str, body: str | None = None) -> dict | None:
+        """Resposta gravada para a requisicao (entrada HAR) ou None."""
+        key = (method, redact(url))
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            body = redact(body)
+            for entry in entries:
+                if body and (entry["request"].get("postData") or {}).get("text") == body:
+                    return entry
+            served = self._served[key]
+            self._served[key] += 1
+            return entries[min(served, len(entries) - 1)]
+
+    def _route(self, route) -> None:
+        request = route.request
+        entry = self.lookup(request.method, request.url, request.post_data)
+        if entry is None:
+            logger.debug("[CASSETTE] [%s] Sem gravacao: %s %s", self.source, request.method, request.url)
+            route.abort()
+            return
+        response = entry["response"]
+        route.fulfill(status=response["status"], headers=_headers(entry), body=_body(response["content"]))
+
+    # ------------------------------------------------------------------
+    # Playwright
+    # ------------------------------------------------------------------
+
+    def attach(self, context) -> None:
+        """Grava ou reproduz o trafego do contexto (chamado pelo BaseScraper._new_page)."""
+        if self.mode == REPLAY:
+            context.route("**/*", self._route)
+            return
+        with self._lock:
+            self.browsers += 1
+            path = os.path.join(self.path, f"browser-{self.browsers}.har")
+        # O HAR so e escrito no context.close() (ver BaseScraper._close_browser)
+        context.route_from_har(path, update=True, update_content="embed", update_mode="minimal")
+        context.on("close", lambda _context: self._redact_file(path))
+
+    def _redact_file(self, path: str) -> None:
+        if not _SECRETS or not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            har = json.load(f)
+        for entry in har["log"]["entries"]:
+            post = entry["request"].get("postData")
+            if post:
+                post["text"] = redact(post.get("text"))
+            entry["request"]["url"] = redact(entry["request"]["url"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(har, f)
+
+    # ------------------------------------------------------------------
+    # requests
+    # ------------------------------------------------------------------
+
+    def record_http(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        body = request.body.decode("utf-8", "replace") if isinstance(request.body, bytes) else request.body
+        entry = {
+            "startedDateTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "time": round(elapsed * 1000, 1),
+            "request": {
+                "method": request.method,
+                "url": redact(request.url),  # lookup() casa pela URL mascarada
+                "headers": [],
+                **({"postData": {"mimeType": request.headers.get("Content-Type", ""), "text": redact(body)}} if body else {}),
+            },
+            "response": {
+                "status": response.status_code,
+                "statusText": response.reason or "",
+                "headers": [{"name": k, "value": v} for k, v in response.headers.items()],
+                "content": {
+                    "size": len(response.content),
+                    "mimeType": response.headers.get("Content-Type", ""),
+                    "text": base64.b64encode(response.content).decode("ascii"),
+                    "encoding": "base64",
+                },
+            },
+        }
+        with self._lock:
+            self._http.append(entry)
+            har = {"log": {"version": "1.2", "creator": {"name": "cassette", "version": "1"}, "entries": self._http}}
+            with open(os.path.join(self.path, "http.har"), "w", encoding="utf-8") as f:
+                json.dump(har, f)
+
+    def session(self) -> requests.Session:
+        """Sessao do requests presa a fita (uma por fonte, compartilhada entre threads)."""
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = CassetteAdapter(self)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Adaptador do requests: grava pela rede ou responde da fita."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == RECORD:
+            t0 = time.perf_counter()
+            response = super().send(request, **kwargs)
+            self.cassette.record_http(request, response, time.perf_counter() - t0)
+            return response
+        body = request.body.decode("utf-8", "replace") if isinstance(request.body, bytes) else request.body
+        entry = self.cassette.lookup(request.method, request.url, body)
+        if entry is None:
+            raise requests.ConnectionError(f"Cassette sem resposta para {request.method} {request.url}", request=request)
+        response = requests.Response()
+        response.status_code = entry["response"]["status"]
+        response.reason = entry["response"].get("statusText", "")
+        response.headers = CaseInsensitiveDict(_headers(entry))
+        response._content = _body(entry["response"]["content"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def _har_number(path: str) -> int:
+    return int(os.path.basename(path)[len("browser-"):-len(".har")])
+
+
+_cassettes: dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get(source: str) -> Cassette | None:
+    """Fita da fonte neste processo (None com CASSETTE_MODE desligado)."""
+    if CASSETTE_MODE not in (RECORD, REPLAY):
+        return None
+    with _cassettes_lock:
+        if source not in _cassettes:
+            _cassettes[source] = Cassette(source)
+        return _cassettes[source]
+
+
+def reset(source: str) -> None:
+    """Recomeca a fita da fonte: grava de novo ou reproduz desde o inicio."""
+    with _cassettes_lock:
+        _cassettes.pop(source, None)
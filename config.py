@@ -10,19 +10,170 @@ PG_DB = os.getenv("PG_DB", "licitacoes")
 PG_USER = os.getenv("PG_USER", "postgres")
 PG_PASS = os.getenv("PG_PASS", "")
 
+# Armazenamento: "postgres" (padrao), "sqlite" (no unico, sem servidor) ou "supabase".
+# Supabase nao tem TRACK_CHANGES, TRACK_LIFECYCLE nem OUTBOX_ENABLED e SQLite nao
+# tem WORKER_MODE: a combinacao e recusada na inicializacao (db.init_db)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgres").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "licitacoes.db")
+
+# Supabase (STORAGE_BACKEND=supabase e loop legado licitacoes.py)
+SUPABASE_URL = os.getenv("SUPABASE_URL", "")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
+SUPABASE_TABLE = os.getenv("SUPABASE_TABLE", "licitacoes")
+
 # Telegram
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+# Envio assincrono em thread propria, com limites aplicados antes do envio
+# (padroes = limites documentados do Telegram: 30 msg/s global, 1 msg/s por
+# chat privado, 20 msg/min por grupo)
+TELEGRAM_ASYNC = os.getenv("TELEGRAM_ASYNC", "false").strip().lower() == "true"
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_GROUP_RATE_PER_MIN = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MIN", "20"))
+
+# Resumo: a partir de DIGEST_THRESHOLD licitacoes novas de uma fonte no mesmo
+# ciclo, envia poucas mensagens agrupadas em vez de uma por licitacao (0 = desligado)
+DIGEST_THRESHOLD = int(os.getenv("DIGEST_THRESHOLD", "0"))
+
+# Outbox: alertas gravados junto com a licitacao e entregues por um dispatcher
+# separado (retries com backoff exponencial; apos OUTBOX_MAX_ATTEMPTS vira "dead")
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "false").strip().lower() == "true"
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BASE_DELAY = float(os.getenv("OUTBOX_BASE_DELAY", "30"))
+OUTBOX_MAX_DELAY = float(os.getenv("OUTBOX_MAX_DELAY", "3600"))
 
 # Geral
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "1800"))
 
+# Rastreia alteracoes (data, objeto, itens) de licitacoes ja enviadas e avisa no Telegram
+TRACK_CHANGES = os.getenv("TRACK_CHANGES", "false").strip().lower() == "true"
+
+# Com outbox: licitacao alterada edita a mensagem original (editMessageText)
+# em vez de enviar um novo alerta
+EDIT_IN_PLACE = os.getenv("EDIT_IN_PLACE", "false").strip().lower() == "true"
+
+# Alertas sem o enriquecimento caro (itens do ME Compras, objeto do BNC) e com
+# botao "Ver detalhes": o bot.py busca so o que for clicado
+LAZY_DETAILS = os.getenv("LAZY_DETAILS", "false").strip().lower() == "true"
+
+# Ciclo de vida (first_seen/last_seen/seen_count) e aviso de licitacoes que sairam do portal
+TRACK_LIFECYCLE = os.getenv("TRACK_LIFECYCLE", "false").strip().lower() == "true"
+NOTIFY_VANISHED = os.getenv("NOTIFY_VANISHED", "false").strip().lower() == "true"
+
 # ME Compras
 ME_USERNAME = os.getenv("ME_USERNAME", "")
 ME_PASSWORD = os.getenv("ME_PASSWORD", "")
 
 # Filtro de palavras-chave (separadas por virgula no .env)
 # Exemplo: FILTER_KEYWORDS=serviço,manutenção,limpeza,conservação
-# Deixar vazio para receber todas as licitacoes sem filtro
+# Acentos e maiusculas sao ignorados; "obra" entre aspas casa so a palavra
+# inteira e -termo exclui a licitacao. Deixar vazio para receber todas
 _raw = os.getenv("FILTER_KEYWORDS", "")
 FILTER_KEYWORDS = [kw.strip().lower() for kw in _raw.split(",") if kw.strip()]
+
+# Relevancia minima (0 a 1, TF-IDF contra FILTER_KEYWORDS) no lugar do casamento
+# exato. Vazio = desligado. Assinaturas cadastradas usam --min-score
+_min_score = os.getenv("FILTER_MIN_SCORE", "").strip()
+FILTER_MIN_SCORE = float(_min_score) if _min_score else None
+# IDF da relevancia: frequencia dos termos nas SCORE_CORPUS_SIZE licitacoes mais
+# recentes do banco, recalculada a cada SCORE_CORPUS_REFRESH s (nao depende do lote)
+SCORE_CORPUS_SIZE = int(os.getenv("SCORE_CORPUS_SIZE", "5000"))
+SCORE_CORPUS_REFRESH = float(os.getenv("SCORE_CORPUS_REFRESH", "21600"))
+
+# Medicao por etapa (tracing.py): spans em JSONL rotativo e, opcionalmente,
+# exportados via OpenTelemetry (OTLP, configurado pelas variaveis OTEL_*)
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").strip().lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces/trace.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "5"))
+TRACE_OTEL = os.getenv("TRACE_OTEL", "false").strip().lower() == "true"
+
+# Endpoint de metricas do Prometheus (metrics.py); 0 = desligado
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_ADDR = os.getenv("METRICS_ADDR", "0.0.0.0")
+
+# Historico de execucoes por fonte (tabela scrape_runs): paginas, bytes, linhas
+# e CPU/pico de RSS do Chromium, amostrado a cada SCRAPE_RUNS_SAMPLE_INTERVAL s
+SCRAPE_RUNS = os.getenv("SCRAPE_RUNS", "true").strip().lower() == "true"
+SCRAPE_RUNS_SAMPLE_INTERVAL = float(os.getenv("SCRAPE_RUNS_SAMPLE_INTERVAL", "0.5"))
+
+# Perfil sob demanda (profiling.py): SIGUSR1 ou o arquivo PROFILE_FLAG perfilam
+# os proximos PROFILE_CYCLES ciclos. PROFILE_MODE: "sample" (pilhas amostradas
+# a cada PROFILE_INTERVAL s, formato collapsed) ou "cprofile" (.pstats)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_FLAG = os.getenv("PROFILE_FLAG", os.path.join(PROFILE_DIR, "PROFILE"))
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", "1"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample").strip().lower()
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "false").strip().lower() == "true"
+
+# Vigia de memoria (memwatch.py): mata Chromium orfao a cada ciclo e recicla o
+# processo acima de WATCHDOG_RSS_MB (Python + Chromium; 0 = sem limite).
+# WATCHDOG_TRACEMALLOC: "auto" (liga ao detectar crescimento), "true" ou "false"
+WATCHDOG_ENABLED = os.getenv("WATCHDOG_ENABLED", "true").strip().lower() == "true"
+WATCHDOG_RSS_MB = float(os.getenv("WATCHDOG_RSS_MB", "1500"))
+WATCHDOG_GROWTH_CYCLES = int(os.getenv("WATCHDOG_GROWTH_CYCLES", "3"))
+WATCHDOG_TRACEMALLOC = os.getenv("WATCHDOG_TRACEMALLOC", "auto").strip().lower()
+
+# Circuit breaker por fonte (breaker.py): apos BREAKER_FAILURES falhas seguidas
+# (excecao; listagem vazia nao conta) a fonte e pulada com backoff exponencial + jitter
+# e volta apos uma checagem HTTP barata
+BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").strip().lower() == "true"
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_BASE_DELAY = float(os.getenv("BREAKER_BASE_DELAY", "1800"))
+BREAKER_MAX_DELAY = float(os.getenv("BREAKER_MAX_DELAY", "21600"))
+BREAKER_PROBE_TIMEOUT = float(os.getenv("BREAKER_PROBE_TIMEOUT", "10"))
+
+# Concorrencia adaptativa por host (hostlimit.py, AIMD): comeca em
+# HOST_INITIAL_CONCURRENCY, sobe +1 por janela ok e multiplica por HOST_DECREASE
+# em 429/503/timeout/latencia alta. Limites aprendidos ficam em HOST_LIMITS_FILE
+HOST_INITIAL_CONCURRENCY = float(os.getenv("HOST_INITIAL_CONCURRENCY", "2"))
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "8"))
+HOST_DECREASE = float(os.getenv("HOST_DECREASE", "0.5"))
+HOST_LATENCY_FACTOR = float(os.getenv("HOST_LATENCY_FACTOR", "3"))
+HOST_MIN_INTERVAL = float(os.getenv("HOST_MIN_INTERVAL", "0.2"))
+HOST_LIMITS_FILE = os.getenv("HOST_LIMITS_FILE", "host_limits.json")
+
+# Modo worker (worker.py): fontes como jobs na tabela scrape_jobs do Postgres,
+# executados por varios nos (SKIP LOCKED + heartbeat). WORKER_SOURCES limita as
+# fontes deste no (separadas por virgula; vazio = todas)
+WORKER_MODE = os.getenv("WORKER_MODE", "false").strip().lower() == "true"
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "15"))
+WORKER_HEARTBEAT = float(os.getenv("WORKER_HEARTBEAT", "30"))
+WORKER_STALE_AFTER = float(os.getenv("WORKER_STALE_AFTER", "180"))
+WORKER_SOURCES = [s.strip() for s in os.getenv("WORKER_SOURCES", "").split(",") if s.strip()]
+
+# Navegadores remotos (browsers.py): endpoints CDP (http://host:9222) ou do
+# servidor Playwright (ws://host:3000/), separados por virgula; vazio = Chromium
+# local. Escolha round_robin ou least_loaded (menos abas no /json/list do CDP,
+# empate em rodizio); endpoint que falha fica BROWSER_ENDPOINT_COOLDOWN s no fim da fila
+BROWSER_ENDPOINTS = [e.strip() for e in os.getenv("BROWSER_ENDPOINTS", "").split(",") if e.strip()]
+BROWSER_ENDPOINT_STRATEGY = os.getenv("BROWSER_ENDPOINT_STRATEGY", "round_robin").strip().lower()
+BROWSER_ENDPOINT_TIMEOUT = float(os.getenv("BROWSER_ENDPOINT_TIMEOUT", "30"))
+BROWSER_ENDPOINT_COOLDOWN = float(os.getenv("BROWSER_ENDPOINT_COOLDOWN", "300"))
+BROWSER_LOCAL_FALLBACK = os.getenv("BROWSER_LOCAL_FALLBACK", "true").strip().lower() == "true"
+
+# Perfil persistente por fonte (browsers.py): fontes com persistent_profile usam
+# user-data-dir proprio em BROWSER_PROFILE_DIR e reaproveitam o cache HTTP em
+# disco (BROWSER_CACHE_MB); o perfil e recriado acima de BROWSER_PROFILE_MAX_MB
+# ou apos BROWSER_PROFILE_MAX_AGE dias
+BROWSER_PERSISTENT = os.getenv("BROWSER_PERSISTENT", "false").strip().lower() == "true"
+BROWSER_PROFILE_DIR = os.getenv("BROWSER_PROFILE_DIR", "browser_profiles")
+BROWSER_CACHE_MB = float(os.getenv("BROWSER_CACHE_MB", "100"))
+BROWSER_PROFILE_MAX_MB = float(os.getenv("BROWSER_PROFILE_MAX_MB", "300"))
+BROWSER_PROFILE_MAX_AGE = float(os.getenv("BROWSER_PROFILE_MAX_AGE", "7"))
+
+# Perfil de lancamento do Chromium (browsers.LAUNCH_PROFILES: default, minimal,
+# nojs) para todos os scrapers; vazio = o launch_profile de cada fonte
+BROWSER_LAUNCH_PROFILE = os.getenv("BROWSER_LAUNCH_PROFILE", "").strip().lower()
+
+# Fita de trafego dos scrapers (cassette.py): "record" grava as respostas de
+# cada fonte em CASSETTE_DIR, "replay" reproduz sem rede; vazio = desligado
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "").strip().lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
@@ -3,37 +3,42 @@ import json
 import logging
 from urllib.parse import urlparse, urlunparse
 
-import psycopg2
-
-from config import PG_DB, PG_HOST, PG_PASS, PG_PORT, PG_USER
+from config import LAZY_DETAILS, OUTBOX_ENABLED, TRACK_CHANGES, TRACK_LIFECYCLE, WORKER_MODE
+from storage import BaseStorage, get_storage
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
-
-def _connect():
-    return psycopg2.connect(
-        host=PG_HOST, port=PG_PORT, dbname=PG_DB, user=PG_USER, password=PG_PASS
-    )
-
-
-def init_db():
-    conn = _connect()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS notices (
-            id TEXT PRIMARY KEY,
-            title TEXT,
-            org TEXT,
-            url TEXT,
-            published TEXT,
-            raw_hash TEXT,
-            found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+# Opcao do .env -> metodo do backend que ela exige
+_REQUIRED = (
+    ("TRACK_CHANGES", TRACK_CHANGES, "save_changes"),
+    ("TRACK_LIFECYCLE", TRACK_LIFECYCLE, "mark_seen"),
+    ("OUTBOX_ENABLED", OUTBOX_ENABLED, "enqueue"),
+    ("WORKER_MODE", WORKER_MODE, "claim_job"),
+    ("LAZY_DETAILS", LAZY_DETAILS, "get_notice"),
+)
+
+
+def init_db(require: tuple[str, ...] = ()):
+    """Inicializa o backend e recusa opcoes que ele nao suporta.
+
+    Sem a checagem, o NotImplementedError so apareceria no primeiro ciclo.
+    require: opcoes que o processo usa mesmo desligadas no .env (ex.: o
+    dispatcher.py avulso sempre precisa da outbox).
+    """
+    storage = get_storage()
+    unsupported = [
+        option for option, enabled, method in _REQUIRED
+        if (enabled or option in require)
+        and getattr(type(storage), method) is getattr(BaseStorage, method)
+    ]
+    if unsupported:
+        raise ValueError(
+            f"Backend {storage.name} nao suporta {', '.join(unsupported)}; "
+            "desative no .env ou use STORAGE_BACKEND=postgres"
         )
-    """)
-    conn.commit()
-    cur.close()
-    conn.close()
-    logger.info("Banco de dados inicializado")
+    storage.init_db()
+    logger.info("Banco de dados inicializado (%s)", storage.name)
 
 
 def _md5(s: str) -> str:
@@ -60,44 +65,152 @@ def generate_id(item: dict) -> str:
 
 
 def get_known_ids(items: list[dict]) -> set[str]:
-    """Um unico SELECT retorna quais IDs da lista ja existem no banco."""
+    """Uma unica consulta retorna quais IDs da lista ja existem no banco."""
     if not items:
         return set()
-    ids = [generate_id(item) for item in items]
-    conn = _connect()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id FROM notices WHERE id = ANY(%s)", (ids,))
-        return {row[0] for row in cur.fetchall()}
-    finally:
-        cur.close()
-        conn.close()
-
-
-def save_many(items: list[dict]) -> None:
-    """Insere multiplos itens em lote. Ignora conflitos (ON CONFLICT DO NOTHING)."""
+    with span("db.get_known_ids", items=len(items)) as s:
+        known = get_storage().get_known_ids([generate_id(item) for item in items])
+        s.set(known=len(known))
+    return known
+
+
+def _to_row(item: dict, source: str | None) -> dict:
+    itens = item.get("itens") or []
+    return {
+        "id": generate_id(item),
+        "source": source,
+        "title": item.get("title"),
+        "org": item.get("org"),
+        "url": item.get("url"),
+        "published": item.get("published"),
+        "obj": item.get("obj"),
+        "itens": itens,
+        "total_itens": item.get("total_itens", len(itens)),
+        "raw_hash": _md5(json.dumps(item, ensure_ascii=False, sort_keys=True)),
+    }
+
+
+def save_many(
+    items: list[dict], source: str | None = None, outbox: list[dict] | None = None
+) -> None:
+    """Insere multiplos itens em lote. Ignora conflitos (ON CONFLICT DO NOTHING).
+
+    Alem dos campos de identificacao, persiste obj e os itens da ME Compras
+    para permitir busca retroativa (ver search). Mensagens em outbox (ver
+    outbox_message) sao gravadas na mesma transacao.
+    """
     if not items:
         return
-    rows = []
+    with span("db.save_many", items=len(items), outbox=len(outbox or [])):
+        get_storage().save_many([_to_row(item, source) for item in items], outbox=outbox)
+
+
+def outbox_message(
+    kind: str,
+    notice_id: str,
+    chat_id,
+    text: str,
+    version=None,
+    message_id: str | None = None,
+    reply_markup: dict | None = None,
+) -> dict:
+    """Monta uma mensagem de outbox. A chave de idempotencia (tipo, licitacao,
+    chat e versao) impede que o mesmo alerta seja enfileirado duas vezes.
+
+    message_id: mensagem a editar (kind "edit"); reply_markup: teclado inline.
+    """
+    key = f"{kind}:{notice_id}:{chat_id}"
+    if version is not None:
+        key += f":{version}"
+    return {
+        "idempotency_key": key,
+        "notice_id": notice_id,
+        "chat_id": str(chat_id),
+        "kind": kind,
+        "text": text,
+        "message_id": message_id,
+        "reply_markup": reply_markup,
+    }
+
+
+def enqueue(outbox: list[dict]) -> None:
+    """Enfileira mensagens na outbox fora de um save_many (alteracoes, encerramentos)."""
+    if outbox:
+        with span("db.enqueue", items=len(outbox)):
+            get_storage().enqueue(outbox)
+
+
+def get_message_ids(items: list[dict]) -> dict[tuple[str, str], str]:
+    """Mensagens ja enviadas das licitacoes, por chat, numa unica consulta."""
+    return get_storage().get_message_ids([generate_id(item) for item in items])
+
+
+# Campos comparados para descrever o que mudou (title/org entram no id, entao
+# uma mudanca neles gera uma licitacao "nova", nao uma alteracao).
+_CHANGE_FIELDS = ("published", "obj", "url", "total_itens", "itens")
+
+
+def update_changed(items: list[dict], source: str | None = None) -> list[tuple[dict, dict, int]]:
+    """Atualiza itens ja conhecidos cujo conteudo (raw_hash) mudou no portal.
+
+    A comparacao de hashes roda no banco, em lote; a versao anterior fica em
+    notice_history. Retorna [(item, {campo: (antigo, novo)}, versao)] dos alterados.
+    """
+    if not items:
+        return []
+    rows = {}
+    by_id = {}
     for item in items:
-        uid = generate_id(item)
-        rows.append((
-            uid,
-            item.get("title"),
-            item.get("org"),
-            item.get("url"),
-            item.get("published"),
-            _md5(json.dumps(item, ensure_ascii=False, sort_keys=True)),
-        ))
-    conn = _connect()
-    cur = conn.cursor()
-    try:
-        cur.executemany(
-            "INSERT INTO notices (id, title, org, url, published, raw_hash) "
-            "VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
-            rows,
-        )
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+        row = _to_row(item, source)
+        if row["id"] not in rows:  # mesmo id repetido no lote: vale o primeiro
+            rows[row["id"]] = row
+            by_id[row["id"]] = item
+
+    with span("db.save_changes", items=len(rows)) as s:
+        results = get_storage().save_changes(list(rows.values()))
+        s.set(changed=len(results))
+    changed = []
+    for result in results:
+        old = result["old"]
+        new = rows[result["id"]]
+        changes = {
+            field: (old.get(field), new[field])
+            for field in _CHANGE_FIELDS
+            if (old.get(field) or None) != (new[field] or None)
+        }
+        changed.append((by_id[result["id"]], changes, result["version"]))
+    return changed
+
+
+def mark_seen(items: list[dict], source: str, complete: bool = True) -> list[dict]:
+    """Registra que os itens foram vistos neste ciclo (last_seen/seen_count).
+
+    Licitacoes da fonte que nao apareceram na listagem sao marcadas como
+    encerradas (vanished_at) e retornadas. Lista vazia (fetch falhou) ou
+    parcial (complete=False, paginacao interrompida) nao encerra nada.
+    """
+    if not items:
+        return []
+    ids = list(dict.fromkeys(generate_id(item) for item in items))
+    with span("db.mark_seen", items=len(ids)) as s:
+        vanished = get_storage().mark_seen(source, ids, vanish=complete)
+        s.set(vanished=len(vanished))
+    return vanished
+
+
+def save_runs(runs: list[dict]) -> None:
+    """Grava o historico de execucoes do ciclo (scrape_runs) num unico lote."""
+    if runs:
+        with span("db.save_runs", items=len(runs)):
+            get_storage().save_runs(runs)
+
+
+def search(query: str, since=None, source: str | None = None, limit: int = 50) -> list[dict]:
+    """Busca textual (titulo, objeto, itens, orgao) nas licitacoes ja salvas.
+
+    since filtra por found_at (datetime) e source pelo nome do scraper.
+    Retorna dicts ordenados por relevancia, com a chave "rank".
+    """
+    if not query.strip():
+        return []
+    return get_storage().search(query, since=since, source=source, limit=limit)
@@ -0,0 +1,154 @@
+"""
+Dispatcher da outbox de notificacoes.
+
+Drena a tabela outbox (gravada pelo main.py na mesma transacao das
+licitacoes) e entrega no Telegram com retries, backoff exponencial e estado
+"dead" para mensagens que esgotaram as tentativas. Roda em thread propria
+dentro do main.py (OUTBOX_ENABLED=true) ou como processo separado:
+
+    python dispatcher.py
+"""
+import asyncio
+import logging
+import threading
+
+from async_notifier import AsyncTelegramNotifier, TelegramError
+from config import (
+    OUTBOX_BASE_DELAY,
+    OUTBOX_BATCH,
+    OUTBOX_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_DELAY,
+    OUTBOX_POLL_INTERVAL,
+)
+from db import init_db
+from storage import BaseStorage, get_storage
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        storage: BaseStorage | None = None,
+        notifier: AsyncTelegramNotifier | None = None,
+        batch_size: int = OUTBOX_BATCH,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+    ):
+        self.storage = storage or get_storage()
+        self.notifier = notifier or AsyncTelegramNotifier()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.sent = 0
+        self.dead = 0
+
+    async def _deliver(self, row: dict) -> dict:
+        # Edicoes repetem o teclado: editMessageText sem reply_markup o remove
+        extra = {"reply_markup": row["reply_markup"]} if row.get("reply_markup") else {}
+        if row["kind"] == "edit" and row.get("message_id"):
+            try:
+                return await self.notifier.edit_text(row["chat_id"], row["message_id"], row["text"], **extra)
+            except TelegramError as e:
+                if not e.permanent:
+                    raise
+                # Mensagem apagada ou antiga demais para editar: envia uma nova
+                logger.info("[OUTBOX] Edicao recusada (%s); enviando nova mensagem", e)
+        return await self.notifier.send_text(row["chat_id"], row["text"], **extra)
+
+    async def drain_once(self) -> int:
+        """Reserva um lote, envia concorrentemente e registra o resultado.
+
+        Retorna quantas mensagens foram reservadas (0 = outbox vazia).
+        """
+        rows = await asyncio.to_thread(self.storage.claim_outbox, self.batch_size, OUTBOX_LEASE)
+        if not rows:
+            return 0
+        with span("outbox.drain", claimed=len(rows)) as s:
+            return await self._send_batch(rows, s)
+
+    async def _send_batch(self, rows: list[dict], current_span) -> int:
+        results = await asyncio.gather(*(self._deliver(row) for row in rows), return_exceptions=True)
+
+        sent, failed = [], []
+        for row, result in zip(rows, results):
+            if isinstance(result, BaseException):
+                failed.append({
+                    "id": row["id"],
+                    "error": str(result)[:500],
+                    "permanent": isinstance(result, TelegramError) and result.permanent,
+                })
+            else:
+                message_id = (result or {}).get("message_id")
+                sent.append({"id": row["id"], "message_id": str(message_id) if message_id else None})
+
+        await asyncio.to_thread(self.storage.mark_sent, sent)
+        dead = await asyncio.to_thread(
+            self.storage.mark_failed, failed, OUTBOX_MAX_ATTEMPTS, OUTBOX_BASE_DELAY, OUTBOX_MAX_DELAY
+        )
+        self.sent += len(sent)
+        self.dead += len(dead)
+        current_span.set(sent=len(sent), failed=len(failed), dead=len(dead))
+        if failed:
+            logger.warning(
+                "[OUTBOX] %d enviadas, %d com falha (%d sem novas tentativas)",
+                len(sent), len(failed), len(dead),
+            )
+        return len(rows)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Drena continuamente; dorme poll_interval quando a outbox esta vazia."""
+        while not stop.is_set():
+            try:
+                claimed = await self.drain_once()
+            except Exception as e:
+                logger.error("[OUTBOX] Erro ao drenar outbox: %s", e, exc_info=True)
+                claimed = 0
+            if not claimed:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        await self.notifier.aclose()
+
+
+class DispatcherThread:
+    """Roda o OutboxDispatcher num event loop em thread propria (usado pelo main.py)."""
+
+    def __init__(self, dispatcher: OutboxDispatcher | None = None):
+        self.dispatcher = dispatcher or OutboxDispatcher()
+        self._loop = asyncio.new_event_loop()
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._stop = asyncio.Event()
+        self._loop.run_until_complete(self.dispatcher.run(self._stop))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        if self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=timeout)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    init_db(require=("OUTBOX_ENABLED",))
+    logger.info("Dispatcher da outbox iniciado")
+    stop = asyncio.Event()
+    try:
+        asyncio.run(OutboxDispatcher().run(stop))
+    except KeyboardInterrupt:
+        logger.info("Dispatcher encerrado pelo usuario")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Servidor falso da Bot API do Telegram para testes locais (sem rede).
+
+Registra as mensagens recebidas e devolve 429 quando os limites do Telegram
+sao violados (janela deslizante de 1s global/por chat privado e 60s por grupo),
+para verificar que o rate limit do cliente evita os 429 antes de envia-los.
+
+Uso: FakeTelegramServer().start() e TELEGRAM_API_URL=<server.url>
+"""
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegramServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        group_rate_per_min: float = 20,
+        latency: float = 0.05,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate_per_min = group_rate_per_min
+        self.latency = latency  # simula o tempo de resposta da API
+        self.messages: list[dict] = []
+        self.rejected = 0
+        self.edits = 0  # editMessageText aceitos
+        self.updates: list[dict] = []  # fila do getUpdates (ver push_callback)
+        self.callback_answers: list[dict] = []
+        self.fail_next = 0  # proximas N chamadas respondem 502 (falha transitoria)
+        self._lock = threading.Lock()
+        self._global_window: deque = deque()
+        self._chat_windows: dict[str, deque] = defaultdict(deque)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTelegramServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def push_callback(self, chat_id, message_id: int, data: str) -> None:
+        """Simula um clique num botao inline da mensagem."""
+        with self._lock:
+            update_id = len(self.updates) + 1
+            self.updates.append({
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id),
+                    "from": {"id": 1, "first_name": "Teste"},
+                    "message": {"message_id": message_id, "chat": {"id": chat_id}},
+                    "data": data,
+                },
+            })
+
+    # ------------------------------------------------------------------
+
+    def _over_limit(self, chat_id: str, now: float) -> bool:
+        """Janela deslizante: True se aceitar esta mensagem violaria algum limite."""
+        if chat_id.startswith("-"):
+            window, limit = 60.0, self.group_rate_per_min
+        else:
+            window, limit = 1.0, self.chat_rate
+        chat = self._chat_windows[chat_id]
+        while chat and now - chat[0] >= window:
+            chat.popleft()
+        while self._global_window and now - self._global_window[0] >= 1.0:
+            self._global_window.popleft()
+        # Folga de 1 para absorver o jitter de relogio entre cliente e servidor
+        if len(chat) >= limit + 1 or len(self._global_window) >= self.global_rate + 1:
+            return True
+        chat.append(now)
+        self._global_window.append(now)
+        return False
+
+    def handle(self, method: str, payload: dict) -> tuple[int, dict]:
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+        if method == "sendMessage":
+            if not payload.get("text"):
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message text is empty"}
+            chat_id = str(payload.get("chat_id"))
+            with self._lock:
+                if self._over_limit(chat_id, time.monotonic()):
+                    self.rejected += 1
+                    return 429, {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": "Too Many Requests: retry after 1",
+                        "parameters": {"retry_after": 1},
+                    }
+                message = {
+                    "message_id": len(self.messages) + 1,
+                    "chat": {"id": payload.get("chat_id")},
+                    "date": int(time.time()),
+                    "text": payload.get("text", ""),
+                    "reply_markup": payload.get("reply_markup"),
+                    "reply_to_message_id": payload.get("reply_to_message_id"),
+                    "received_at": time.monotonic(),
+                }
+                self.messages.append(message)
+            return 200, {"ok": True, "result": message}
+        if method == "getUpdates":
+            offset = int(payload.get("offset") or 0)
+            with self._lock:
+                pending = [u for u in self.updates if u["update_id"] >= offset]
+            return 200, {"ok": True, "result": pending}
+        if method == "answerCallbackQuery":
+            with self._lock:
+                self.callback_answers.append(payload)
+            return 200, {"ok": True, "result": True}
+        if method == "editMessageText":
+            chat_id = str(payload.get("chat_id"))
+            with self._lock:
+                if self._over_limit(chat_id, time.monotonic()):
+                    self.rejected += 1
+                    return 429, {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": "Too Many Requests: retry after 1",
+                        "parameters": {"retry_after": 1},
+                    }
+                index = int(payload.get("message_id") or 0) - 1
+                message = self.messages[index] if 0 <= index < len(self.messages) else None
+                if message is None or str(message["chat"]["id"]) != chat_id:
+                    return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message to edit not found"}
+                if message["text"] == payload.get("text"):
+                    return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is not modified"}
+                message["text"] = payload.get("text", "")
+                message["edit_date"] = int(time.time())
+                self.edits += 1
+            return 200, {"ok": True, "result": message}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                method = self.path.rsplit("/", 1)[-1]
+                time.sleep(server.latency)
+                self._reply(*server.handle(method, payload))
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
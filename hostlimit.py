@@ -0,0 +1,208 @@
+"""
+Limite de concorrencia por host, adaptativo (AIMD), compartilhado pelos
+caminhos requests e Playwright.
+
+    with hostlimit.slot(url) as s:          # espera vaga no host
+        resp = requests.get(url, timeout=30)
+        s.record(resp.status_code, resp.headers.get("Retry-After"))
+
+    hostlimit.get(url, timeout=30)          # atalho para o caso acima
+
+Cada host comeca com HOST_INITIAL_CONCURRENCY requisicoes simultaneas:
+
+- resposta ok com latencia normal: +1/limite (aumento aditivo, ~+1 por janela);
+- 429/503, timeout, erro de conexao ou latencia acima de HOST_LATENCY_FACTOR x a
+  latencia de base do host (media movel de todas as respostas): limite *
+  HOST_DECREASE (reducao multiplicativa), no maximo uma vez por janela (so
+  conta quem saiu depois da ultima reducao);
+- Retry-After pausa o host inteiro pelo tempo pedido (ate 5 min).
+
+Entre inicios de requisicao no mesmo host ha pelo menos HOST_MIN_INTERVAL s.
+Os limites aprendidos vao para HOST_LIMITS_FILE no fim de cada ciclo (save) e
+sao relidos na proxima execucao.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from playwright.sync_api import TimeoutError as PlaywrightTimeout
+
+from config import (
+    HOST_DECREASE,
+    HOST_INITIAL_CONCURRENCY,
+    HOST_LATENCY_FACTOR,
+    HOST_LIMITS_FILE,
+    HOST_MAX_CONCURRENCY,
+    HOST_MIN_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAX_PAUSE = 300
+_BASELINE_ALPHA = 0.1  # peso de cada resposta na latencia de base (EWMA)
+_CONGESTION_STATUS = (429, 503)
+
+
+class HostLimit:
+    def __init__(
+        self, host: str, limit: float = HOST_INITIAL_CONCURRENCY, baseline: float | None = None
+    ):
+        self.host = host
+        self.limit = limit
+        self.baseline = baseline  # latencia tipica (s) com o host folgado
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_start = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Espera vaga, pausa e intervalo minimo; retorna o instante de inicio."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.paused_until, self._last_start + HOST_MIN_INTERVAL) - now
+                if self.in_flight < int(self.limit) and wait <= 0:
+                    self.in_flight += 1
+                    self._last_start = now
+                    return now
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(
+        self, started: float, congested: bool, retry_after: float | None = None, timed: bool = True
+    ) -> None:
+        """timed=False: a latencia nao entra no sinal (navegacao completa no Playwright
+        ou requisicao sem resposta, como timeout e erro de conexao)."""
+        latency = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + min(retry_after, _MAX_PAUSE))
+            slow = timed and self.baseline is not None and latency > HOST_LATENCY_FACTOR * self.baseline
+            if timed:
+                # Media movel de toda resposta, lenta ou nao: um 404/redirect rapido
+                # isolado nao fixa a base, e lentidao sustentada vira o novo normal
+                if self.baseline is None:
+                    self.baseline = latency
+                else:
+                    self.baseline += (latency - self.baseline) * _BASELINE_ALPHA
+            if congested or slow:
+                # Uma reducao por janela: respostas de requisicoes iniciadas antes
+                # da ultima reducao refletem o limite antigo
+                if started >= self._last_decrease:
+                    old = self.limit
+                    self.limit = max(1.0, self.limit * HOST_DECREASE)
+                    self._last_decrease = time.monotonic()
+                    logger.debug("[HOST] %s: limite %.1f -> %.1f", self.host, old, self.limit)
+            else:
+                self.limit = min(float(HOST_MAX_CONCURRENCY), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class _Slot:
+    def __init__(self, limit: HostLimit, timed: bool = True):
+        self.limit = limit
+        self.timed = timed
+        self.status = None
+        self.retry_after = None
+
+    def record(self, status: int | None, retry_after=None) -> None:
+        """Status HTTP da resposta (e Retry-After, se houver)."""
+        self.status = status
+        if retry_after:
+            try:
+                self.retry_after = float(retry_after)
+            except (TypeError, ValueError):
+                pass  # Retry-After em formato de data: ignora
+
+    def __enter__(self):
+        self.started = self.limit.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        congested = self.status in _CONGESTION_STATUS or (
+            exc_type is not None
+            and issubclass(exc_type, (requests.Timeout, requests.ConnectionError, PlaywrightTimeout))
+        )
+        # Sem resposta (timeout, conexao recusada) a latencia nao diz nada sobre o host
+        timed = self.timed and self.status is not None
+        self.limit.release(self.started, congested, self.retry_after, timed)
+        return False
+
+
+class HostLimiter:
+    def __init__(self, path: str = HOST_LIMITS_FILE):
+        self.path = path
+        self.hosts: dict[str, HostLimit] = {}
+        self._lock = threading.Lock()
+        self._learned = self._load()
+
+    def _load(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Falha ao ler %s: %s", self.path, e)
+            return {}
+
+    def get(self, url: str) -> HostLimit:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self.hosts:
+                learned = self._learned.get(host, {})
+                self.hosts[host] = HostLimit(
+                    host,
+                    min(float(HOST_MAX_CONCURRENCY), learned.get("limit", HOST_INITIAL_CONCURRENCY)),
+                    learned.get("baseline"),
+                )
+            return self.hosts[host]
+
+    def slot(self, url: str, timed: bool = True) -> _Slot:
+        return _Slot(self.get(url), timed)
+
+    def save(self) -> None:
+        """Grava os limites aprendidos (arquivo temporario + rename, sem arquivo pela metade)."""
+        if not self.path or not self.hosts:
+            return
+        data = {**self._learned}
+        for host, limit in self.hosts.items():
+            data[host] = {"limit": round(limit.limit, 2), "baseline": limit.baseline}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+LIMITER = HostLimiter()
+
+
+def slot(url: str, timed: bool = True) -> _Slot:
+    """Vaga no host da URL (use com `with`); registre o status com .record().
+
+    timed=False quando a latencia nao e comparavel a de um GET (page.goto).
+    """
+    return LIMITER.slot(url, timed)
+
+
+def get(url: str, session=None, **kwargs) -> requests.Response:
+    """requests.get (ou session.get) sob o limite do host."""
+    with slot(url) as s:
+        resp = (session or requests).get(url, **kwargs)
+        s.record(resp.status_code, resp.headers.get("Retry-After"))
+    return resp
+
+
+def save() -> None:
+    try:
+        LIMITER.save()
+    except OSError as e:
+        logger.warning("Falha ao gravar %s: %s", LIMITER.path, e)
@@ -11,6 +11,7 @@ import os
 import sys
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from storage.supabase import SupabaseStorage
 
 load_dotenv()
 
@@ -28,8 +29,9 @@ if not url or not key:
 
 try:
     supabase: Client = create_client(url, key)
+    storage_backend = SupabaseStorage(supabase, TABELA_NOTICES)
     # Tenta rodar uma operação simples para verificar a chave
-    supabase.table(TABELA_NOTICES).select("id").limit(0).execute() 
+    storage_backend.init_db()
     print("[INFO] Conexão com Supabase estabelecida e chaves verificadas.")
 
 except Exception as e:
@@ -95,54 +97,60 @@ def generate_unique_id(item: dict) -> str:
     return hashlib.md5(unique_str.encode("utf-8")).hexdigest()
 
 
-def is_new_and_save(item):
+def filter_new_and_save(items, stop_at_known=True):
     """
-    Verifica a existência do item no Supabase e, se novo, insere.
+    Verifica em lote quais itens são novos no Supabase e insere todos de uma vez.
+
+    Uma consulta com filtro `in` + um upsert com ignore-duplicates por lote,
+    em vez de duas requisições HTTP por item. Com stop_at_known=True (sites
+    ordenados), para no primeiro item já processado.
+    Retorna (novos_itens, encontrou_item_antigo).
     """
-    uid = generate_unique_id(item)
-    
-    # 1. Checa a existência no Supabase
+    if not items:
+        return [], False
+
+    ids = [generate_unique_id(item) for item in items]
+
+    # 1. Checa a existência de todos os IDs no Supabase
     try:
-        # Busca na tabela 'notices' onde 'id' é igual ao uid
-        response = supabase.table(TABELA_NOTICES).select("id").eq("id", uid).limit(1).execute()
-        
-        if len(response.data) > 0:
-            return False, uid  # Já existe
-        
+        known = storage_backend.get_known_ids(ids)
     except Exception as e:
         print(f"[ERRO SUPABASE] Falha ao verificar existência: {e}")
-        return False, uid # Assume False (não novo) em caso de erro para evitar spam
-    
-    # 2. Insere o item se for novo
-    try:
-        # Calcula o raw_hash (necessário para o schema)
-        # Use sort_keys=True para garantir o mesmo hash, independente da ordem das chaves
-        raw_hash_value = hashlib.md5(json.dumps(item, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
-
-        # Cria o payload de dados, garantindo que o `id` (PK) e o `raw_hash` existam
-        # Os campos 'obj', 'location', 'closing_date' (se existirem no item) precisam ser mapeados
-        # para as colunas da sua tabela no Supabase.
-        data_to_insert = {
+        return [], True  # Assume nada novo em caso de erro para evitar spam
+
+    new_items = []
+    rows = []
+    seen = set()
+    found_old_item = False
+    for item, uid in zip(items, ids):
+        if uid in known:
+            if stop_at_known:
+                found_old_item = True
+                break
+            continue
+        if uid in seen:  # mesmo item repetido no lote
+            continue
+        seen.add(uid)
+        new_items.append(item)
+        rows.append({
             "id": uid,
             "title": item.get('title'),
             "org": item.get('org'),
             "url": item.get('url'),
             "published": item.get('published'),
-            "raw_hash": raw_hash_value,
-            # Se você usar 'obj' e outros campos, mapeie-os aqui:
-            # "obj": item.get('obj'), 
-            # "location": item.get('location'), 
-        }
-        
-        # Insere no Supabase
-        response = supabase.table(TABELA_NOTICES).insert(data_to_insert).execute()
-        
-        return True, uid  # Item inserido com sucesso
-        
+            # sort_keys=True garante o mesmo hash, independente da ordem das chaves
+            "raw_hash": md5(json.dumps(item, ensure_ascii=False, sort_keys=True)),
+        })
+
+    # 2. Insere todos os novos numa única requisição
+    try:
+        storage_backend.save_many(rows)
     except Exception as e:
-        print(f"[ERRO SUPABASE] Falha ao inserir item: {e}")
-        return False, uid
-    
+        print(f"[ERRO SUPABASE] Falha ao inserir itens: {e}")
+        return [], found_old_item
+
+    return new_items, found_old_item
+
 def escape_markdown(text):
     """
     Escapa os caracteres especiais usados no Markdown do Telegram, como:
@@ -327,26 +335,21 @@ def fetch_fiep_with_pagination(site_config):
                 
                 print(f"[INFO] Página #{page_num}: {len(current_page_items)} itens encontrados.")
                 
-                found_old_item = False
-                new_items_on_page = 0
-                
-                # C. Processa e verifica novos itens (Lógica de Otimização)
-                for item in current_page_items:
-                    is_new, _ = is_new_and_save(item) 
-                    
-                    if is_new:
-                        new_items_on_page += 1
-                        all_new_items.append(item)
-                        msg = format_item_message(item)
-                        ok, resp = send_telegram_message(msg)
-                        print(f"[ALERTA] Novo item [{site_config['name']}]: {item['title'][:50]}...", 
-                              ("-> Enviado!" if ok else f"-> ERRO TELEGRAM: {resp}"))
-                    else:
-                        # OTIMIZAÇÃO CRUCIAL: Se o site está ordenado (o que garantimos com o clique),
-                        # ao encontrar um item antigo, paramos a busca.
-                        print(f"[INFO] Item '{item.get('title', 'Sem Título')}' já processado. Interrompendo a paginação.")
-                        found_old_item = True
-                        break 
+                # C. Processa e verifica novos itens em lote (Lógica de Otimização)
+                # OTIMIZAÇÃO CRUCIAL: Se o site está ordenado (o que garantimos com o clique),
+                # ao encontrar um item antigo, paramos a busca.
+                new_items, found_old_item = filter_new_and_save(current_page_items)
+                new_items_on_page = len(new_items)
+                all_new_items.extend(new_items)
+
+                for item in new_items:
+                    msg = format_item_message(item)
+                    ok, resp = send_telegram_message(msg)
+                    print(f"[ALERTA] Novo item [{site_config['name']}]: {item['title'][:50]}...", 
+                          ("-> Enviado!" if ok else f"-> ERRO TELEGRAM: {resp}"))
+
+                if found_old_item:
+                    print("[INFO] Item já processado encontrado. Interrompendo a paginação.")
                 
                 print(f"[INFO] {new_items_on_page} novos alertas enviados na página #{page_num}.")
                 
@@ -965,23 +968,19 @@ SITES = [
 
 def process_items_and_alert(site_name, items):
     """Lógica comum de verificação, salvamento e alerta com otimização de parada."""
-    new_count = 0
-    for item in items:
-        is_new, _ = is_new_and_save(item) 
-        
-        if is_new:
-            new_count += 1
-            msg = format_item_message(item)
-            ok, resp = send_telegram_message(msg)
-            # Imprime o log de novo item
-            print(f"[ALERTA] Novo item [{site_name}]: {item['title'][:50]}...", 
-                  ("-> Enviado!" if ok else f"-> ERRO TELEGRAM: {resp}"))
-        else:
-            # OTIMIZAÇÃO: Interrompe a verificação ao encontrar um item antigo (se estiver ordenado)
-            print(f"[INFO] Item '{item.get('title', 'Sem Título')}' já processado. Interrompendo a verificação.")
-            break 
-            
-    return new_count
+    # OTIMIZAÇÃO: Interrompe a verificação ao encontrar um item antigo (se estiver ordenado)
+    new_items, found_old_item = filter_new_and_save(items)
+    if found_old_item:
+        print("[INFO] Item já processado encontrado. Interrompendo a verificação.")
+
+    for item in new_items:
+        msg = format_item_message(item)
+        ok, resp = send_telegram_message(msg)
+        # Imprime o log de novo item
+        print(f"[ALERTA] Novo item [{site_name}]: {item['title'][:50]}...", 
+              ("-> Enviado!" if ok else f"-> ERRO TELEGRAM: {resp}"))
+
+    return len(new_items)
 
 
 def main_loop():
@@ -997,16 +996,12 @@ def main_loop():
                     print(f"[INFO] Buscando site: {site['name']} (Paginação via Playwright)")
                     items = fetch_sanesul_playwright(site['url'], site['base'])
                     print(f"[INFO] {len(items)} itens encontrados em {site['name']}")
-
-                    new_count = 0
-                    for item in items:
-                        is_new, _ = is_new_and_save(item)
-                        if is_new:
-                            new_count += 1
-                            msg = format_item_message(item)
-                            ok, resp = send_telegram_message(msg)
-                            print(f"[ALERTA] Novo item [{site['name']}]: {item['title']}", "Enviado" if ok else f"Erro: {resp}")
-                    print(f"[INFO] {new_count} novos alertas enviados para {site['name']}")
+                    new_items, _ = filter_new_and_save(items, stop_at_known=False)
+                    for item in new_items:
+                        msg = format_item_message(item)
+                        ok, resp = send_telegram_message(msg)
+                        print(f"[ALERTA] Novo item [{site['name']}]: {item['title']}", "Enviado" if ok else f"Erro: {resp}")
+                    print(f"[INFO] {len(new_items)} novos alertas enviados para {site['name']}")
                     continue
                 
                 try:
@@ -1,10 +1,51 @@
+import hashlib
 import logging
 import time
 
-from config import CHECK_INTERVAL, FILTER_KEYWORDS
-from db import generate_id, get_known_ids, init_db, save_many
-from notifier import send
+import hostlimit
+import notifier
+import profiling
+import runstats
+from config import (
+    BREAKER_ENABLED,
+    CHECK_INTERVAL,
+    DIGEST_THRESHOLD,
+    EDIT_IN_PLACE,
+    LAZY_DETAILS,
+    METRICS_ADDR,
+    METRICS_PORT,
+    NOTIFY_VANISHED,
+    OUTBOX_ENABLED,
+    TELEGRAM_ASYNC,
+    TRACK_CHANGES,
+    TRACK_LIFECYCLE,
+    WATCHDOG_ENABLED,
+    WORKER_MODE,
+)
+from db import (
+    enqueue,
+    generate_id,
+    get_known_ids,
+    get_message_ids,
+    init_db,
+    mark_seen,
+    outbox_message,
+    save_many,
+    save_runs,
+    update_changed,
+)
+from notifier import (
+    details_markup,
+    format_digest,
+    format_digest_entry,
+    format_edited_message,
+    format_message,
+    format_update_message,
+    format_vanished_message,
+)
 from scrapers import SCRAPERS
+from subscriptions import SubscriptionIndex, load_index
+from tracing import span
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,66 +55,284 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def _matches_filter(item: dict) -> bool:
-    """Retorna True se o item passa pelo filtro de palavras-chave.
-    Se FILTER_KEYWORDS estiver vazio, todos os itens passam."""
-    if not FILTER_KEYWORDS:
-        return True
-    itens_text = " ".join(i.get("descricao", "") for i in item.get("itens", []))
-    text = f"{item.get('title', '')} {item.get('obj', '')} {itens_text}".lower()
-    return any(kw in text for kw in FILTER_KEYWORDS)
+def _deliver(alerts: list[dict]) -> None:
+    """Entrega alertas que nao vieram de um save_many: via outbox ou direto."""
+    if OUTBOX_ENABLED:
+        enqueue(alerts)
+    else:
+        for alert in alerts:
+            notifier.send_text(alert["text"], alert["chat_id"], alert["reply_markup"])
 
 
-def main():
-    init_db()
-    logger.info("Scraper iniciado. Intervalo: %ds", CHECK_INTERVAL)
+def _new_item_alerts(by_chat: dict[str, list[dict]], source: str, details: bool = False) -> list[dict]:
+    """Por chat: um alerta por licitacao ou, a partir de DIGEST_THRESHOLD, resumos
+    agrupados em mensagens de ate 4096 caracteres.
+
+    details: alertas individuais levam o botao de detalhes sob demanda (bot.py).
+    """
+    alerts = []
+    for chat_id, items in by_chat.items():
+        if DIGEST_THRESHOLD and len(items) >= DIGEST_THRESHOLD:
+            ids = [generate_id(item) for item in items]
+            digest_id = hashlib.md5("|".join(ids).encode("utf-8")).hexdigest()
+            texts = format_digest(
+                f"Novas licitacoes: {source}", [format_digest_entry(item) for item in items]
+            )
+            logger.info(
+                "[RESUMO] [%s] %d licitacoes em %d mensagens para %s",
+                source, len(items), len(texts), chat_id,
+            )
+            alerts.extend(
+                outbox_message("digest", digest_id, chat_id, text, version=part)
+                for part, text in enumerate(texts, 1)
+            )
+        else:
+            for item in items:
+                uid = generate_id(item)
+                alerts.append(outbox_message(
+                    "new", uid, chat_id, format_message(item, source),
+                    reply_markup=details_markup(uid) if details else None,
+                ))
+    return alerts
+
+
+def run_source(scraper, subscriptions: SubscriptionIndex) -> int:
+    """Processa uma fonte; retorna quantas licitacoes a listagem trouxe."""
+    with span("source", source=scraper.name) as current_span:
+        return _process_source(scraper, subscriptions, current_span)
+
+
+def _process_source(scraper, subscriptions: SubscriptionIndex, current_span) -> int:
+    logger.info("Buscando: %s (%s)", scraper.name, scraper.url)
+    scraper.complete = True  # o scraper baixa se a paginacao parar no meio
+    with span("scrape") as s, profiling.stage("scrape"):
+        items = scraper.run()
+        s.set(items=len(items))
+    runstats.count(rows_parsed=len(items))
+
+    # Um unico SELECT para todos os itens da pagina
+    known = get_known_ids(items)
+
+    # Um UPDATE em lote por fonte: last_seen dos vistos, encerra os que sumiram
+    if TRACK_LIFECYCLE:
+        alerts = []
+        # Listagem parcial: paginas nao lidas nao sao "saiu do portal"
+        vanished = mark_seen(items, scraper.name, complete=scraper.complete)
+        # Mesmo filtro dos alertas de novas, min_score incluido
+        recipients = subscriptions.resolve_many(vanished, scraper.name) if NOTIFY_VANISHED else []
+        for row, notice in enumerate(vanished):
+            logger.info(
+                "[ENCERRADO] [%s] %s (visto %d vezes)",
+                scraper.name, notice["title"], notice["seen_count"],
+            )
+            if NOTIFY_VANISHED:
+                text = format_vanished_message(notice, scraper.name)
+                alerts.extend(
+                    outbox_message("vanished", notice["id"], chat_id, text, version=notice["last_seen"])
+                    for chat_id in recipients[row]
+                )
+        _deliver(alerts)
+
+    new_items = []
+    for item in items:
+        if generate_id(item) not in known:
+            new_items.append(item)
+        elif scraper.ordered:
+            logger.info(
+                "[%s] Item ja processado: '%s'. Interrompendo.",
+                scraper.name, item.get("title", "")[:50],
+            )
+            break
+
+    # Deduplica itens com mesmo ID no mesmo lote (evita envio duplo)
+    seen = set()
+    deduped = []
+    for item in new_items:
+        uid = generate_id(item)
+        if uid not in seen:
+            seen.add(uid)
+            deduped.append(item)
+    new_items = deduped
+
+    # Um automato com os termos de todos os perfis: uma passada por licitacao
+    # e, para perfis com min_score, uma matriz de relevancia para o lote todo
+    scores = subscriptions.score(new_items)
+    by_chat: dict[str, list[dict]] = {}
+    for row, item in enumerate(new_items):
+        found = subscriptions.matched_terms(item)
+        item_scores = scores[row] if scores is not None else None
+        chats = subscriptions.resolve(item, scraper.name, found, item_scores)
+        details = []
+        if found:
+            details.append(f"termos: {', '.join(sorted(found))}")
+        if item_scores is not None and len(item_scores):
+            details.append(f"relevancia: {item_scores.max():.2f}")
+        if details:
+            logger.info("[NOVO] [%s] %s (%s)", scraper.name, item["title"], "; ".join(details))
+        else:
+            logger.info("[NOVO] [%s] %s", scraper.name, item["title"])
+        if not chats:
+            logger.info("[FILTRADO] [%s] %s", scraper.name, item["title"])
+        for chat_id in chats:
+            by_chat.setdefault(chat_id, []).append(item)
+    lazy = LAZY_DETAILS and scraper.lazy_details
+    alerts = _new_item_alerts(by_chat, scraper.name, details=lazy)
+    current_span.set(items=len(items), new_items=len(new_items), alerts=len(alerts))
+    runstats.count(new_rows=len(new_items))
+
+    # Um unico INSERT em lote para todos os novos. Com outbox, os alertas vao
+    # na mesma transacao: falha do Telegram ou reinicio nao perde nenhum.
+    save_many(new_items, scraper.name, outbox=alerts if OUTBOX_ENABLED else None)
+    if not OUTBOX_ENABLED:
+        for alert in alerts:
+            notifier.send_text(alert["text"], alert["chat_id"], alert["reply_markup"])
+
+    # Itens ja conhecidos: compara hashes no banco e avisa o que mudou
+    if TRACK_CHANGES:
+        known_items = [item for item in items if generate_id(item) in known]
+        changed = update_changed(known_items, scraper.name)
+        # Mensagens originais de todas as alteradas numa consulta; so a outbox
+        # registra message_id, entao a edicao depende dela
+        originals = {}
+        if EDIT_IN_PLACE and OUTBOX_ENABLED and changed:
+            originals = get_message_ids([item for item, _, _ in changed])
+        alerts = []
+        recipients = subscriptions.resolve_many([item for item, _, _ in changed], scraper.name)
+        for (item, changes, version), chats in zip(changed, recipients):
+            logger.info(
+                "[ALTERADO] [%s] %s (%s)",
+                scraper.name, item["title"], ", ".join(changes) or "conteudo",
+            )
+            uid = generate_id(item)
+            for chat_id in chats:
+                message_id = originals.get((uid, chat_id))
+                if message_id:
+                    text = format_edited_message(item, scraper.name, changes)
+                    alerts.append(outbox_message(
+                        "edit", uid, chat_id, text, version=version, message_id=message_id,
+                        reply_markup=details_markup(uid) if lazy else None,
+                    ))
+                else:
+                    text = format_update_message(item, scraper.name, changes)
+                    alerts.append(outbox_message("update", uid, chat_id, text, version=version))
+        _deliver(alerts)
+    return len(items)
+
 
+def _start_metrics(dispatcher, breakers) -> None:
+    """Endpoint do Prometheus; import tardio (psutil so e necessario aqui)."""
+    import metrics
+    import procstats
+
+    def rate_limited() -> int:
+        outbox = dispatcher.dispatcher.notifier.rate_limited if dispatcher is not None else 0
+        return notifier.rate_limited() + outbox
+
+    metrics.gauge("telegram_queue_depth", "Mensagens aguardando envio assincrono", notifier.queue_depth)
+    metrics.gauge("telegram_rate_limited_total", "Respostas 429 do Telegram", rate_limited, kind="counter")
+    metrics.gauge("process_resident_memory_bytes", "RSS do processo Python", procstats.process_rss)
+    metrics.gauge("chromium_resident_memory_bytes", "RSS somado da arvore do Chromium", procstats.browser_rss)
+    metrics.gauge(
+        "chromium_processes", "Processos do Chromium abertos", lambda: len(procstats.browser_processes())
+    )
+    if breakers is not None:
+        metrics.gauge("scraper_breakers_open", "Fontes com circuit breaker aberto", breakers.open_count)
+    metrics.start_server(METRICS_PORT, METRICS_ADDR)
+
+
+def _run_cycles(breakers, watchdog) -> bool:
+    """Modo de no unico: todas as fontes a cada CHECK_INTERVAL. True = reciclar o processo."""
     while True:
-        for scraper in SCRAPERS:
+        # Recarregadas a cada ciclo: novas assinaturas valem sem reiniciar
+        with profiling.cycle(), span("cycle", sources=len(SCRAPERS)) as cycle:
+            subscriptions = load_index()
+            failures = 0
+            runs = []
+            skipped = 0
+            for scraper in SCRAPERS:
+                # Fonte fora do ar: pula sem abrir navegador, as demais seguem
+                if breakers is not None and not breakers.allow(scraper):
+                    skipped += 1
+                    continue
+                ok = True
+                try:
+                    with runstats.record(scraper.name, runs), profiling.source(scraper.name):
+                        run_source(scraper, subscriptions)
+                except Exception as e:
+                    ok = False
+                    failures += 1
+                    logger.error("Erro no scraper %s: %s", scraper.name, e, exc_info=True)
+                if breakers is not None:
+                    breakers.record(scraper, ok)
+            cycle.set(failures=failures, skipped=skipped)
+            hostlimit.save()
+            # Historico do ciclo num unico INSERT; falha aqui nao derruba o loop
             try:
-                logger.info("Buscando: %s (%s)", scraper.name, scraper.url)
-                items = scraper.run()
-
-                # Um unico SELECT para todos os itens da pagina
-                known = get_known_ids(items)
-
-                new_items = []
-                for item in items:
-                    if generate_id(item) not in known:
-                        new_items.append(item)
-                    elif scraper.ordered:
-                        logger.info(
-                            "[%s] Item ja processado: '%s'. Interrompendo.",
-                            scraper.name, item.get("title", "")[:50],
-                        )
-                        break
-
-                # Deduplica itens com mesmo ID no mesmo lote (evita envio duplo)
-                seen = set()
-                deduped = []
-                for item in new_items:
-                    uid = generate_id(item)
-                    if uid not in seen:
-                        seen.add(uid)
-                        deduped.append(item)
-                new_items = deduped
-
-                # Um unico INSERT em lote para todos os novos
-                save_many(new_items)
-
-                for item in new_items:
-                    logger.info("[NOVO] [%s] %s", scraper.name, item["title"])
-                    if _matches_filter(item):
-                        send(item, scraper.name)
-                    else:
-                        logger.info("[FILTRADO] [%s] %s", scraper.name, item["title"])
+                save_runs(runs)
             except Exception as e:
-                logger.error("Erro no scraper %s: %s", scraper.name, e, exc_info=True)
+                logger.warning("Falha ao gravar scrape_runs: %s", e)
+
+        # Fim do ciclo: colhe Chromium orfao e, acima do limite, recicla o processo
+        if watchdog is not None and watchdog.check():
+            return True
 
         logger.info("Dormindo %ds...\n", CHECK_INTERVAL)
         time.sleep(CHECK_INTERVAL)
 
 
+def main():
+    init_db()
+    dispatcher = None
+    bot = None
+    # Um unico getUpdates por token: com varios workers, o bot roda a parte (python bot.py)
+    if LAZY_DETAILS and not WORKER_MODE:
+        from bot import BotThread
+
+        bot = BotThread()
+        bot.start()
+    if OUTBOX_ENABLED:
+        # Import tardio: o dispatcher traz httpx/asyncio, desnecessarios sem outbox
+        from dispatcher import DispatcherThread
+
+        dispatcher = DispatcherThread()
+        dispatcher.start()
+    elif TELEGRAM_ASYNC:
+        notifier.start_background()
+    breakers = None
+    if BREAKER_ENABLED and not WORKER_MODE:  # na fila, o backoff fica em scrape_jobs
+        from breaker import BreakerBoard
+
+        breakers = BreakerBoard()
+    if METRICS_PORT:
+        _start_metrics(dispatcher, breakers)
+    profiling.install()
+    watchdog = None
+    if WATCHDOG_ENABLED:
+        from memwatch import MemoryWatchdog
+
+        watchdog = MemoryWatchdog()
+    logger.info("Scraper iniciado. Intervalo: %ds", CHECK_INTERVAL)
+
+    recycle = False
+    try:
+        if WORKER_MODE:
+            from worker import JobWorker
+
+            recycle = JobWorker(SCRAPERS, run_source).run(watchdog)
+        else:
+            recycle = _run_cycles(breakers, watchdog)
+    finally:
+        if dispatcher is not None:
+            dispatcher.stop()
+        if bot is not None:
+            bot.stop()
+        notifier.stop_background()
+    if recycle:
+        from memwatch import restart
+
+        restart()
+
+
 if __name__ == "__main__":
     try:
         main()
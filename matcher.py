@@ -0,0 +1,104 @@
+"""
+Casamento de palavras-chave compilado (Aho-Corasick).
+
+Todos os termos de todos os perfis viram um unico automato, montado uma vez
+por ciclo; cada licitacao e percorrida uma so vez, qualquer que seja a
+quantidade de termos. Texto e termos sao normalizados (minusculas, sem
+acentos), entao "manutencao" casa com "Manutenção".
+
+Sintaxe dos termos:
+    limpeza      trecho em qualquer posicao ("limpezas", "autolimpeza")
+    "obra"       palavra inteira ("obra", mas nao "manobra")
+    -software    termo negativo: exclui a licitacao do perfil
+"""
+import unicodedata
+from collections import deque
+from typing import Iterable
+
+
+def normalize(text: str) -> str:
+    """Minusculas e sem diacriticos (NFKD sem marcas combinantes)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def parse_term(raw: str) -> tuple[str, bool, bool]:
+    """Retorna (padrao normalizado, negativo, palavra inteira)."""
+    term = raw.strip()
+    negative = term.startswith("-")
+    if negative:
+        term = term[1:].strip()
+    whole_word = len(term) >= 2 and term[0] == term[-1] == '"'
+    if whole_word:
+        term = term[1:-1].strip()
+    return normalize(term), negative, whole_word
+
+
+class KeywordMatcher:
+    """Automato Aho-Corasick sobre os termos normalizados.
+
+    find() devolve os termos originais (como foram configurados) que aparecem
+    no texto, respeitando limites de palavra para os termos entre aspas.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # por estado: [(tamanho do padrao, palavra inteira, termo original)]
+        self._out: list[list[tuple[int, bool, str]]] = [[]]
+        self.terms: list[str] = []
+        for raw in dict.fromkeys(terms):
+            pattern, _, whole_word = parse_term(raw)
+            if not pattern:
+                continue
+            self.terms.append(raw)
+            self._add(pattern, whole_word, raw)
+        self._build()
+
+    def _add(self, pattern: str, whole_word: bool, raw: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), whole_word, raw))
+
+    def _build(self) -> None:
+        """Links de falha em BFS; as saidas do sufixo sao herdadas pelo estado."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str, normalized: bool = False) -> set[str]:
+        if not self.terms:
+            return set()
+        if not normalized:
+            text = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[str] = set()
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, whole_word, raw in out[state]:
+                if raw in found:
+                    continue
+                if whole_word:
+                    start, end = pos - length + 1, pos + 1
+                    if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                        continue
+                found.add(raw)
+        return found
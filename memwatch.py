@@ -0,0 +1,118 @@
+"""
+Vigia de memoria do loop principal (WATCHDOG_ENABLED=true), chamado no fim
+de cada ciclo do main.py:
+
+1. mata e colhe (reap) Chromium orfao do Playwright (ver procstats.orphan_browsers);
+2. registra o RSS do Python e da arvore do Chromium;
+3. acima de WATCHDOG_RSS_MB (Python + Chromium), forca um gc e, se continuar
+   acima, pede a reciclagem do processo: o main.py encerra as threads e se
+   reexecuta (os.execv) com os mesmos argumentos;
+4. com o RSS do Python crescendo por WATCHDOG_GROWTH_CYCLES ciclos seguidos,
+   loga os pontos do codigo que mais alocaram (diferenca entre snapshots do
+   tracemalloc). Com WATCHDOG_TRACEMALLOC=auto o tracemalloc so liga depois
+   do primeiro crescimento sustentado; "true" mantem ligado desde o inicio.
+"""
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from collections import deque
+
+from config import WATCHDOG_GROWTH_CYCLES, WATCHDOG_RSS_MB, WATCHDOG_TRACEMALLOC
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+_TOP_SITES = 10
+
+
+class MemoryWatchdog:
+    def __init__(
+        self,
+        limit_mb: float = WATCHDOG_RSS_MB,
+        growth_cycles: int = WATCHDOG_GROWTH_CYCLES,
+        trace_mode: str = WATCHDOG_TRACEMALLOC,
+    ):
+        self.limit = limit_mb * _MB
+        self.growth_cycles = growth_cycles
+        self.trace_mode = trace_mode
+        self.history: deque[int] = deque(maxlen=growth_cycles + 1)
+        self.reaped = 0
+        self._snapshot = None
+        if trace_mode == "true":
+            self._start_tracing()
+
+    def _start_tracing(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self._snapshot = tracemalloc.take_snapshot()
+
+    def reap_orphans(self) -> int:
+        import procstats
+
+        orphans = procstats.orphan_browsers()
+        if not orphans:
+            return 0
+        killed = procstats.kill_tree(orphans)
+        self.reaped += killed
+        logger.warning(
+            "[WATCHDOG] %d Chromium orfaos encerrados (%d processos)", len(orphans), killed
+        )
+        return killed
+
+    def _growing(self) -> bool:
+        """RSS do Python subiu em cada um dos ultimos growth_cycles ciclos."""
+        if len(self.history) <= self.growth_cycles:
+            return False
+        values = list(self.history)
+        return all(b > a for a, b in zip(values, values[1:]))
+
+    def _log_allocations(self) -> None:
+        if not tracemalloc.is_tracing():
+            if self.trace_mode == "auto":
+                logger.warning("[WATCHDOG] Memoria crescendo; ligando tracemalloc para achar a origem")
+                self._start_tracing()
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self._snapshot is not None:
+            lines = [str(stat) for stat in snapshot.compare_to(self._snapshot, "lineno")[:_TOP_SITES]]
+            logger.warning("[WATCHDOG] Maiores alocacoes desde o ultimo ciclo:\n  %s", "\n  ".join(lines))
+        self._snapshot = snapshot
+
+    def check(self) -> bool:
+        """Roda no fim do ciclo. True = reciclar o processo (ver restart)."""
+        import procstats
+
+        self.reap_orphans()
+        rss = procstats.process_rss()
+        browsers = procstats.browser_rss()
+        self.history.append(rss)
+        logger.info("[WATCHDOG] RSS: Python %.0f MB, Chromium %.0f MB", rss / _MB, browsers / _MB)
+
+        if self._growing():
+            self._log_allocations()
+        elif self._snapshot is not None:
+            # Sem crescimento: so avanca a base de comparacao
+            self._snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+        if not self.limit or rss + browsers <= self.limit:
+            return False
+        gc.collect()
+        rss = procstats.process_rss()
+        if rss + browsers <= self.limit:
+            return False
+        logger.warning(
+            "[WATCHDOG] RSS %.0f MB acima do limite de %.0f MB; reciclando o processo",
+            (rss + browsers) / _MB, self.limit / _MB,
+        )
+        return True
+
+
+def restart() -> None:
+    """Substitui o processo por uma nova execucao com os mesmos argumentos."""
+    logging.shutdown()
+    os.execv(sys.executable, [sys.executable, *sys.argv])
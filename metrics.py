@@ -0,0 +1,243 @@
+"""
+Metricas no formato texto do Prometheus, servidas em http://<METRICS_ADDR>:<METRICS_PORT>/metrics.
+
+Os valores vem dos spans do tracing.py (um listener traduz cada span fechado
+em histogramas e contadores), entao as etapas ja medidas para o trace nao
+precisam de uma segunda instrumentacao. Valores de estado (fila do Telegram,
+RSS do processo e do Chromium) sao lidos na hora da coleta.
+
+Exemplos de alerta: fonte parada (time() - scraper_last_success_timestamp_seconds
+> 3 * CHECK_INTERVAL), fonte vazia (scraper_items_found_sum estagnado), 429s
+(rate(telegram_rate_limited_total[5m]) > 0).
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+_COUNTS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = _SECONDS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values: dict[tuple, list] = {}  # key -> [contagens por bucket..., soma, total]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            state[bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {k: list(v) for k, v in self._values.items()}
+        lines = []
+        for key, state in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Valor lido na hora da coleta (gauge ou contador mantido por outro objeto)."""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float], kind: str = "gauge"):
+        super().__init__(name, help_text)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        try:
+            return [f"{self.name} {_number(self.fn())}"]
+        except Exception as e:
+            logger.debug("Metrica %s indisponivel: %s", self.name, e)
+            return []
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            body = metric.render()
+            if body:
+                lines.extend(metric.header())
+                lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CYCLE_SECONDS = REGISTRY.register(Histogram(
+    "scraper_cycle_duration_seconds", "Duracao do processamento de uma fonte", ("source",)
+))
+ITEMS_FOUND = REGISTRY.register(Histogram(
+    "scraper_items_found", "Licitacoes na listagem da fonte por ciclo", ("source",), _COUNTS
+))
+NEW_ITEMS = REGISTRY.register(Histogram(
+    "scraper_new_items", "Licitacoes novas por ciclo", ("source",), _COUNTS
+))
+FAILURES = REGISTRY.register(Counter(
+    "scraper_failures_total", "Ciclos da fonte que terminaram em excecao", ("source",)
+))
+LAST_SUCCESS = REGISTRY.register(Gauge(
+    "scraper_last_success_timestamp_seconds", "Fim do ultimo ciclo sem erro da fonte", ("source",)
+))
+BROWSER_LAUNCHES = REGISTRY.register(Counter(
+    "browser_launches_total", "Chromium iniciados", ("source",)
+))
+BROWSER_LAUNCH_SECONDS = REGISTRY.register(Histogram(
+    "browser_launch_duration_seconds", "Tempo para iniciar o Chromium", ("source",)
+))
+DB_SECONDS = REGISTRY.register(Histogram(
+    "db_roundtrip_seconds", "Latencia das operacoes de banco (inclui db.connect)", ("op",)
+))
+SEND_SECONDS = REGISTRY.register(Histogram(
+    "telegram_send_duration_seconds", "Tempo de send_text (so enfileirar, no modo assincrono)"
+))
+OUTBOX_MESSAGES = REGISTRY.register(Counter(
+    "outbox_messages_total", "Mensagens da outbox por resultado", ("status",)
+))
+
+
+def observe_span(record: dict) -> None:
+    """Listener do tracing: traduz um span fechado em metricas."""
+    name = record["name"]
+    seconds = record["duration_ms"] / 1000
+    source = record.get("source", "")
+    if name == "source":
+        CYCLE_SECONDS.observe(seconds, source=source)
+        if "error" in record:
+            FAILURES.inc(source=source)
+        else:
+            ITEMS_FOUND.observe(record.get("items", 0), source=source)
+            NEW_ITEMS.observe(record.get("new_items", 0), source=source)
+            LAST_SUCCESS.set(time.time(), source=source)
+    elif name == "browser.launch":
+        BROWSER_LAUNCHES.inc(source=source)
+        BROWSER_LAUNCH_SECONDS.observe(seconds, source=source)
+    elif name.startswith("db."):
+        DB_SECONDS.observe(seconds, op=name[3:])
+    elif name == "notify.send":
+        SEND_SECONDS.observe(seconds)
+    elif name == "outbox.drain":
+        for status in ("sent", "failed", "dead"):
+            if record.get(status):
+                OUTBOX_MESSAGES.inc(record[status], status=status)
+
+
+def gauge(name: str, help_text: str, fn: Callable[[], float], kind: str = "gauge") -> None:
+    """Registra um valor lido na coleta (ex.: profundidade de fila)."""
+    REGISTRY.register(CallbackMetric(name, help_text, fn, kind))
+
+
+def _handler_class():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            data = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int, addr: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Sobe o endpoint em thread propria e liga o listener dos spans."""
+    tracing.add_listener(observe_span)
+    server = ThreadingHTTPServer((addr, port), _handler_class())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Metricas em http://%s:%d/metrics", addr, server.server_address[1])
+    return server
@@ -4,11 +4,49 @@ import time
 
 import requests
 
-from config import TELEGRAM_CHAT_ID, TELEGRAM_TOKEN
+from config import TELEGRAM_API_URL, TELEGRAM_CHAT_ID, TELEGRAM_TOKEN
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
 _MAX_RETRIES = 5
+MAX_MESSAGE_LEN = 4096  # limite de caracteres de uma mensagem do Telegram
+
+_session = requests.Session()  # reaproveita a conexao TLS entre mensagens
+_background = None  # BackgroundNotifier ativo (ver start_background)
+_rate_limited = 0  # 429 recebidos no envio sincrono
+
+
+def start_background() -> None:
+    """Passa a enviar pelo notificador assincrono em thread propria.
+
+    A partir daqui send/send_update/send_vanished apenas enfileiram a mensagem
+    e retornam True; os limites do Telegram sao respeitados pelo token bucket.
+    """
+    global _background
+    from async_notifier import BackgroundNotifier
+
+    _background = BackgroundNotifier()
+    _background.start()
+
+
+def stop_background(timeout: float | None = 60) -> None:
+    """Aguarda o envio das mensagens enfileiradas e volta ao envio sincrono."""
+    global _background
+    if _background is not None:
+        _background.stop(timeout)
+        _background = None
+
+
+def queue_depth() -> int:
+    """Mensagens enfileiradas no envio assincrono ainda nao entregues."""
+    return _background.queue_depth if _background is not None else 0
+
+
+def rate_limited() -> int:
+    """Total de 429 recebidos (envio sincrono + notificador assincrono ativo)."""
+    background = _background.notifier.rate_limited if _background is not None else 0
+    return _rate_limited + background
 
 
 def _escape_md(text: str) -> str:
@@ -16,7 +54,24 @@ def _escape_md(text: str) -> str:
     return re.sub(r'([_*\[\]()~`>#+\-=|{}.!\\])', r'\\\1', str(text))
 
 
-def send(item: dict, source: str) -> bool:
+def _clip_md(text: str, limit: int) -> str:
+    """Escapa e corta em ate `limit` caracteres ja escapados, sem partir um escape."""
+    escaped = _escape_md(text)
+    if len(escaped) <= limit:
+        return escaped
+    out = []
+    size = 0
+    for char in str(text):
+        piece = _escape_md(char)
+        if size + len(piece) > limit - 6:  # 6 = "\.\.\." escapado
+            break
+        out.append(piece)
+        size += len(piece)
+    return "".join(out).rstrip() + "\\.\\.\\."
+
+
+def format_message(item: dict, source: str) -> str:
+    """Monta o texto MarkdownV2 do alerta de uma licitacao nova."""
     obj = item.get("obj")
     obj_line = ""
     if obj:
@@ -38,7 +93,7 @@ def send(item: dict, source: str) -> bool:
             linhas.append(f"  _\\.\\.\\. e mais {restante} itens_")
         itens_preview = "\n\n*Itens:*\n" + "\n".join(linhas)
 
-    text = (
+    return (
         f"*{_escape_md(item['title'])}*\n"
         f"Fonte: {_escape_md(source)}\n"
         f"Orgao: {_escape_md(item.get('org', '-'))}"
@@ -48,20 +103,190 @@ def send(item: dict, source: str) -> bool:
         + itens_preview
     )
 
-    api_url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+
+_FIELD_LABELS = {
+    "published": "Publicado",
+    "obj": "Objeto",
+    "url": "Link",
+    "total_itens": "Total de itens",
+    "itens": "Itens",
+}
+
+
+def format_update_message(item: dict, source: str, changes: dict) -> str:
+    """Monta o texto do alerta de licitacao alterada, com os campos antes/depois."""
+    linhas = []
+    for field, (old, new) in changes.items():
+        label = _FIELD_LABELS.get(field, field)
+        if field == "itens":
+            linhas.append(f"{label}: lista alterada")
+            continue
+        old_text = "-" if old in (None, "") else str(old)[:120]
+        new_text = "-" if new in (None, "") else str(new)[:120]
+        linhas.append(f"{_escape_md(label)}: ~{_escape_md(old_text)}~ \u2192 {_escape_md(new_text)}")
+    if not linhas:
+        linhas.append("Conteudo alterado")
+
+    return (
+        f"*Atualizada: {_escape_md(item['title'])}*\n"
+        f"Fonte: {_escape_md(source)}\n"
+        f"Orgao: {_escape_md(item.get('org', '-'))}\n"
+        + "\n".join(linhas)
+        + f"\nLink: {_escape_md(item.get('url', '-'))}"
+    )
+
+
+def format_edited_message(item: dict, source: str, changes: dict) -> str:
+    """Texto que substitui o alerta original (EDIT_IN_PLACE): a mensagem completa
+    com os dados atuais e uma linha dizendo o que mudou."""
+    fields = ", ".join(_FIELD_LABELS.get(field, field) for field in changes) or "conteudo"
+    return format_message(item, source) + f"\n\n_Atualizada: {_escape_md(fields)}_"
+
+
+def details_markup(notice_id: str) -> dict:
+    """Teclado inline com o botao de detalhes sob demanda (tratado pelo bot.py)."""
+    return {"inline_keyboard": [[{"text": "Ver itens/detalhes", "callback_data": f"det:{notice_id}"}]]}
+
+
+def format_details_message(notice: dict, details: dict, source: str) -> str:
+    """Resposta ao botao de detalhes: objeto completo e todos os itens que couberem."""
+    head = f"*Detalhes: {_escape_md(notice['title'])}*\nFonte: {_escape_md(source)}"
+    parts = [head]
+    obj = details.get("obj")
+    if obj:
+        obj_text = obj[:1500].strip() + ("..." if len(obj) > 1500 else "")
+        parts.append(f"Objeto: {_escape_md(obj_text)}")
+    itens = details.get("itens") or []
+    if itens:
+        total_itens = details.get("total_itens") or len(itens)
+        linhas = [f"*Itens \\({total_itens}\\):*"]
+        size = sum(len(p) + 2 for p in parts) + len(linhas[0])
+        for shown, i in enumerate(itens):
+            linha = (
+                f"  \u2022 {_escape_md(i['descricao'][:200])} "
+                f"\\({_escape_md(i.get('quantidade', ''))} {_escape_md(i.get('unidade', ''))}\\)"
+            )
+            # Reserva espaco para a linha "... e mais N itens"
+            if size + len(linha) + 1 > MAX_MESSAGE_LEN - 60:
+                linhas.append(f"  _\\.\\.\\. e mais {total_itens - shown} itens_")
+                break
+            linhas.append(linha)
+            size += len(linha) + 1
+        parts.append("\n".join(linhas))
+    if len(parts) == 1:
+        parts.append("Nenhum detalhe adicional disponivel no portal\\.")
+    return "\n\n".join(parts)
+
+
+def format_vanished_message(notice: dict, source: str) -> str:
+    """Monta o aviso de licitacao que saiu da listagem do portal."""
+    first_seen = str(notice.get("first_seen") or "-")[:16]
+    last_seen = str(notice.get("last_seen") or "-")[:16]
+    return (
+        f"*Saiu do portal: {_escape_md(notice['title'])}*\n"
+        f"Fonte: {_escape_md(source)}\n"
+        f"Orgao: {_escape_md(notice.get('org') or '-')}\n"
+        f"Listada de {_escape_md(first_seen)} a {_escape_md(last_seen)} "
+        f"\\({notice.get('seen_count', 1)} ciclos\\)"
+        f"\nLink: {_escape_md(notice.get('url') or '-')}"
+    )
+
+
+def format_digest_entry(item: dict) -> str:
+    """Bloco compacto de uma licitacao dentro de um resumo (ja escapado).
+
+    Todos os campos sao cortados depois do escape, entao o bloco tem no maximo
+    ~1300 caracteres, cabe folgado numa mensagem e nunca precisa ser partido.
+    """
+    details = " \u00b7 ".join(
+        _clip_md(v, 150) for v in (item.get("org"), item.get("published")) if v
+    )
+    lines = [f"\u2022 *{_clip_md(item['title'], 300)}*"]
+    if details:
+        lines.append(f"  {details}")
+    obj = item.get("obj")
+    if obj:
+        lines.append(f"  {_clip_md(obj.strip(), 200)}")
+    total_itens = item.get("total_itens", len(item.get("itens", [])))
+    if total_itens:
+        lines.append(f"  {total_itens} itens")
+    lines.append(f"  {_clip_md(item.get('url') or '-', 500)}")
+    return "\n".join(lines)
+
+
+def format_digest(title: str, entries: list[str], limit: int = MAX_MESSAGE_LEN) -> list[str]:
+    """Empacota blocos ja escapados em mensagens de ate `limit` caracteres.
+
+    Os blocos nunca sao cortados ao meio, entao nenhum escape ou marcacao do
+    MarkdownV2 fica dividido entre duas mensagens.
+    """
+    head = f"*{_escape_md(title)}* \\({len(entries)}\\)"
+    # Espaco reservado para o sufixo " (parte i/n)" no cabecalho
+    budget = limit - len(head) - len(" \\(parte 999/999\\)") - 2
+
+    chunks: list[list[str]] = [[]]
+    size = 0
+    for entry in entries:
+        extra = len(entry) + 2  # separador "\n\n"
+        if chunks[-1] and size + extra > budget:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(entry)
+        size += extra
+
+    if len(chunks) == 1:
+        return [head + "\n\n" + "\n\n".join(chunks[0])]
+    return [
+        f"{head} \\(parte {i}/{len(chunks)}\\)\n\n" + "\n\n".join(chunk)
+        for i, chunk in enumerate(chunks, 1)
+    ]
+
+
+def send(item: dict, source: str) -> bool:
+    return send_text(format_message(item, source))
+
+
+def send_update(item: dict, source: str, changes: dict) -> bool:
+    """Avisa que uma licitacao ja enviada mudou no portal."""
+    return send_text(format_update_message(item, source, changes))
+
+
+def send_vanished(notice: dict, source: str) -> bool:
+    """Avisa que uma licitacao deixou de aparecer na listagem da fonte."""
+    return send_text(format_vanished_message(notice, source))
+
+
+def send_text(text: str, chat_id: str | None = None, reply_markup: dict | None = None) -> bool:
+    """Envia um texto MarkdownV2 ja formatado (padrao: TELEGRAM_CHAT_ID)."""
+    with span("notify.send", bytes=len(text.encode("utf-8")), queued=_background is not None) as s:
+        ok = _send_text(text, chat_id or TELEGRAM_CHAT_ID, reply_markup)
+        s.set(ok=ok)
+    return ok
+
+
+def _send_text(text: str, chat_id: str, reply_markup: dict | None) -> bool:
+    global _rate_limited
+    extra = {"reply_markup": reply_markup} if reply_markup else {}
+    if _background is not None:
+        _background.submit(chat_id, text, **extra)
+        return True
+
+    api_url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_TOKEN}/sendMessage"
     payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
+        "chat_id": chat_id,
         "text": text,
         "parse_mode": "MarkdownV2",
         "disable_web_page_preview": False,
+        **extra,
     }
 
     for attempt in range(_MAX_RETRIES):
         try:
-            resp = requests.post(api_url, json=payload, timeout=15)
+            resp = _session.post(api_url, json=payload, timeout=15)
             if resp.ok:
                 return True
             if resp.status_code == 429:
+                _rate_limited += 1
                 retry_after = resp.json().get("parameters", {}).get("retry_after", 19)
                 logger.warning("Rate limit Telegram. Aguardando %ds...", retry_after)
                 time.sleep(retry_after)
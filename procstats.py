@@ -0,0 +1,108 @@
+"""
+Consumo de memoria do processo e dos navegadores que ele abriu.
+
+O Playwright sobe o Chromium como arvore de processos filhos (browser,
+renderers, GPU, utilitarios); somar so o processo Python esconde quase todo o
+consumo real de um ciclo.
+"""
+import psutil
+
+# Nomes dos executaveis do Chromium do Playwright (Linux, Windows e macOS)
+_BROWSER_NAMES = ("chrome", "chromium", "headless_shell")
+# Linha de comando do node que controla os navegadores (driver local ou run-server)
+_DRIVER_MARKERS = ("run-driver", "run-server")
+
+
+def _is_browser(proc: psutil.Process) -> bool:
+    try:
+        name = proc.name().lower()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+    return any(b in name for b in _BROWSER_NAMES)
+
+
+def browser_processes(root: psutil.Process | None = None) -> list[psutil.Process]:
+    """Processos do Chromium descendentes deste processo (inclui o node do Playwright)."""
+    root = root or psutil.Process()
+    try:
+        children = root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return []
+    return [proc for proc in children if _is_browser(proc)]
+
+
+def _rss(procs) -> int:
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total
+
+
+def _is_driver(pid: int) -> bool:
+    """True se `pid` e um driver do Playwright vivo (morto, zumbi ou outro processo: False)."""
+    try:
+        cmdline = " ".join(psutil.Process(pid).cmdline())
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+    return any(marker in cmdline for marker in _DRIVER_MARKERS)
+
+
+def orphan_browsers() -> list[psutil.Process]:
+    """Chromium do Playwright abandonado por um driver que morreu.
+
+    O Playwright controla o navegador pelo --remote-debugging-pipe, que so o
+    processo pai (o driver node) enxerga: se o pai nao e mais um driver vivo,
+    ninguem mais fecha esse navegador. Cobre o Windows (sem reparent, o ppid
+    continua o do driver morto ou ja foi reusado), o init/subreaper do systemd
+    no Linux e este processo como PID 1 do container.
+
+    So o processo principal (sem --type=) do mesmo usuario, com "playwright" na
+    linha de comando; renderers e GPU saem junto em kill_tree. Chromium aberto
+    com --remote-debugging-port (pool remoto, testes) nunca e orfao.
+    """
+    user = psutil.Process().username()
+    orphans = []
+    for proc in psutil.process_iter(["name", "ppid", "username", "cmdline"]):
+        info = proc.info
+        if info["username"] != user:
+            continue
+        if not any(b in (info["name"] or "").lower() for b in _BROWSER_NAMES):
+            continue
+        cmdline = " ".join(info["cmdline"] or [])
+        if "--type=" in cmdline or "--remote-debugging-pipe" not in cmdline:
+            continue
+        if "playwright" in cmdline.lower() and not _is_driver(info["ppid"]):
+            orphans.append(proc)
+    return orphans
+
+
+def kill_tree(procs: list[psutil.Process], timeout: float = 5) -> int:
+    """Mata os processos e seus descendentes e espera (reap) cada um. Retorna quantos morreram."""
+    victims = []
+    for proc in procs:
+        try:
+            victims.extend(proc.children(recursive=True))
+        except psutil.NoSuchProcess:
+            pass
+        victims.append(proc)
+    for proc in victims:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+    # wait_procs chama waitpid nos nossos filhos: nao sobra zumbi
+    gone, alive = psutil.wait_procs(victims, timeout=timeout)
+    return len(gone)
+
+
+def process_rss() -> int:
+    """RSS do proprio processo Python, em bytes."""
+    return psutil.Process().memory_info().rss
+
+
+def browser_rss() -> int:
+    """Soma do RSS de toda a arvore do Chromium aberta por este processo, em bytes."""
+    return _rss(browser_processes())
@@ -0,0 +1,218 @@
+"""
+Perfil sob demanda do daemon (main.py), sem reiniciar.
+
+Dispara de duas formas; o perfil cobre os proximos PROFILE_CYCLES ciclos:
+
+    kill -USR1 <pid>                 # POSIX
+    echo 3 > profiles/PROFILE        # qualquer SO: arquivo de flag (3 ciclos)
+
+Por fonte e ciclo, grava em PROFILE_DIR:
+
+    <hora>-<fonte>.folded            PROFILE_MODE=sample: pilhas amostradas da
+                                     thread principal no formato "collapsed"
+                                     (flamegraph.pl, speedscope, inferno)
+    <hora>-<fonte>.pstats            PROFILE_MODE=cprofile: cProfile
+                                     deterministico (snakeviz, flameprof, gprof2dot)
+    <hora>-<fonte>-<etapa>.txt       PROFILE_TRACEMALLOC=true: maiores alocacoes
+    <hora>-<fonte>-<etapa>.tracemalloc  de scraper.run() ("scrape") e do parse
+
+Desligado, cycle()/source()/stage() devolvem um contexto vazio compartilhado:
+o custo e uma chamada de funcao e um teste de variavel.
+"""
+import cProfile
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+
+from config import (
+    PROFILE_CYCLES,
+    PROFILE_DIR,
+    PROFILE_FLAG,
+    PROFILE_INTERVAL,
+    PROFILE_MODE,
+    PROFILE_TRACEMALLOC,
+)
+
+logger = logging.getLogger(__name__)
+
+_NULL = nullcontext()
+_requested = 0  # ciclos pedidos por sinal/flag e ainda nao iniciados
+_active = False  # ciclo atual esta sendo perfilado
+_source: str | None = None
+_stamp = ""
+
+
+def request(cycles: int = PROFILE_CYCLES) -> None:
+    """Perfila os proximos `cycles` ciclos (chamado pelo sinal ou pelo arquivo de flag)."""
+    global _requested
+    _requested = max(_requested, cycles)
+
+
+def _on_signal(signum, frame) -> None:
+    request()
+
+
+def install() -> None:
+    """Liga o SIGUSR1 (quando existe; no Windows so o arquivo de flag)."""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _on_signal)
+        logger.info("Perfil sob demanda: kill -USR1 %d ou arquivo %s", os.getpid(), PROFILE_FLAG)
+
+
+def _check_flag() -> None:
+    """Arquivo de flag: conteudo opcional = numero de ciclos. Removido ao ler."""
+    if not PROFILE_FLAG or not os.path.exists(PROFILE_FLAG):
+        return
+    try:
+        with open(PROFILE_FLAG, encoding="utf-8") as f:
+            content = f.read().strip()
+        os.remove(PROFILE_FLAG)
+    except OSError as e:
+        logger.warning("Falha ao ler %s: %s", PROFILE_FLAG, e)
+        return
+    request(int(content) if content.isdigit() else PROFILE_CYCLES)
+
+
+class _Cycle:
+    def __enter__(self):
+        global _requested, _active
+        _requested -= 1
+        _active = True
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        # Se o memwatch ja liga o tracemalloc, reaproveita e nao desliga no fim
+        self.started = PROFILE_TRACEMALLOC and not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(25)
+        logger.info("[PERFIL] Ciclo perfilado (%s); restam %d", PROFILE_MODE, _requested)
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = False
+        if self.started:
+            tracemalloc.stop()
+        return False
+
+
+def cycle():
+    """Envolve um ciclo do main.py; perfila se houver pedido pendente."""
+    _check_flag()
+    if _requested <= 0:
+        return _NULL
+    return _Cycle()
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread a cada `interval` s e conta pilhas iguais."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _path(suffix: str) -> str:
+    name = "".join(c if c.isalnum() else "_" for c in _source or "-")
+    return os.path.join(PROFILE_DIR, f"{_stamp}-{name}{suffix}")
+
+
+class _Source:
+    def __init__(self, name: str):
+        self.name = name
+        self.profiler = None
+
+    def __enter__(self):
+        global _source, _stamp
+        _source = self.name
+        _stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        if PROFILE_MODE == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = StackSampler(threading.get_ident())
+            self.profiler.start()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _source
+        if PROFILE_MODE == "cprofile":
+            self.profiler.disable()
+            path = _path(".pstats")
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.stop()
+            path = _path(".folded")
+            self.profiler.dump(path)
+        logger.info("[PERFIL] [%s] %.1fs -> %s", self.name, time.perf_counter() - self._t0, path)
+        _source = None
+        return False
+
+
+def source(name: str):
+    """Envolve o processamento de uma fonte; grava o perfil dela ao sair."""
+    if not _active:
+        return _NULL
+    return _Source(name)
+
+
+class _Stage:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.before = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc):
+        after = tracemalloc.take_snapshot()
+        path = _path(f"-{self.name}")
+        after.dump(path + ".tracemalloc")
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"# {_source} / {self.name}: atual {current / 1e6:.1f} MB, pico {peak / 1e6:.1f} MB\n")
+            for stat in after.compare_to(self.before, "lineno")[:30]:
+                f.write(f"{stat}\n")
+        return False
+
+
+def stage(name: str):
+    """tracemalloc antes/depois de uma etapa (scrape, parse) com PROFILE_TRACEMALLOC."""
+    if not _active or not PROFILE_TRACEMALLOC or _source is None:
+        return _NULL
+    return _Stage(name)
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket com reserva: cada chamada consome um token e recebe quanto
+    tempo precisa esperar para que o envio respeite a taxa.
+
+    Como a reserva e feita sem await, chamadas concorrentes no mesmo event loop
+    ficam enfileiradas na ordem em que reservaram.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate  # tokens por segundo
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Consome um token e retorna os segundos de espera (0 se havia token)."""
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Bloqueia o bucket por `seconds` (ex.: retry_after de um 429)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
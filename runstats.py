@@ -0,0 +1,148 @@
+"""
+Historico de execucoes por fonte (tabela scrape_runs, SCRAPE_RUNS=true).
+
+Cada execucao de scraper vira uma linha com inicio/fim, paginas visitadas,
+rolagens, linhas parseadas, linhas novas, bytes baixados e o custo do Chromium
+que ela abriu: CPU (user + system) e pico de RSS somados sobre a arvore de
+processos do navegador, amostrada em thread propria. As linhas do ciclo sao
+gravadas num unico lote no fim (ver main.py).
+
+    with runstats.record("FIEMS", runs):
+        items = scraper.run()            # BaseScraper alimenta pages/bytes/scrolls
+        runstats.count(rows_parsed=len(items))
+
+Consultas uteis (custo x rendimento por portal):
+
+    SELECT source, avg(browser_cpu_seconds), max(browser_peak_rss) / 1e6 AS mb,
+           sum(new_rows)::float / nullif(sum(rows_parsed), 0) AS rendimento
+    FROM scrape_runs GROUP BY source;
+"""
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from config import SCRAPE_RUNS, SCRAPE_RUNS_SAMPLE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar["ScrapeRun | None"] = contextvars.ContextVar("scrape_run", default=None)
+
+
+class BrowserSampler:
+    """Amostra a arvore do Chromium: CPU acumulada por processo e pico de RSS.
+
+    O CPU de cada processo e o ultimo valor lido antes dele terminar, entao o
+    que o processo gasta depois da ultima amostra (ate `interval`) se perde.
+    Navegadores abertos por outras threads no mesmo intervalo (bot.py) entram
+    na conta.
+    """
+
+    def __init__(self, interval: float = SCRAPE_RUNS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_rss = 0
+        self._cpu: dict[tuple, float] = {}  # (pid, create_time) -> segundos de CPU
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="browser-sampler", daemon=True)
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(self._cpu.values())
+
+    def sample(self) -> None:
+        import psutil
+        import procstats
+
+        rss = 0
+        for proc in procstats.browser_processes():
+            try:
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    self._cpu[(proc.pid, proc.create_time())] = times.user + times.system
+                    rss += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.debug("Amostra do navegador falhou: %s", e)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class ScrapeRun:
+    """Contadores de uma execucao; vira uma linha de scrape_runs em to_row()."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.pages = 0
+        self.scrolls = 0
+        self.rows_parsed = 0
+        self.new_rows = 0
+        self.bytes = 0
+        self.error = None
+        self.sampler = BrowserSampler()
+
+    def add(self, **counts) -> None:
+        for field, value in counts.items():
+            setattr(self, field, getattr(self, field) + value)
+
+    def to_row(self) -> dict:
+        return {
+            "source": self.source,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pages": self.pages,
+            "scrolls": self.scrolls,
+            "rows_parsed": self.rows_parsed,
+            "new_rows": self.new_rows,
+            "bytes": self.bytes,
+            "browser_cpu_seconds": round(self.sampler.cpu_seconds, 3),
+            "browser_peak_rss": self.sampler.peak_rss,
+            "error": self.error,
+        }
+
+
+def current() -> ScrapeRun | None:
+    """Execucao em andamento nesta thread (None com SCRAPE_RUNS desligado)."""
+    return _current.get()
+
+
+def count(**counts) -> None:
+    """Soma contadores (pages, scrolls, rows_parsed, new_rows, bytes) na execucao atual."""
+    run = _current.get()
+    if run is not None:
+        run.add(**counts)
+
+
+@contextmanager
+def record(source: str, runs: list[dict], enabled: bool = SCRAPE_RUNS):
+    """Mede uma execucao da fonte e acrescenta a linha em `runs`, mesmo se falhar."""
+    if not enabled:
+        yield None
+        return
+    run = ScrapeRun(source)
+    token = _current.set(run)
+    run.sampler.start()
+    try:
+        yield run
+    except Exception as e:
+        run.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        run.sampler.stop()
+        _current.reset(token)
+        run.finished_at = datetime.now(timezone.utc)
+        runs.append(run.to_row())
@@ -0,0 +1,154 @@
+"""
+Relevancia das licitacoes para cada perfil de assinatura (TF-IDF esparso).
+
+Todas as licitacoes novas do ciclo viram uma matriz esparsa (titulo, objeto e
+descricao dos itens) e os perfis outra, no mesmo vocabulario; um unico produto
+de matrizes da a similaridade de cosseno de cada licitacao com cada perfil.
+Tudo local, sem modelos para baixar.
+
+O IDF vem de um corpus fixo (as SCORE_CORPUS_SIZE licitacoes mais recentes do
+banco, relidas a cada SCORE_CORPUS_REFRESH s), nao do lote: a mesma licitacao
+tem a mesma nota como nova, alterada ou encerrada, sozinha ou numa rajada.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from config import SCORE_CORPUS_REFRESH, SCORE_CORPUS_SIZE
+from matcher import normalize, parse_term
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]{3,}")
+# Radical aproximado: "limpeza"/"limpezas" e "servico"/"servicos" viram o mesmo termo
+_STEM_LEN = 7
+_TITLE_WEIGHT = 2.0
+
+_STOPWORDS = frozenset(
+    "para com por das dos nas nos uma umas uns que sem sob sobre entre ate "
+    "aos pela pelo pelas pelos este esta estes estas esse essa isso como mais "
+    "conforme demais outros outras tipo ser sao fins visando referente".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t[:_STEM_LEN] for t in _TOKEN.findall(normalize(text)) if t not in _STOPWORDS]
+
+
+def _notice_fields(item: dict) -> list[tuple[str, float]]:
+    itens_text = " ".join(i.get("descricao", "") for i in item.get("itens") or [])
+    return [
+        (item.get("title") or "", _TITLE_WEIGHT),
+        (item.get("obj") or "", 1.0),
+        (itens_text, 1.0),
+    ]
+
+
+def _profile_text(keywords: list[str]) -> str:
+    """Somente os termos positivos; aspas e negativos ficam para o matcher."""
+    terms = []
+    for raw in keywords or []:
+        pattern, negative, _ = parse_term(raw)
+        if pattern and not negative:
+            terms.append(pattern)
+    return " ".join(terms)
+
+
+def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+class DocumentFrequency:
+    """Em quantas licitacoes do corpus cada termo aparece."""
+
+    def __init__(self, items: list[dict] = ()):
+        self.n_docs = 0
+        self.df: Counter = Counter()
+        for item in items:
+            self.add(item)
+
+    def add(self, item: dict) -> None:
+        self.n_docs += 1
+        self.df.update({token for text, _ in _notice_fields(item) for token in tokenize(text)})
+
+    def idf(self, token: str) -> float:
+        """IDF suavizado; com corpus vazio vale 1 para todos os termos."""
+        return math.log((1 + self.n_docs) / (1 + self.df.get(token, 0))) + 1.0
+
+
+_corpus: DocumentFrequency | None = None
+_corpus_at = 0.0
+_corpus_lock = threading.Lock()
+
+
+def shared_corpus() -> DocumentFrequency:
+    """Corpus do IDF lido do banco, reaproveitado por SCORE_CORPUS_REFRESH s."""
+    global _corpus, _corpus_at
+    with _corpus_lock:
+        now = time.monotonic()
+        if _corpus is None or now - _corpus_at > SCORE_CORPUS_REFRESH:
+            from storage import get_storage
+
+            try:
+                notices = get_storage().recent_notices(SCORE_CORPUS_SIZE)
+            except NotImplementedError as e:
+                logger.warning("[RELEVANCIA] %s; IDF uniforme", e)
+                notices = []
+            _corpus = DocumentFrequency(notices)
+            _corpus_at = now
+            logger.info("[RELEVANCIA] Corpus do IDF: %d licitacoes", _corpus.n_docs)
+        return _corpus
+
+
+class RelevanceScorer:
+    """Pontua um lote de licitacoes contra perfis de palavras-chave.
+
+    score() devolve uma matriz (licitacoes x perfis) de similaridade entre 0 e 1.
+    Termos frequentes no corpus pesam menos que os raros; a nota de uma
+    licitacao nao depende das outras do lote.
+    """
+
+    def __init__(self, profiles: list[list[str]], corpus: DocumentFrequency | None = None):
+        self._profile_tokens = [tokenize(_profile_text(kw)) for kw in profiles]
+        self.corpus = corpus if corpus is not None else DocumentFrequency()
+
+    def score(self, items: list[dict]) -> np.ndarray:
+        n_profiles = len(self._profile_tokens)
+        if not items or not n_profiles:
+            return np.zeros((len(items), n_profiles))
+
+        vocab: dict[str, int] = {}
+        rows, cols, weights = [], [], []
+        for row, item in enumerate(items):
+            for text, weight in _notice_fields(item):
+                for token in tokenize(text):
+                    rows.append(row)
+                    cols.append(vocab.setdefault(token, len(vocab)))
+                    weights.append(weight)
+        p_rows, p_cols = [], []
+        for row, tokens in enumerate(self._profile_tokens):
+            for token in set(tokens):
+                p_rows.append(row)
+                p_cols.append(vocab.setdefault(token, len(vocab)))
+
+        shape = (len(items), len(vocab))
+        # Entradas repetidas sao somadas: contagem ponderada por campo
+        tf = sparse.csr_matrix((weights, (rows, cols)), shape=shape, dtype=np.float64)
+        tf.data = 1.0 + np.log(tf.data)  # tf sublinear
+        idf = np.array([self.corpus.idf(token) for token in vocab])
+
+        docs = _l2_normalize(tf @ sparse.diags(idf))
+        profiles = sparse.csr_matrix(
+            (np.ones(len(p_rows)), (p_rows, p_cols)), shape=(n_profiles, len(vocab))
+        )
+        profiles = _l2_normalize(profiles @ sparse.diags(idf))
+        return (docs @ profiles.T).toarray()
+
@@ -2,7 +2,17 @@ import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
 
+import requests
 from playwright.sync_api import sync_playwright
+from playwright_stealth import Stealth
+
+import browsers
+import cassette
+import hostlimit
+import profiling
+import runstats
+from config import BROWSER_PERSISTENT
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +21,14 @@ class BaseScraper(ABC):
     name: str
     url: str
     ordered: bool = False  # True se os itens vem ordenados do mais recente para o mais antigo
+    lazy_details: bool = False  # True se implementa fetch_details (ver LAZY_DETAILS)
+    probe_url: str | None = None  # checagem HTTP do circuit breaker (padrao: url)
+    stealth: bool = False  # True se o portal bloqueia headless (playwright_stealth)
+    persistent_profile: bool = False  # True para cache em disco entre execucoes (BROWSER_PERSISTENT)
+    launch_profile: str = "default"  # flags do Chromium (browsers.LAUNCH_PROFILES)
+    # False se a ultima listagem ficou parcial (paginacao falhou ou limite de
+    # paginas): main.py nao encerra as licitacoes que nao apareceram
+    complete: bool = True
 
     @abstractmethod
     def parse(self, html: str) -> list[dict]:
@@ -21,9 +39,37 @@ class BaseScraper(ABC):
         """Fetch padrao: carrega a pagina e aguarda um seletor."""
         return self._fetch_playwright(self.url)
 
+    def fetch_details(self, item: dict) -> dict:
+        """Busca sob demanda o enriquecimento de uma licitacao ({obj, itens, total_itens}).
+
+        Com LAZY_DETAILS o run() pula essa etapa e o bot.py chama este metodo
+        apenas para as licitacoes em que alguem clicou em "Ver detalhes".
+        """
+        raise NotImplementedError(f"{self.name} nao busca detalhes sob demanda")
+
+    def probe(self, timeout: float = 10) -> bool:
+        """Checagem barata, sem navegador, antes de religar a fonte (ver breaker.py).
+
+        403 conta como no ar: portais atras de Cloudflare recusam clientes sem
+        JavaScript mesmo funcionando. Fora do ar = erro de rede, 5xx ou 429.
+        """
+        resp = self._http().get(
+            self.probe_url or self.url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"}
+        )
+        return resp.status_code < 500 and resp.status_code != 429
+
+    def _partial(self, reason: str) -> None:
+        """Marca a listagem desta execucao como parcial (ver complete)."""
+        self.complete = False
+        logger.warning("[%s] Listagem parcial: %s", self.name, reason)
+
     def run(self) -> list[dict]:
-        html = self.fetch()
-        items = self.parse(html)
+        with span("fetch") as s:
+            html = self.fetch()
+            s.set(bytes=len(html or ""))
+        with span("parse") as s, profiling.stage("parse"):
+            items = self.parse(html)
+            s.set(items=len(items))
         logger.info("[%s] %d itens encontrados", self.name, len(items))
         return items
 
@@ -31,17 +77,88 @@ class BaseScraper(ABC):
     # Helpers de fetch reutilizaveis pelas subclasses
     # ------------------------------------------------------------------
 
+    def _http(self):
+        """requests (ou a sessao da fita com CASSETTE_MODE) para as chamadas HTTP da fonte."""
+        tape = cassette.get(self.name)
+        return tape.session() if tape is not None else requests
+
+    def _playwright(self):
+        """sync_playwright(), com o playwright_stealth se a fonte pede."""
+        if self.stealth:
+            return Stealth().use_sync(sync_playwright())
+        return sync_playwright()
+
+    def _launch_browser(self, p):
+        """Abre o Chromium headless (ou conecta a um remoto, ver browsers.py);
+        todo scraper passa por aqui."""
+        args = browsers.launch_profile(self.launch_profile)["args"]
+        # Com fita, o cache em disco esconderia requisicoes da gravacao
+        if (
+            self.persistent_profile
+            and BROWSER_PERSISTENT
+            and not browsers.POOL.endpoints
+            and cassette.get(self.name) is None
+        ):
+            browser = browsers.persistent(p, self.name, self.stealth, args=args)
+            if browser is not None:
+                return browser
+        with span("browser.launch", remote=bool(browsers.POOL.endpoints), profile=self.launch_profile):
+            return browsers.launch(p, args=args)
+
+    def _new_page(self, browser, **context_options):
+        """Abre contexto + pagina. Com uma execucao em andamento (runstats), conta
+        as navegacoes do frame principal e os bytes recebidos pela rede (CDP)."""
+        context_options = {**browsers.launch_profile(self.launch_profile)["context"], **context_options}
+        with span("browser.context"):
+            context = browser.new_context(**context_options)
+            tape = cassette.get(self.name)
+            if tape is not None:
+                tape.attach(context)
+            page = context.new_page()
+        run = runstats.current()
+        if run is not None:
+            page.on("framenavigated", lambda frame: frame.parent_frame is None and run.add(pages=1))
+            try:
+                cdp = page.context.new_cdp_session(page)
+                cdp.on("Network.loadingFinished", lambda event: run.add(bytes=int(event["encodedDataLength"])))
+                cdp.send("Network.enable")
+            except Exception as e:
+                logger.debug("[%s] Sem contagem de bytes via CDP: %s", self.name, e)
+        return page
+
+    def _close_browser(self, browser) -> None:
+        """Fecha o navegador. Gravando, fecha antes os contextos: o HAR so e
+        escrito no context.close()."""
+        tape = cassette.get(self.name)
+        if tape is not None and tape.mode == cassette.RECORD:
+            for context in getattr(browser, "contexts", []):
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.warning("[%s] Falha ao fechar contexto gravado: %s", self.name, e)
+        browser.close()
+
+    def _goto(self, page, url: str, **kwargs):
+        """page.goto sob o limite de concorrencia do host (ver hostlimit.py)."""
+        # Navegacao inclui subrecursos e JS: so status e timeout contam, nao a latencia
+        with hostlimit.slot(url, timed=False) as s:
+            resp = page.goto(url, **kwargs)
+            if resp is not None:
+                s.record(resp.status, resp.headers.get("retry-after"))
+        return resp
+
     def _fetch_playwright(self, url: str, wait_selector: str = "body") -> str:
         """Carrega a pagina e espera o seletor aparecer."""
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
             try:
-                page.goto(url, timeout=60_000)
-                page.wait_for_selector(wait_selector, timeout=30_000)
+                with span("page.goto", url=url):
+                    self._goto(page, url, timeout=60_000)
+                    page.wait_for_selector(wait_selector, timeout=30_000)
                 return page.content()
             finally:
-                browser.close()
+                self._close_browser(browser)
 
     def _fetch_with_scroll(
         self,
@@ -58,11 +175,12 @@ class BaseScraper(ABC):
         assim que o ultimo elemento do stop_selector contiver date_threshold
         no seu texto (util para parar ao encontrar itens de anos anteriores).
         """
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
             try:
-                page.goto(url, timeout=60_000)
+                with span("page.goto", url=url):
+                    self._goto(page, url, timeout=60_000)
                 try:
                     page.wait_for_selector(wait_selector, timeout=30_000)
                 except Exception:
@@ -71,37 +189,42 @@ class BaseScraper(ABC):
                         self.name, wait_selector,
                     )
 
-                last_height = -1
-                for i in range(max_scrolls):
-                    # Para ao encontrar item antigo (date_threshold no ultimo elemento visivel)
-                    if stop_selector and date_threshold:
-                        try:
-                            last_text = page.evaluate(
-                                """(sel) => {
-                                    const els = document.querySelectorAll(sel);
-                                    return els.length ? els[els.length - 1].textContent : null;
-                                }""",
-                                stop_selector,
-                            )
-                            if last_text and date_threshold in last_text:
-                                logger.info(
-                                    "[%s] Threshold '%s' encontrado. Parando scroll.",
-                                    self.name, date_threshold,
+                with span("page.scroll") as s:
+                    last_height = -1
+                    scrolls = 0  # so os scrollTo feitos (o threshold pode parar antes do primeiro)
+                    for _ in range(max_scrolls):
+                        # Para ao encontrar item antigo (date_threshold no ultimo elemento visivel)
+                        if stop_selector and date_threshold:
+                            try:
+                                last_text = page.evaluate(
+                                    """(sel) => {
+                                        const els = document.querySelectorAll(sel);
+                                        return els.length ? els[els.length - 1].textContent : null;
+                                    }""",
+                                    stop_selector,
                                 )
-                                break
-                        except Exception:
-                            pass
-
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    page.wait_for_timeout(scroll_pause_ms)
-                    new_height = page.evaluate("document.body.scrollHeight")
-                    if new_height == last_height:
-                        logger.debug("[%s] Scroll finalizado apos %d rolagens", self.name, i)
-                        break
-                    last_height = new_height
-                else:
-                    logger.warning("[%s] Limite de %d rolagens atingido", self.name, max_scrolls)
+                                if last_text and date_threshold in last_text:
+                                    logger.info(
+                                        "[%s] Threshold '%s' encontrado. Parando scroll.",
+                                        self.name, date_threshold,
+                                    )
+                                    break
+                            except Exception:
+                                pass
+
+                        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                        scrolls += 1
+                        page.wait_for_timeout(scroll_pause_ms)
+                        new_height = page.evaluate("document.body.scrollHeight")
+                        if new_height == last_height:
+                            logger.debug("[%s] Scroll finalizado apos %d rolagens", self.name, scrolls)
+                            break
+                        last_height = new_height
+                    else:
+                        logger.warning("[%s] Limite de %d rolagens atingido", self.name, max_scrolls)
+                    s.set(scrolls=scrolls, height=last_height)
+                    runstats.count(scrolls=scrolls)
 
                 return page.content()
             finally:
-                browser.close()
+                self._close_browser(browser)
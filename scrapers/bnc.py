@@ -1,10 +1,11 @@
 import logging
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
 
+import hostlimit
+from config import HOST_MAX_CONCURRENCY, LAZY_DETAILS
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -15,27 +16,26 @@ BASE_URL = "https://bnccompras.com"
 class BncScraper(BaseScraper):
     name = "BNC"
     url = "https://bnccompras.com/Process/ProcessSearchPublic?param1=0"
+    launch_profile = "minimal"
     ordered = True
+    lazy_details = True
 
     def fetch(self) -> str:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
             try:
-                page.goto(self.url, timeout=60_000)
+                self._goto(page, self.url, timeout=60_000)
                 page.wait_for_selector("tbody#tableProcessDataBody tr", timeout=30_000)
                 page.wait_for_load_state("networkidle")
                 return page.content()
-            except Exception as e:
-                logger.error("[BNC] Erro no fetch: %s", e)
-                return ""
             finally:
-                browser.close()
+                self._close_browser(browser)
 
     def _fetch_obj(self, url: str) -> str | None:
         """Busca o objeto na pagina de detalhes (textarea#ProductOrService)."""
         try:
-            resp = requests.get(url, timeout=30)
+            resp = hostlimit.get(url, session=self._http(), timeout=30)
             resp.raise_for_status()
             soup = BeautifulSoup(resp.text, "lxml")
             ta = soup.find("textarea", {"id": "ProductOrService"})
@@ -44,6 +44,10 @@ class BncScraper(BaseScraper):
             logger.warning("[BNC] Falha ao buscar detalhes de %s: %s", url, e)
             return None
 
+    def fetch_details(self, item: dict) -> dict:
+        obj = self._fetch_obj(item["url"])
+        return {"obj": obj} if obj else {}
+
     def parse(self, html: str) -> list[dict]:
         soup = BeautifulSoup(html, "lxml")
         items = []
@@ -64,10 +68,14 @@ class BncScraper(BaseScraper):
             published = cols[6].get_text(strip=True)
 
             if title and url:
-                # Tenta enriquecer obj com a pagina de detalhes
-                detailed_obj = self._fetch_obj(url)
-                if detailed_obj:
-                    obj = detailed_obj
                 items.append({"title": title, "org": org, "obj": obj, "url": url, "published": published})
 
+        # Enriquece obj com a pagina de detalhes, em paralelo sob o limite do host
+        # (com LAZY_DETAILS, so quando alguem pedir pelo botao do alerta)
+        if items and not LAZY_DETAILS:
+            with ThreadPoolExecutor(max_workers=HOST_MAX_CONCURRENCY) as pool:
+                for item, detailed_obj in zip(items, pool.map(self._fetch_obj, [i["url"] for i in items])):
+                    if detailed_obj:
+                        item["obj"] = detailed_obj
+
         return items
@@ -3,7 +3,6 @@ import urllib.parse
 from datetime import datetime
 
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
 
 from .base import BaseScraper
 
@@ -15,39 +14,35 @@ BASE_URL = "https://www.casan.com.br"
 class CasanScraper(BaseScraper):
     name = "CASAN"
     url = "https://www.casan.com.br/licitacoes/editais"
+    launch_profile = "minimal"
 
     def fetch(self) -> str:
+        """Falha de navegacao levanta (breaker.py); ano sem editais retorna vazio."""
         year = str(datetime.now().year)
-        html_combinado = ""
 
-        try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
+            try:
+                logger.info("[CASAN] Navegando para %s", self.url)
+                self._goto(page, self.url, wait_until="networkidle", timeout=60_000)
+
+                logger.info("[CASAN] Selecionando ano %s...", year)
+                page.select_option("#licitacao_ano", value=year)
+                page.click("#btnBuscar")
+
                 try:
-                    logger.info("[CASAN] Navegando para %s", self.url)
-                    page.goto(self.url, wait_until="networkidle", timeout=60_000)
-
-                    logger.info("[CASAN] Selecionando ano %s...", year)
-                    page.select_option("#licitacao_ano", value=year)
-                    page.click("#btnBuscar")
-
-                    try:
-                        page.wait_for_selector(
-                            '.editais-visualiza-container:has-text("Quantidade:"), '
-                            '.editais-visualiza-container table.table-bordered',
-                            timeout=15_000,
-                        )
-                    except Exception:
-                        logger.info("[CASAN] Nenhum resultado carregado para o ano %s.", year)
-
-                    html_combinado = page.inner_html(".editais-visualiza-container")
-                finally:
-                    browser.close()
-        except Exception as e:
-            logger.error("[CASAN] Falha no fetch: %s", e)
-
-        return html_combinado
+                    page.wait_for_selector(
+                        '.editais-visualiza-container:has-text("Quantidade:"), '
+                        '.editais-visualiza-container table.table-bordered',
+                        timeout=15_000,
+                    )
+                except Exception:
+                    logger.info("[CASAN] Nenhum resultado carregado para o ano %s.", year)
+
+                return page.inner_html(".editais-visualiza-container")
+            finally:
+                self._close_browser(browser)
 
     def parse(self, html: str) -> list[dict]:
         if not html:
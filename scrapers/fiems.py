@@ -15,6 +15,7 @@ _ID_PATTERN = re.compile(r"trListaMuralProcesso_Click\((\d+),")
 class FiemsScraper(BaseScraper):
     name = "FIEMS"
     url = "https://compras.fiems.com.br/portal/Mural.aspx?nNmTela=E"
+    launch_profile = "minimal"
 
     def fetch(self) -> str:
         prev_year = str(datetime.now().year - 1)
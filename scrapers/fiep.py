@@ -2,9 +2,8 @@ import logging
 import urllib.parse
 
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from playwright_stealth import Stealth
 
+import runstats
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -14,17 +13,19 @@ BASE_URL = "https://portaldecompras.sistemafiep.org.br"
 
 class FiepScraper(BaseScraper):
     name = "FIEP"
+    stealth = True
+    persistent_profile = True
     url = BASE_URL + "/"
     ordered = True
 
     def run(self) -> list[dict]:
         """Faz login de ordenacao, pagina e retorna todos os itens encontrados."""
         items = []
-        with Stealth().use_sync(sync_playwright()) as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
             try:
-                page.goto(self.url, wait_until="domcontentloaded", timeout=60_000)
+                self._goto(page, self.url, wait_until="domcontentloaded", timeout=60_000)
 
                 # Aplica ordenacao "Mais recentes primeiro"
                 try:
@@ -49,12 +50,19 @@ class FiepScraper(BaseScraper):
                     if page.is_visible(next_sel):
                         page.click(next_sel)
                         page.wait_for_timeout(2000)
+                        runstats.count(pages=1)  # paginacao sem navegacao
                     else:
                         break
+                else:
+                    self._partial(f"limite de {max_pages} paginas")
             except Exception as e:
+                # Portal fora do ar levanta (breaker.py); so a paginacao parcial e aproveitada
+                if not items:
+                    raise
                 logger.error("[FIEP] Erro na paginacao: %s", e)
+                self._partial("erro na paginacao")
             finally:
-                browser.close()
+                self._close_browser(browser)
 
         logger.info("[FIEP] %d itens no total", len(items))
         return items
@@ -15,6 +15,7 @@ _ID_PATTERN = re.compile(r"trListaMuralResumoEdital_Click\((\d+),")
 class FiescScraper(BaseScraper):
     name = "FIESC"
     url = "https://portaldecompras.fiesc.com.br/Portal/Mural.aspx"
+    launch_profile = "minimal"
 
     def fetch(self) -> str:
         prev_year = str(datetime.now().year - 1)
@@ -3,10 +3,9 @@ import re
 import urllib.parse
 
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from playwright_stealth import Stealth
 
-from config import ME_PASSWORD, ME_USERNAME
+import runstats
+from config import LAZY_DETAILS, ME_PASSWORD, ME_USERNAME
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -16,39 +15,65 @@ _LIST_URL = "https://me.com.br/supplier/inbox/pendencies/3"
 _BASE_URL = "https://me.com.br"
 _MAX_PAGES = 3  # 50 itens/pagina => 150 itens por ciclo
 _MODAL_TIMEOUT = 2_000  # ms — skip rapido se item nao tem modal
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
 
 
 class MeCompraScraper(BaseScraper):
     name = "ME Compras"
+    stealth = True
+    persistent_profile = True
     url = _LIST_URL
+    lazy_details = True
 
     def run(self) -> list[dict]:
-        """Login + coleta lista + abre modais, tudo numa unica sessao."""
-        with Stealth().use_sync(sync_playwright()) as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/124.0.0.0 Safari/537.36"
-                )
-            )
-            page = context.new_page()
+        """Login + coleta lista + abre modais, tudo numa unica sessao.
+
+        Com LAZY_DETAILS os modais nao sao abertos (ver fetch_details).
+        """
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser, user_agent=_USER_AGENT)
             try:
+                # Erro de login/navegacao levanta: conta como falha no breaker.py
                 self._login(page)
-                items = self._collect_with_modals(page)
-            except Exception as e:
-                logger.error("[ME] Erro durante scraping: %s", e)
-                items = []
+                items = self._collect_with_modals(page, open_modals=not LAZY_DETAILS)
             finally:
-                browser.close()
+                self._close_browser(browser)
 
         logger.info("[ME] %d itens encontrados", len(items))
         return items
 
+    def fetch_details(self, item: dict) -> dict:
+        """Loga, acha a linha da licitacao na lista pelo link e le so o seu modal."""
+        href = urllib.parse.urlparse(item["url"]).path
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser, user_agent=_USER_AGENT)
+            try:
+                self._login(page)
+                self._goto(page, _LIST_URL, timeout=60_000)
+                for page_num in range(1, _MAX_PAGES + 1):
+                    page.wait_for_selector("tr[data-pk]", timeout=15_000)
+                    row = page.locator("tr[data-pk]").filter(has=page.locator(f"a[href*='{href}']"))
+                    if row.count():
+                        itens, total = self._read_modal(page, row.first)
+                        return {"itens": itens, "total_itens": total}
+                    next_btn = page.locator("[data-cy='next-page']")
+                    if next_btn.is_disabled() or page_num == _MAX_PAGES:
+                        break
+                    next_btn.click()
+                logger.info("[ME] Licitacao %s nao esta mais na lista", item["title"])
+                return {}
+            finally:
+                self._close_browser(browser)
+
     def _login(self, page):
         logger.info("[ME] Realizando login...")
-        page.goto(_LOGIN_URL, timeout=60_000)
+        self._goto(page, _LOGIN_URL, timeout=60_000)
         page.wait_for_selector("#LoginName", timeout=15_000)
 
         page.fill("#LoginName", ME_USERNAME)
@@ -68,8 +93,18 @@ class MeCompraScraper(BaseScraper):
         page.wait_for_timeout(3000)
         logger.info("[ME] Login concluido. URL: %s", page.url)
 
-    def _collect_with_modals(self, page) -> list[dict]:
-        page.goto(_LIST_URL, timeout=60_000)
+    def _read_modal(self, page, row) -> tuple[list[dict], int]:
+        """Abre o modal de itens da linha, le e fecha. Levanta se nao houver modal."""
+        row.locator("a.modal-quotations").click(timeout=_MODAL_TIMEOUT)
+        page.wait_for_selector("#modal-grid", timeout=10_000)
+        page.wait_for_timeout(1500)
+        result = self._parse_modal_items(page.locator(".modal-content").inner_html())
+        page.locator(".close.modal-quotations").click()
+        page.wait_for_selector(".modal-content", state="hidden", timeout=5_000)
+        return result
+
+    def _collect_with_modals(self, page, open_modals: bool = True) -> list[dict]:
+        self._goto(page, _LIST_URL, timeout=60_000)
         page.wait_for_selector("tr[data-pk]", timeout=20_000)
 
         all_items = []
@@ -79,28 +114,25 @@ class MeCompraScraper(BaseScraper):
             rows = page.locator("tr[data-pk]")
 
             for idx, item in enumerate(page_items):
-                try:
-                    modal_link = rows.nth(idx).locator("a.modal-quotations")
-                    modal_link.click(timeout=_MODAL_TIMEOUT)
-                    page.wait_for_selector("#modal-grid", timeout=10_000)
-                    page.wait_for_timeout(1500)
-                    item["itens"], item["total_itens"] = self._parse_modal_items(
-                        page.locator(".modal-content").inner_html()
-                    )
-                    page.locator(".close.modal-quotations").click()
-                    page.wait_for_selector(".modal-content", state="hidden", timeout=5_000)
-                except Exception:
-                    pass  # item sem modal, continua
+                if open_modals:
+                    try:
+                        item["itens"], item["total_itens"] = self._read_modal(page, rows.nth(idx))
+                    except Exception:
+                        pass  # item sem modal, continua
 
                 all_items.append(item)
 
             logger.info("[ME] Pagina %d: %d licitacoes", page_num, len(page_items))
 
             next_btn = page.locator("[data-cy='next-page']")
-            if next_btn.is_disabled() or page_num == _MAX_PAGES:
+            if next_btn.is_disabled():
+                break
+            if page_num == _MAX_PAGES:
+                self._partial(f"limite de {_MAX_PAGES} paginas")
                 break
             next_btn.click()
             page.wait_for_selector("tr[data-pk]", timeout=15_000)
+            runstats.count(pages=1)  # paginacao sem navegacao
 
         return all_items
 
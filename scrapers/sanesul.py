@@ -2,8 +2,6 @@ import logging
 from datetime import datetime
 
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from playwright_stealth import Stealth
 
 from .base import BaseScraper
 
@@ -14,6 +12,7 @@ BASE_URL = "https://www.sanesul.ms.gov.br"
 
 class SanesulScraper(BaseScraper):
     name = "Sanesul"
+    stealth = True
     url = "https://www.sanesul.ms.gov.br/licitacao/tipolicitacao/licitacao"
 
     def run(self) -> list[dict]:
@@ -21,12 +20,12 @@ class SanesulScraper(BaseScraper):
         year_threshold = str(datetime.now().year)
         all_items = []
 
-        with Stealth().use_sync(sync_playwright()) as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        with self._playwright() as p:
+            browser = self._launch_browser(p)
+            page = self._new_page(browser)
             try:
                 logger.info("[Sanesul] Navegando para %s", self.url)
-                page.goto(self.url, wait_until="domcontentloaded", timeout=60_000)
+                self._goto(page, self.url, wait_until="domcontentloaded", timeout=60_000)
                 page.wait_for_timeout(6_000)  # aguarda Cloudflare challenge
 
                 current_page = 1
@@ -65,9 +64,10 @@ class SanesulScraper(BaseScraper):
                         current_page = next_page
                     except Exception as e:
                         logger.error("[Sanesul] Falha ao navegar para pagina %d: %s", next_page, e)
+                        self._partial(f"parou na pagina {current_page}")
                         break
             finally:
-                browser.close()
+                self._close_browser(browser)
 
         # Filtro final: apenas ano corrente
         all_items = [i for i in all_items if year_threshold in i.get("published", "")]
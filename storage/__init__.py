@@ -0,0 +1,26 @@
+from config import STORAGE_BACKEND
+from .base import BaseStorage
+
+_storage: BaseStorage | None = None
+
+
+def get_storage() -> BaseStorage:
+    """Retorna o backend configurado em STORAGE_BACKEND (instancia unica por processo).
+
+    Os backends sao importados sob demanda para que um no com SQLite nao
+    precise do psycopg2 (nem do cliente do Supabase) instalado.
+    """
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            from .sqlite import SqliteStorage
+            _storage = SqliteStorage()
+        elif STORAGE_BACKEND == "supabase":
+            from .supabase import SupabaseStorage
+            _storage = SupabaseStorage()
+        elif STORAGE_BACKEND == "postgres":
+            from .postgres import PostgresStorage
+            _storage = PostgresStorage()
+        else:
+            raise ValueError(f"STORAGE_BACKEND desconhecido: {STORAGE_BACKEND!r}")
+    return _storage
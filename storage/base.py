@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+
+
+class BaseStorage(ABC):
+    """Interface comum dos backends de armazenamento de licitacoes.
+
+    As linhas recebidas por save_many ja vem normalizadas pelo db.py
+    (id, source, title, org, url, published, obj, itens, total_itens, raw_hash).
+    """
+
+    name: str
+
+    @abstractmethod
+    def init_db(self) -> None:
+        """Cria as tabelas necessarias, se ainda nao existirem."""
+        ...
+
+    @abstractmethod
+    def get_known_ids(self, ids: list[str]) -> set[str]:
+        """Retorna o subconjunto de ids que ja existe no banco."""
+        ...
+
+    @abstractmethod
+    def save_many(self, rows: list[dict], outbox: list[dict] | None = None) -> None:
+        """Insere as linhas em lote, ignorando ids ja existentes.
+
+        Mensagens em outbox (ver enqueue) sao gravadas na mesma transacao.
+        """
+        ...
+
+    @abstractmethod
+    def search(self, query: str, since=None, source: str | None = None, limit: int = 50) -> list[dict]:
+        """Busca textual nas licitacoes salvas, da mais relevante para a menos."""
+        ...
+
+    def save_changes(self, rows: list[dict]) -> list[dict]:
+        """Atualiza as linhas cujo raw_hash difere do salvo, guardando a versao anterior.
+
+        Retorna, para cada licitacao alterada, {"id", "version", "old": {...}} com
+        os campos da versao anterior. Backends sem suporte levantam NotImplementedError.
+        """
+        raise NotImplementedError(f"Backend {self.name} nao suporta rastreamento de alteracoes")
+
+    def mark_seen(self, source: str, ids: list[str], vanish: bool = True) -> list[dict]:
+        """Atualiza last_seen/seen_count dos ids observados no ciclo e marca como
+        encerradas as licitacoes da fonte que sairam da listagem.
+
+        Retorna as que acabaram de sair (id, title, org, url, obj, first_seen,
+        last_seen, seen_count). vanish=False (listagem parcial) nao encerra nada.
+        """
+        raise NotImplementedError(f"Backend {self.name} nao suporta rastreamento de ciclo de vida")
+
+    # ------------------------------------------------------------------
+    # Outbox de notificacoes (ver dispatcher.py)
+    # ------------------------------------------------------------------
+
+    def enqueue(self, outbox: list[dict]) -> None:
+        """Grava mensagens na outbox: {idempotency_key, notice_id, chat_id, kind, text,
+        message_id} (message_id so nas edicoes: a mensagem a editar).
+
+        Chaves repetidas sao ignoradas, entao reenfileirar e seguro.
+        """
+        raise NotImplementedError(f"Backend {self.name} nao suporta outbox")
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> list[dict]:
+        """Reserva ate `limit` mensagens pendentes por lease_seconds (sem entrega dupla
+        entre dispatchers; se o dispatcher morrer, a mensagem volta apos o lease)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta outbox")
+
+    def mark_sent(self, sent: list[dict]) -> None:
+        """Marca como enviadas: [{id, message_id}].
+
+        Para alertas de uma licitacao ("new"/"edit"), guarda tambem a mensagem
+        do chat, consultada depois por get_message_ids.
+        """
+        raise NotImplementedError(f"Backend {self.name} nao suporta outbox")
+
+    def get_message_ids(self, notice_ids: list[str]) -> dict[tuple[str, str], str]:
+        """Mensagens ja enviadas por licitacao e chat: {(notice_id, chat_id): message_id}."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta outbox")
+
+    def mark_failed(
+        self, failed: list[dict], max_attempts: int, base_delay: float, max_delay: float
+    ) -> list[int]:
+        """Registra falhas [{id, error, permanent}] com backoff exponencial.
+
+        Mensagens com falha permanente ou sem tentativas restantes vao para o
+        estado "dead"; retorna os ids que morreram.
+        """
+        raise NotImplementedError(f"Backend {self.name} nao suporta outbox")
+
+    def save_runs(self, runs: list[dict]) -> None:
+        """Grava em lote as execucoes do ciclo em scrape_runs (ver runstats.py)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta historico de execucoes")
+
+    # ------------------------------------------------------------------
+    # Fila de jobs de scraping entre varios nos (ver worker.py)
+    # ------------------------------------------------------------------
+
+    def ensure_jobs(self, sources: list[str]) -> None:
+        """Cria o job recorrente de cada fonte, se ainda nao existir."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta fila de jobs")
+
+    def claim_job(self, worker_id: str, sources: list[str], stale_after: float) -> dict | None:
+        """Reserva o job vencido mais antigo entre `sources` (ou um em execucao cujo
+        heartbeat parou ha mais de stale_after s: o no caiu). Retorna {source,
+        failures, previous_worker} ou None."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta fila de jobs")
+
+    def heartbeat_job(self, source: str, worker_id: str) -> bool:
+        """Renova a reserva; False se outro worker assumiu o job."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta fila de jobs")
+
+    def finish_job(self, source: str, worker_id: str, ok: bool, error: str | None, delay: float) -> bool:
+        """Libera o job e agenda a proxima execucao para daqui a `delay` s.
+        False se a reserva ja era de outro worker (nada muda)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta fila de jobs")
+
+    def recent_notices(self, limit: int) -> list[dict]:
+        """Ultimas `limit` licitacoes salvas ({title, obj, itens}): corpus do IDF (scoring.py)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta corpus de relevancia")
+
+    # ------------------------------------------------------------------
+    # Detalhes sob demanda: botao "Ver detalhes" dos alertas (ver bot.py)
+    # ------------------------------------------------------------------
+
+    def get_notice(self, notice_id: str) -> dict | None:
+        """Licitacao salva: {id, source, title, org, url, published, obj, itens,
+        total_itens, details}; details e o cache de save_details (ou None)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta detalhes sob demanda")
+
+    def save_details(self, notice_id: str, details: dict) -> None:
+        """Guarda os detalhes buscados sob demanda (cache por licitacao)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta detalhes sob demanda")
+
+    # ------------------------------------------------------------------
+    # Assinaturas: chat -> perfil de palavras-chave e fontes (ver subscriptions.py)
+    # ------------------------------------------------------------------
+
+    def get_subscriptions(self) -> list[dict]:
+        """Retorna as assinaturas ativas: {chat_id, name, keywords, sources, min_score}."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta assinaturas")
+
+    def upsert_subscription(self, subscription: dict) -> None:
+        """Cria ou substitui a assinatura (chat_id, name)."""
+        raise NotImplementedError(f"Backend {self.name} nao suporta assinaturas")
+
+    def delete_subscription(self, chat_id: str, name: str) -> None:
+        raise NotImplementedError(f"Backend {self.name} nao suporta assinaturas")
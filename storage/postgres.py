@@ -0,0 +1,655 @@
+import io
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from config import PG_DB, PG_HOST, PG_PASS, PG_PORT, PG_USER
+from tracing import span
+from .base import BaseStorage
+
+# Alteracoes idempotentes aplicadas por init_db sobre tabelas ja existentes.
+_MIGRATIONS = [
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS source TEXT",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS obj TEXT",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS itens JSONB",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS total_itens INTEGER",
+    # Vetor de busca com stemming em portugues: titulo pesa mais que objeto,
+    # que pesa mais que a descricao dos itens e o orgao.
+    """
+    ALTER TABLE notices ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(obj, '')), 'B') ||
+        setweight(jsonb_to_tsvector('portuguese', coalesce(itens, '[]'::jsonb), '["string"]'), 'C') ||
+        setweight(to_tsvector('portuguese', coalesce(org, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS notices_search_idx ON notices USING GIN (search_tsv)",
+    "CREATE INDEX IF NOT EXISTS notices_source_found_idx ON notices (source, found_at)",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    """
+    CREATE TABLE IF NOT EXISTS notice_history (
+        id BIGSERIAL PRIMARY KEY,
+        notice_id TEXT NOT NULL REFERENCES notices (id),
+        version INTEGER NOT NULL,
+        title TEXT,
+        org TEXT,
+        url TEXT,
+        published TEXT,
+        obj TEXT,
+        itens JSONB,
+        total_itens INTEGER,
+        raw_hash TEXT,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (notice_id, version)
+    )
+    """,
+    # Ciclo de vida: first_seen/last_seen herdam found_at nas linhas antigas.
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS seen_count INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS vanished_at TIMESTAMP",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS details JSONB",
+    "ALTER TABLE notices ADD COLUMN IF NOT EXISTS details_at TIMESTAMP",
+    "UPDATE notices SET first_seen = found_at, last_seen = found_at WHERE first_seen IS NULL",
+    "ALTER TABLE notices ALTER COLUMN first_seen SET DEFAULT CURRENT_TIMESTAMP",
+    "ALTER TABLE notices ALTER COLUMN last_seen SET DEFAULT CURRENT_TIMESTAMP",
+    "CREATE INDEX IF NOT EXISTS notices_active_idx ON notices (source) WHERE vanished_at IS NULL",
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id BIGSERIAL PRIMARY KEY,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        notice_id TEXT,
+        chat_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        text TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        last_error TEXT,
+        message_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS outbox_pending_idx ON outbox (next_attempt_at) WHERE status = 'pending'",
+    """
+    CREATE TABLE IF NOT EXISTS subscriptions (
+        chat_id TEXT NOT NULL,
+        name TEXT NOT NULL DEFAULT 'padrao',
+        keywords JSONB NOT NULL DEFAULT '[]',
+        sources JSONB,
+        active BOOLEAN NOT NULL DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (chat_id, name)
+    )
+    """,
+    "ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS min_score REAL",
+    "ALTER TABLE outbox ADD COLUMN IF NOT EXISTS reply_markup JSONB",
+    """
+    CREATE TABLE IF NOT EXISTS notice_messages (
+        notice_id TEXT NOT NULL,
+        chat_id TEXT NOT NULL,
+        message_id TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (notice_id, chat_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        id BIGSERIAL PRIMARY KEY,
+        source TEXT NOT NULL,
+        started_at TIMESTAMPTZ NOT NULL,
+        finished_at TIMESTAMPTZ NOT NULL,
+        pages INTEGER NOT NULL DEFAULT 0,
+        scrolls INTEGER NOT NULL DEFAULT 0,
+        rows_parsed INTEGER NOT NULL DEFAULT 0,
+        new_rows INTEGER NOT NULL DEFAULT 0,
+        bytes BIGINT NOT NULL DEFAULT 0,
+        browser_cpu_seconds REAL,
+        browser_peak_rss BIGINT,
+        error TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS scrape_runs_source_idx ON scrape_runs (source, started_at)",
+    """
+    CREATE TABLE IF NOT EXISTS scrape_jobs (
+        source TEXT PRIMARY KEY,
+        status TEXT NOT NULL DEFAULT 'pending',
+        next_run_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        locked_by TEXT,
+        locked_at TIMESTAMPTZ,
+        heartbeat_at TIMESTAMPTZ,
+        failures INTEGER NOT NULL DEFAULT 0,
+        runs INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        finished_at TIMESTAMPTZ
+    )
+    """,
+]
+
+_OUTBOX_INSERT = (
+    "INSERT INTO outbox (idempotency_key, notice_id, chat_id, kind, text, message_id, reply_markup) "
+    "VALUES (%(idempotency_key)s, %(notice_id)s, %(chat_id)s, %(kind)s, %(text)s, %(message_id)s, "
+    "%(reply_markup)s) "
+    "ON CONFLICT (idempotency_key) DO NOTHING"
+)
+
+# SKIP LOCKED: varios dispatchers podem drenar a mesma outbox sem se bloquear.
+# A reserva e so empurrar next_attempt_at para frente (lease).
+_OUTBOX_CLAIM = """
+    UPDATE outbox SET next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+    WHERE id IN (
+        SELECT id FROM outbox
+        WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY id LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, idempotency_key, notice_id, chat_id, kind, text, message_id, reply_markup, attempts
+"""
+_OUTBOX_FIELDS = (
+    "id", "idempotency_key", "notice_id", "chat_id", "kind", "text", "message_id",
+    "reply_markup", "attempts",
+)
+
+# Marca o lote como enviado e, na mesma instrucao, guarda a mensagem de cada
+# licitacao por chat (alvo de futuras edicoes, ver EDIT_IN_PLACE)
+_OUTBOX_SENT = """
+    WITH sent AS (
+        UPDATE outbox o SET status = 'sent', sent_at = CURRENT_TIMESTAMP,
+            message_id = v.message_id
+        FROM (VALUES %s) AS v (id, message_id)
+        WHERE o.id = v.id
+        RETURNING o.notice_id, o.chat_id, o.kind, o.message_id
+    )
+    INSERT INTO notice_messages (notice_id, chat_id, message_id)
+    SELECT notice_id, chat_id, message_id FROM sent
+    WHERE kind IN ('new', 'edit') AND notice_id IS NOT NULL AND message_id IS NOT NULL
+    ON CONFLICT (notice_id, chat_id) DO UPDATE SET
+        message_id = EXCLUDED.message_id, updated_at = CURRENT_TIMESTAMP
+"""
+
+_OUTBOX_FAILED = """
+    UPDATE outbox SET
+        attempts = attempts + 1,
+        last_error = %(error)s,
+        status = CASE WHEN %(permanent)s OR attempts + 1 >= %(max_attempts)s
+                      THEN 'dead' ELSE 'pending' END,
+        next_attempt_at = CURRENT_TIMESTAMP
+            + make_interval(secs => least(%(base_delay)s * power(2, attempts), %(max_delay)s))
+    WHERE id = %(id)s
+    RETURNING id, status
+"""
+
+# Comparacao de hashes, historico e atualizacao num unico statement por lote:
+# "old" trava e le as linhas alteradas antes do UPDATE (mesmo snapshot), "hist"
+# copia essa versao para notice_history e o UPDATE grava a nova.
+_SAVE_CHANGES_SQL = """
+    WITH incoming (id, source, title, org, url, published, obj, itens, total_itens, raw_hash) AS (
+        VALUES %s
+    ),
+    old AS (
+        SELECT n.* FROM notices n JOIN incoming i ON i.id = n.id
+        WHERE n.raw_hash IS DISTINCT FROM i.raw_hash
+        FOR UPDATE OF n
+    ),
+    hist AS (
+        INSERT INTO notice_history
+            (notice_id, version, title, org, url, published, obj, itens, total_itens, raw_hash)
+        SELECT id, version, title, org, url, published, obj, itens, total_itens, raw_hash FROM old
+    )
+    UPDATE notices n SET
+        source = coalesce(n.source, i.source),
+        title = i.title, org = i.org, url = i.url, published = i.published,
+        obj = i.obj, itens = i.itens, total_itens = i.total_itens, raw_hash = i.raw_hash,
+        version = n.version + 1, updated_at = CURRENT_TIMESTAMP,
+        details = NULL, details_at = NULL  -- detalhes em cache eram da versao anterior
+    FROM incoming i, old o
+    WHERE n.id = i.id AND o.id = n.id
+    RETURNING n.id, n.version, o.title, o.org, o.url, o.published, o.obj, o.itens, o.total_itens
+"""
+_SAVE_CHANGES_TEMPLATE = (
+    "(%(id)s, %(source)s, %(title)s, %(org)s, %(url)s, %(published)s, "
+    "%(obj)s, %(itens)s::jsonb, %(total_itens)s::integer, %(raw_hash)s)"
+)
+_OLD_FIELDS = ("title", "org", "url", "published", "obj", "itens", "total_itens")
+
+_RUN_FIELDS = (
+    "source", "started_at", "finished_at", "pages", "scrolls", "rows_parsed", "new_rows",
+    "bytes", "browser_cpu_seconds", "browser_peak_rss", "error",
+)
+
+# SKIP LOCKED: cada worker pega um job diferente sem esperar os outros. Job em
+# execucao com heartbeat parado ha mais de stale_after s e de um no que caiu.
+_JOB_CLAIM = """
+    WITH job AS (
+        SELECT source, locked_by FROM scrape_jobs
+        WHERE source = ANY(%(sources)s) AND (
+            (status = 'pending' AND next_run_at <= now())
+            OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => %(stale_after)s))
+        )
+        ORDER BY next_run_at LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE scrape_jobs j SET
+        status = 'running', locked_by = %(worker_id)s, locked_at = now(), heartbeat_at = now()
+    FROM job WHERE j.source = job.source
+    RETURNING j.source, j.failures, job.locked_by
+"""
+_JOB_FINISH = """
+    UPDATE scrape_jobs SET
+        status = 'pending', locked_by = NULL, heartbeat_at = NULL, finished_at = now(),
+        next_run_at = now() + make_interval(secs => %(delay)s),
+        failures = CASE WHEN %(ok)s THEN 0 ELSE failures + 1 END,
+        runs = runs + 1, last_error = %(error)s
+    WHERE source = %(source)s AND locked_by = %(worker_id)s
+"""
+
+_VANISHED_FIELDS = ("id", "title", "org", "url", "obj", "first_seen", "last_seen", "seen_count")
+
+
+def _encode_outbox(outbox: list[dict]) -> list[dict]:
+    """Teclado inline da mensagem adaptado para JSONB."""
+    return [
+        {
+            "message_id": None,
+            **msg,
+            "reply_markup": Json(msg["reply_markup"]) if msg.get("reply_markup") else None,
+        }
+        for msg in outbox
+    ]
+
+
+def _connect():
+    # Sem pool: cada operacao abre a sua conexao, entao o custo aparece a parte
+    with span("db.connect"):
+        return psycopg2.connect(
+            host=PG_HOST, port=PG_PORT, dbname=PG_DB, user=PG_USER, password=PG_PASS
+        )
+
+
+class PostgresStorage(BaseStorage):
+    name = "postgres"
+
+    def init_db(self) -> None:
+        conn = _connect()
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS notices (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                org TEXT,
+                url TEXT,
+                published TEXT,
+                raw_hash TEXT,
+                found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for stmt in _MIGRATIONS:
+            cur.execute(stmt)
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    def get_known_ids(self, ids: list[str]) -> set[str]:
+        """Um unico SELECT retorna quais IDs da lista ja existem no banco."""
+        if not ids:
+            return set()
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT id FROM notices WHERE id = ANY(%s)", (ids,))
+            return {row[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+            conn.close()
+
+    def save_many(self, rows: list[dict], outbox: list[dict] | None = None) -> None:
+        """Insere multiplas linhas em lote. Ignora conflitos (ON CONFLICT DO NOTHING).
+
+        A outbox entra na mesma transacao: ou a licitacao e o alerta sao gravados
+        juntos, ou nenhum dos dois.
+        """
+        if not rows:
+            return
+        rows = [{**row, "itens": Json(row["itens"])} for row in rows]
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.executemany(
+                "INSERT INTO notices "
+                "(id, source, title, org, url, published, obj, itens, total_itens, raw_hash) "
+                "VALUES (%(id)s, %(source)s, %(title)s, %(org)s, %(url)s, %(published)s, "
+                "%(obj)s, %(itens)s, %(total_itens)s, %(raw_hash)s) "
+                "ON CONFLICT DO NOTHING",
+                rows,
+            )
+            if outbox:
+                cur.executemany(_OUTBOX_INSERT, _encode_outbox(outbox))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def save_changes(self, rows: list[dict]) -> list[dict]:
+        if not rows:
+            return []
+        rows = [{**row, "itens": Json(row["itens"])} for row in rows]
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            result = execute_values(
+                cur, _SAVE_CHANGES_SQL, rows,
+                template=_SAVE_CHANGES_TEMPLATE, page_size=len(rows), fetch=True,
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return [
+            {"id": row[0], "version": row[1], "old": dict(zip(_OLD_FIELDS, row[2:]))}
+            for row in result
+        ]
+
+    def mark_seen(self, source: str, ids: list[str], vanish: bool = True) -> list[dict]:
+        """COPY dos ids para uma tabela temporaria + dois UPDATE com join.
+
+        Custo fixo de tres round trips por fonte, independente do numero de ids.
+        """
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute("CREATE TEMP TABLE seen_ids (id TEXT PRIMARY KEY) ON COMMIT DROP")
+            cur.copy_from(io.StringIO("\n".join(ids)), "seen_ids", columns=("id",))
+            cur.execute("""
+                UPDATE notices n SET
+                    last_seen = CURRENT_TIMESTAMP, seen_count = n.seen_count + 1, vanished_at = NULL
+                FROM seen_ids s WHERE n.id = s.id
+            """)
+            vanished = []
+            if vanish:
+                cur.execute(
+                    """
+                    UPDATE notices n SET vanished_at = CURRENT_TIMESTAMP
+                    WHERE n.source = %s AND n.vanished_at IS NULL
+                      AND NOT EXISTS (SELECT 1 FROM seen_ids s WHERE s.id = n.id)
+                    RETURNING n.id, n.title, n.org, n.url, n.obj, n.first_seen, n.last_seen, n.seen_count
+                    """,
+                    (source,),
+                )
+                vanished = cur.fetchall()
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return [dict(zip(_VANISHED_FIELDS, row)) for row in vanished]
+
+    def search(self, query: str, since=None, source: str | None = None, limit: int = 50) -> list[dict]:
+        """Busca textual ranqueada (websearch_to_tsquery + ts_rank_cd) usando o indice GIN."""
+        where = ["search_tsv @@ q"]
+        params = [query]
+        if since is not None:
+            where.append("found_at >= %s")
+            params.append(since)
+        if source:
+            where.append("source = %s")
+            params.append(source)
+        params.append(limit)
+
+        conn = _connect()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                "SELECT id, source, title, org, obj, url, published, total_itens, found_at, "
+                "ts_rank_cd(search_tsv, q) AS rank "
+                "FROM notices, websearch_to_tsquery('portuguese', %s) q "
+                f"WHERE {' AND '.join(where)} "
+                "ORDER BY rank DESC, found_at DESC LIMIT %s",
+                params,
+            )
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
+
+    def enqueue(self, outbox: list[dict]) -> None:
+        if not outbox:
+            return
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.executemany(_OUTBOX_INSERT, _encode_outbox(outbox))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> list[dict]:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(_OUTBOX_CLAIM, (lease_seconds, limit))
+            claimed = cur.fetchall()
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return sorted((dict(zip(_OUTBOX_FIELDS, row)) for row in claimed), key=lambda r: r["id"])
+
+    def mark_sent(self, sent: list[dict]) -> None:
+        if not sent:
+            return
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            execute_values(
+                cur,
+                _OUTBOX_SENT,
+                [(row["id"], row["message_id"]) for row in sent],
+                template="(%s::bigint, %s)",
+                page_size=len(sent),
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def mark_failed(
+        self, failed: list[dict], max_attempts: int, base_delay: float, max_delay: float
+    ) -> list[int]:
+        if not failed:
+            return []
+        params = {"max_attempts": max_attempts, "base_delay": base_delay, "max_delay": max_delay}
+        dead = []
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            # Falhas sao raras: um UPDATE por mensagem, na mesma conexao/transacao
+            for row in failed:
+                cur.execute(_OUTBOX_FAILED, {**params, **row})
+                row_id, status = cur.fetchone()
+                if status == "dead":
+                    dead.append(row_id)
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return dead
+
+    def get_message_ids(self, notice_ids: list[str]) -> dict[tuple[str, str], str]:
+        if not notice_ids:
+            return {}
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT notice_id, chat_id, message_id FROM notice_messages "
+                "WHERE notice_id = ANY(%s)",
+                (list(notice_ids),),
+            )
+            return {(notice_id, chat_id): message_id for notice_id, chat_id, message_id in cur.fetchall()}
+        finally:
+            cur.close()
+            conn.close()
+
+    def recent_notices(self, limit: int) -> list[dict]:
+        conn = _connect()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                "SELECT title, obj, itens FROM notices ORDER BY found_at DESC LIMIT %s", (limit,)
+            )
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
+
+    def get_notice(self, notice_id: str) -> dict | None:
+        conn = _connect()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                "SELECT id, source, title, org, url, published, obj, itens, total_itens, details "
+                "FROM notices WHERE id = %s",
+                (notice_id,),
+            )
+            row = cur.fetchone()
+            return dict(row) if row else None
+        finally:
+            cur.close()
+            conn.close()
+
+    def save_details(self, notice_id: str, details: dict) -> None:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE notices SET details = %s, details_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (Json(details), notice_id),
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def save_runs(self, runs: list[dict]) -> None:
+        if not runs:
+            return
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            execute_values(
+                cur,
+                f"INSERT INTO scrape_runs ({', '.join(_RUN_FIELDS)}) VALUES %s",
+                [tuple(run[field] for field in _RUN_FIELDS) for run in runs],
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def ensure_jobs(self, sources: list[str]) -> None:
+        if not sources:
+            return
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            execute_values(
+                cur, "INSERT INTO scrape_jobs (source) VALUES %s ON CONFLICT DO NOTHING",
+                [(source,) for source in sources],
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def claim_job(self, worker_id: str, sources: list[str], stale_after: float) -> dict | None:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                _JOB_CLAIM, {"worker_id": worker_id, "sources": list(sources), "stale_after": stale_after}
+            )
+            row = cur.fetchone()
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        if row is None:
+            return None
+        return {"source": row[0], "failures": row[1], "previous_worker": row[2]}
+
+    def heartbeat_job(self, source: str, worker_id: str) -> bool:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE scrape_jobs SET heartbeat_at = now() "
+                "WHERE source = %s AND locked_by = %s AND status = 'running'",
+                (source, worker_id),
+            )
+            conn.commit()
+            return cur.rowcount == 1
+        finally:
+            cur.close()
+            conn.close()
+
+    def finish_job(self, source: str, worker_id: str, ok: bool, error: str | None, delay: float) -> bool:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(_JOB_FINISH, {
+                "source": source, "worker_id": worker_id, "ok": ok, "error": error, "delay": delay,
+            })
+            conn.commit()
+            return cur.rowcount == 1
+        finally:
+            cur.close()
+            conn.close()
+
+    def get_subscriptions(self) -> list[dict]:
+        conn = _connect()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                "SELECT chat_id, name, keywords, sources, min_score FROM subscriptions "
+                "WHERE active ORDER BY chat_id, name"
+            )
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
+
+    def upsert_subscription(self, subscription: dict) -> None:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO subscriptions (chat_id, name, keywords, sources, min_score, active) "
+                "VALUES (%s, %s, %s, %s, %s, TRUE) "
+                "ON CONFLICT (chat_id, name) DO UPDATE SET "
+                "keywords = EXCLUDED.keywords, sources = EXCLUDED.sources, "
+                "min_score = EXCLUDED.min_score, active = TRUE",
+                (
+                    subscription["chat_id"],
+                    subscription["name"],
+                    Json(subscription["keywords"]),
+                    Json(subscription["sources"]) if subscription["sources"] else None,
+                    subscription.get("min_score"),
+                ),
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    def delete_subscription(self, chat_id: str, name: str) -> None:
+        conn = _connect()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM subscriptions WHERE chat_id = %s AND name = %s", (chat_id, name))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
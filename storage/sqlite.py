@@ -0,0 +1,573 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from config import SQLITE_PATH
+from .base import BaseStorage
+
+# Insercao com placeholders fixos: o sqlite3 prepara o statement uma unica vez
+# e o reaproveita para todas as linhas do executemany.
+_INSERT_SQL = (
+    "INSERT OR IGNORE INTO notices "
+    "(id, source, title, org, url, published, obj, itens, total_itens, raw_hash) "
+    "VALUES (:id, :source, :title, :org, :url, :published, :obj, :itens, :total_itens, :raw_hash)"
+)
+
+# A lista de ids vai como um unico parametro JSON: o SQL nao muda com o tamanho
+# do lote (statement em cache) e nao esbarra no limite de variaveis do SQLite.
+_KNOWN_SQL = "SELECT id FROM notices WHERE id IN (SELECT value FROM json_each(?))"
+
+# Colunas adicionadas depois da primeira versao do schema (ALTER TABLE do SQLite
+# nao tem IF NOT EXISTS, entao conferimos via PRAGMA table_info).
+_EXTRA_COLUMNS = {
+    "source": "TEXT",
+    "obj": "TEXT",
+    "itens": "TEXT",  # JSON
+    "total_itens": "INTEGER",
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "updated_at": "TIMESTAMP",
+    "first_seen": "TIMESTAMP",
+    "last_seen": "TIMESTAMP",
+    "seen_count": "INTEGER NOT NULL DEFAULT 1",
+    "vanished_at": "TIMESTAMP",
+    "details": "TEXT",  # JSON, detalhes buscados sob demanda (bot.py)
+    "details_at": "TIMESTAMP",
+}
+# Idem para as demais tabelas: {(tabela, coluna): tipo}
+_LATER_COLUMNS = {
+    ("subscriptions", "min_score"): "REAL",
+    ("outbox", "reply_markup"): "TEXT",  # JSON
+}
+
+_HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS notice_history (
+        id INTEGER PRIMARY KEY,
+        notice_id TEXT NOT NULL REFERENCES notices (id),
+        version INTEGER NOT NULL,
+        title TEXT,
+        org TEXT,
+        url TEXT,
+        published TEXT,
+        obj TEXT,
+        itens TEXT,
+        total_itens INTEGER,
+        raw_hash TEXT,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (notice_id, version)
+    )
+"""
+
+# Lote recebido vai para uma tabela temporaria; a comparacao de hashes roda em
+# SQL sobre o lote inteiro (um INSERT..SELECT para o historico e um UPDATE..FROM).
+_INCOMING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS incoming (
+        id TEXT PRIMARY KEY, source TEXT, title TEXT, org TEXT, url TEXT, published TEXT,
+        obj TEXT, itens TEXT, total_itens INTEGER, raw_hash TEXT
+    )
+"""
+_INCOMING_INSERT = (
+    "INSERT OR IGNORE INTO incoming "
+    "(id, source, title, org, url, published, obj, itens, total_itens, raw_hash) "
+    "VALUES (:id, :source, :title, :org, :url, :published, :obj, :itens, :total_itens, :raw_hash)"
+)
+_HISTORY_FROM_INCOMING = """
+    INSERT INTO notice_history
+        (notice_id, version, title, org, url, published, obj, itens, total_itens, raw_hash)
+    SELECT n.id, n.version, n.title, n.org, n.url, n.published, n.obj, n.itens, n.total_itens, n.raw_hash
+    FROM notices n JOIN incoming i ON i.id = n.id
+    WHERE n.raw_hash IS NOT i.raw_hash
+    RETURNING notice_id, version, title, org, url, published, obj, itens, total_itens
+"""
+_UPDATE_FROM_INCOMING = """
+    UPDATE notices AS n SET
+        source = coalesce(n.source, i.source),
+        title = i.title, org = i.org, url = i.url, published = i.published,
+        obj = i.obj, itens = i.itens, total_itens = i.total_itens, raw_hash = i.raw_hash,
+        version = n.version + 1, updated_at = CURRENT_TIMESTAMP,
+        details = NULL, details_at = NULL  -- detalhes em cache eram da versao anterior
+    FROM incoming AS i
+    WHERE n.id = i.id AND n.raw_hash IS NOT i.raw_hash
+"""
+_OLD_FIELDS = ("title", "org", "url", "published", "obj", "itens", "total_itens")
+
+# Ciclo de vida: ALTER TABLE do SQLite nao aceita default CURRENT_TIMESTAMP em
+# coluna nova, entao first_seen/last_seen das linhas inseridas vem deste trigger.
+_SEEN_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS notices_seen_ai AFTER INSERT ON notices
+    WHEN new.first_seen IS NULL BEGIN
+        UPDATE notices SET first_seen = new.found_at, last_seen = new.found_at
+        WHERE rowid = new.rowid;
+    END
+"""
+_SEEN_UPDATE = """
+    UPDATE notices AS n SET
+        last_seen = CURRENT_TIMESTAMP, seen_count = n.seen_count + 1, vanished_at = NULL
+    FROM seen_ids AS s WHERE n.id = s.id
+"""
+_VANISHED_UPDATE = """
+    UPDATE notices SET vanished_at = CURRENT_TIMESTAMP
+    WHERE source = ? AND vanished_at IS NULL
+      AND NOT EXISTS (SELECT 1 FROM seen_ids s WHERE s.id = notices.id)
+    RETURNING id, title, org, url, obj, first_seen, last_seen, seen_count
+"""
+_VANISHED_FIELDS = ("id", "title", "org", "url", "obj", "first_seen", "last_seen", "seen_count")
+
+_OUTBOX_TABLE = """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        notice_id TEXT,
+        chat_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        text TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        last_error TEXT,
+        message_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+"""
+_SUBSCRIPTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS subscriptions (
+        chat_id TEXT NOT NULL,
+        name TEXT NOT NULL DEFAULT 'padrao',
+        keywords TEXT NOT NULL DEFAULT '[]',  -- JSON
+        sources TEXT,  -- JSON; NULL = todas as fontes
+        active INTEGER NOT NULL DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (chat_id, name)
+    )
+"""
+_NOTICE_MESSAGES_TABLE = """
+    CREATE TABLE IF NOT EXISTS notice_messages (
+        notice_id TEXT NOT NULL,
+        chat_id TEXT NOT NULL,
+        message_id TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (notice_id, chat_id)
+    )
+"""
+_SCRAPE_RUNS_TABLE = """
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        id INTEGER PRIMARY KEY,
+        source TEXT NOT NULL,
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP NOT NULL,
+        pages INTEGER NOT NULL DEFAULT 0,
+        scrolls INTEGER NOT NULL DEFAULT 0,
+        rows_parsed INTEGER NOT NULL DEFAULT 0,
+        new_rows INTEGER NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0,
+        browser_cpu_seconds REAL,
+        browser_peak_rss INTEGER,
+        error TEXT
+    )
+"""
+_RUN_INSERT = (
+    "INSERT INTO scrape_runs (source, started_at, finished_at, pages, scrolls, rows_parsed, "
+    "new_rows, bytes, browser_cpu_seconds, browser_peak_rss, error) "
+    "VALUES (:source, :started_at, :finished_at, :pages, :scrolls, :rows_parsed, "
+    ":new_rows, :bytes, :browser_cpu_seconds, :browser_peak_rss, :error)"
+)
+_OUTBOX_INSERT = (
+    "INSERT OR IGNORE INTO outbox "
+    "(idempotency_key, notice_id, chat_id, kind, text, message_id, reply_markup) "
+    "VALUES (:idempotency_key, :notice_id, :chat_id, :kind, :text, :message_id, :reply_markup)"
+)
+# Reserva = empurrar next_attempt_at para frente (lease); se o dispatcher cair,
+# a mensagem volta a ficar disponivel quando o lease expira.
+_OUTBOX_CLAIM = """
+    UPDATE outbox SET next_attempt_at = datetime('now', '+' || ? || ' seconds')
+    WHERE id IN (
+        SELECT id FROM outbox
+        WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY id LIMIT ?
+    )
+    RETURNING id, idempotency_key, notice_id, chat_id, kind, text, message_id, reply_markup, attempts
+"""
+_OUTBOX_FIELDS = (
+    "id", "idempotency_key", "notice_id", "chat_id", "kind", "text", "message_id",
+    "reply_markup", "attempts",
+)
+# Mensagem de cada licitacao por chat: alvo de futuras edicoes (EDIT_IN_PLACE)
+_SAVE_MESSAGE_IDS = """
+    INSERT INTO notice_messages (notice_id, chat_id, message_id)
+    SELECT notice_id, chat_id, message_id FROM outbox
+    WHERE id IN (SELECT value FROM json_each(?))
+      AND kind IN ('new', 'edit') AND notice_id IS NOT NULL AND message_id IS NOT NULL
+    ON CONFLICT (notice_id, chat_id) DO UPDATE SET
+        message_id = excluded.message_id, updated_at = CURRENT_TIMESTAMP
+"""
+_OUTBOX_FAILED = """
+    UPDATE outbox SET
+        attempts = attempts + 1,
+        last_error = :error,
+        status = CASE WHEN :permanent OR attempts + 1 >= :max_attempts
+                      THEN 'dead' ELSE 'pending' END,
+        next_attempt_at = datetime(
+            'now', '+' || min(:base_delay * (1 << attempts), :max_delay) || ' seconds'
+        )
+    WHERE id = :id
+    RETURNING id, status
+"""
+
+# Texto das descricoes dos itens, extraido do JSON para o indice textual.
+_ITENS_TEXT = (
+    "(SELECT group_concat(json_extract(value, '$.descricao'), ' ') "
+    "FROM json_each(coalesce({}.itens, '[]')))"
+)
+
+# O FTS5 nao tem stemmer de portugues; remove_diacritics + busca por prefixo
+# ("manutenc*") cobrem plural e acentuacao na pratica.
+_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE notices_fts USING fts5(
+        title, obj, itens, org, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER notices_fts_ai AFTER INSERT ON notices BEGIN
+        INSERT INTO notices_fts (rowid, title, obj, itens, org)
+        VALUES (new.rowid, new.title, new.obj, {_ITENS_TEXT.format('new')}, new.org);
+    END
+    """,
+    f"""
+    CREATE TRIGGER notices_fts_au AFTER UPDATE OF title, obj, itens, org ON notices BEGIN
+        DELETE FROM notices_fts WHERE rowid = old.rowid;
+        INSERT INTO notices_fts (rowid, title, obj, itens, org)
+        VALUES (new.rowid, new.title, new.obj, {_ITENS_TEXT.format('new')}, new.org);
+    END
+    """,
+    f"""
+    INSERT INTO notices_fts (rowid, title, obj, itens, org)
+    SELECT n.rowid, n.title, n.obj, {_ITENS_TEXT.format('n')}, n.org FROM notices n
+    """,
+]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _fts_query(query: str) -> str:
+    """Converte texto livre em termos FTS5 com prefixo, todos obrigatorios."""
+    return " ".join(f'"{tok}"*' for tok in _TOKEN_RE.findall(query))
+
+
+def _encode_itens(row: dict) -> dict:
+    """Itens sao gravados como texto JSON (NULL quando vazio)."""
+    itens = row["itens"]
+    return {**row, "itens": json.dumps(itens, ensure_ascii=False) if itens else None}
+
+
+def _encode_outbox(outbox: list[dict]) -> list[dict]:
+    """Teclado inline da mensagem gravado como texto JSON."""
+    return [
+        {
+            "message_id": None,
+            **msg,
+            "reply_markup": json.dumps(msg["reply_markup"]) if msg.get("reply_markup") else None,
+        }
+        for msg in outbox
+    ]
+
+
+def _db_timestamp(value) -> str:
+    """Formata datetime no padrao de CURRENT_TIMESTAMP do SQLite (UTC)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+class SqliteStorage(BaseStorage):
+    """Backend embutido para nos de monitoramento pequenos (sem servidor Postgres).
+
+    Usa WAL para que leituras nao bloqueiem a escrita e uma conexao por thread,
+    mantida aberta entre os ciclos.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+        return conn
+
+    def init_db(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notices (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    org TEXT,
+                    url TEXT,
+                    published TEXT,
+                    raw_hash TEXT,
+                    found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(notices)")}
+            for column, col_type in _EXTRA_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE notices ADD COLUMN {column} {col_type}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS notices_source_found_idx ON notices (source, found_at)"
+            )
+            conn.execute(_HISTORY_TABLE)
+            conn.execute(
+                "UPDATE notices SET first_seen = found_at, last_seen = found_at "
+                "WHERE first_seen IS NULL"
+            )
+            conn.execute(_SEEN_TRIGGER)
+            conn.execute(_OUTBOX_TABLE)
+            conn.execute(_SUBSCRIPTIONS_TABLE)
+            conn.execute(_NOTICE_MESSAGES_TABLE)
+            conn.execute(_SCRAPE_RUNS_TABLE)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS scrape_runs_source_idx ON scrape_runs (source, started_at)"
+            )
+            for (table, column), col_type in _LATER_COLUMNS.items():
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_pending_idx ON outbox (next_attempt_at) "
+                "WHERE status = 'pending'"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS notices_active_idx ON notices (source) "
+                "WHERE vanished_at IS NULL"
+            )
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'notices_fts'"
+            ).fetchone()
+            if not has_fts:
+                for stmt in _FTS_SCHEMA:
+                    conn.execute(stmt)
+
+    def get_known_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        cur = self._conn().execute(_KNOWN_SQL, (json.dumps(ids),))
+        return {row[0] for row in cur.fetchall()}
+
+    def save_many(self, rows: list[dict], outbox: list[dict] | None = None) -> None:
+        """Insere todas as linhas (e a outbox, se houver) numa unica transacao."""
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT_SQL, [_encode_itens(row) for row in rows])
+            if outbox:
+                conn.executemany(_OUTBOX_INSERT, _encode_outbox(outbox))
+
+    def save_changes(self, rows: list[dict]) -> list[dict]:
+        if not rows:
+            return []
+        conn = self._conn()
+        with conn:
+            conn.execute(_INCOMING_TABLE)
+            conn.execute("DELETE FROM incoming")
+            conn.executemany(_INCOMING_INSERT, [_encode_itens(row) for row in rows])
+            changed = conn.execute(_HISTORY_FROM_INCOMING).fetchall()
+            conn.execute(_UPDATE_FROM_INCOMING)
+        result = []
+        for row in changed:
+            old = dict(zip(_OLD_FIELDS, row[2:]))
+            old["itens"] = json.loads(old["itens"]) if old["itens"] else []
+            result.append({"id": row[0], "version": row[1] + 1, "old": old})
+        return result
+
+    def mark_seen(self, source: str, ids: list[str], vanish: bool = True) -> list[dict]:
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_ids (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM seen_ids")
+            conn.executemany("INSERT OR IGNORE INTO seen_ids (id) VALUES (?)", ((i,) for i in ids))
+            conn.execute(_SEEN_UPDATE)
+            vanished = conn.execute(_VANISHED_UPDATE, (source,)).fetchall() if vanish else []
+        return [dict(zip(_VANISHED_FIELDS, row)) for row in vanished]
+
+    def search(self, query: str, since=None, source: str | None = None, limit: int = 50) -> list[dict]:
+        """Busca textual ranqueada por bm25 no indice FTS5."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        where = ["notices_fts MATCH ?"]
+        params = [match]
+        if since is not None:
+            where.append("n.found_at >= ?")
+            params.append(_db_timestamp(since))
+        if source:
+            where.append("n.source = ?")
+            params.append(source)
+        params.append(limit)
+
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            cur = conn.execute(
+                "SELECT n.id, n.source, n.title, n.org, n.obj, n.url, n.published, "
+                "n.total_itens, n.found_at, -bm25(notices_fts, 10.0, 4.0, 2.0, 1.0) AS rank "
+                "FROM notices_fts JOIN notices n ON n.rowid = notices_fts.rowid "
+                f"WHERE {' AND '.join(where)} "
+                "ORDER BY rank DESC, n.found_at DESC LIMIT ?",
+                params,
+            )
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            conn.row_factory = None
+
+    def enqueue(self, outbox: list[dict]) -> None:
+        if not outbox:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(_OUTBOX_INSERT, _encode_outbox(outbox))
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> list[dict]:
+        conn = self._conn()
+        with conn:
+            claimed = conn.execute(_OUTBOX_CLAIM, (lease_seconds, limit)).fetchall()
+        rows = [dict(zip(_OUTBOX_FIELDS, row)) for row in claimed]
+        for row in rows:
+            if row["reply_markup"]:
+                row["reply_markup"] = json.loads(row["reply_markup"])
+        return sorted(rows, key=lambda r: r["id"])
+
+    def mark_sent(self, sent: list[dict]) -> None:
+        if not sent:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "UPDATE outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, "
+                "message_id = :message_id WHERE id = :id",
+                sent,
+            )
+            conn.execute(_SAVE_MESSAGE_IDS, (json.dumps([row["id"] for row in sent]),))
+
+    def mark_failed(
+        self, failed: list[dict], max_attempts: int, base_delay: float, max_delay: float
+    ) -> list[int]:
+        if not failed:
+            return []
+        params = {"max_attempts": max_attempts, "base_delay": base_delay, "max_delay": max_delay}
+        dead = []
+        conn = self._conn()
+        with conn:
+            for row in failed:
+                row_id, status = conn.execute(_OUTBOX_FAILED, {**params, **row}).fetchone()
+                if status == "dead":
+                    dead.append(row_id)
+        return dead
+
+    def get_message_ids(self, notice_ids: list[str]) -> dict[tuple[str, str], str]:
+        if not notice_ids:
+            return {}
+        rows = self._conn().execute(
+            "SELECT notice_id, chat_id, message_id FROM notice_messages "
+            "WHERE notice_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(notice_ids)),),
+        ).fetchall()
+        return {(notice_id, chat_id): message_id for notice_id, chat_id, message_id in rows}
+
+    def recent_notices(self, limit: int) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT title, obj, itens FROM notices ORDER BY found_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            {"title": title, "obj": obj, "itens": json.loads(itens) if itens else []}
+            for title, obj, itens in rows
+        ]
+
+    def get_notice(self, notice_id: str) -> dict | None:
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute(
+                "SELECT id, source, title, org, url, published, obj, itens, total_itens, details "
+                "FROM notices WHERE id = ?",
+                (notice_id,),
+            ).fetchone()
+        finally:
+            conn.row_factory = None
+        if row is None:
+            return None
+        notice = dict(row)
+        notice["itens"] = json.loads(notice["itens"]) if notice["itens"] else []
+        notice["details"] = json.loads(notice["details"]) if notice["details"] else None
+        return notice
+
+    def save_details(self, notice_id: str, details: dict) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE notices SET details = ?, details_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (json.dumps(details, ensure_ascii=False), notice_id),
+            )
+
+    def save_runs(self, runs: list[dict]) -> None:
+        if not runs:
+            return
+        rows = [
+            {**run, "started_at": _db_timestamp(run["started_at"]),
+             "finished_at": _db_timestamp(run["finished_at"])}
+            for run in runs
+        ]
+        conn = self._conn()
+        with conn:
+            conn.executemany(_RUN_INSERT, rows)
+
+    def get_subscriptions(self) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT chat_id, name, keywords, sources, min_score FROM subscriptions "
+            "WHERE active ORDER BY chat_id, name"
+        ).fetchall()
+        return [
+            {
+                "chat_id": chat_id,
+                "name": name,
+                "keywords": json.loads(keywords),
+                "sources": json.loads(sources) if sources else None,
+                "min_score": min_score,
+            }
+            for chat_id, name, keywords, sources, min_score in rows
+        ]
+
+    def upsert_subscription(self, subscription: dict) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO subscriptions (chat_id, name, keywords, sources, min_score, active) "
+                "VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (chat_id, name) DO UPDATE SET "
+                "keywords = excluded.keywords, sources = excluded.sources, "
+                "min_score = excluded.min_score, active = 1",
+                (
+                    subscription["chat_id"],
+                    subscription["name"],
+                    json.dumps(subscription["keywords"], ensure_ascii=False),
+                    json.dumps(subscription["sources"]) if subscription["sources"] else None,
+                    subscription.get("min_score"),
+                ),
+            )
+
+    def delete_subscription(self, chat_id: str, name: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM subscriptions WHERE chat_id = ? AND name = ?", (chat_id, name))
@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+
+from postgrest import ReturnMethod
+from supabase import Client, create_client
+
+from config import SUPABASE_KEY, SUPABASE_TABLE, SUPABASE_URL
+from .base import BaseStorage
+
+_SUBSCRIPTIONS_TABLE = "subscriptions"
+_SCRAPE_RUNS_TABLE = "scrape_runs"
+
+# Ids por filtro in.(...): cada id md5 ocupa ~33 bytes na query string, entao
+# 200 ids mantem o GET bem abaixo do limite de URL do PostgREST/proxy.
+_ID_CHUNK = 200
+
+
+class SupabaseStorage(BaseStorage):
+    """Backend via API REST do Supabase (PostgREST).
+
+    Cada lote custa uma requisicao de consulta (filtro in.) e uma de upsert,
+    em vez de duas requisicoes por item. A tabela e criada pelo painel e precisa
+    das mesmas colunas do backend Postgres (incluindo search_tsv para a busca).
+    """
+
+    name = "supabase"
+
+    def __init__(self, client: Client | None = None, table: str = SUPABASE_TABLE):
+        self.client = client or create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.table = table
+
+    def init_db(self) -> None:
+        # A tabela e criada pelo painel do Supabase; aqui so validamos URL/chave.
+        self.client.table(self.table).select("id").limit(0).execute()
+
+    def get_known_ids(self, ids: list[str]) -> set[str]:
+        known = set()
+        for i in range(0, len(ids), _ID_CHUNK):
+            resp = (
+                self.client.table(self.table)
+                .select("id")
+                .in_("id", ids[i:i + _ID_CHUNK])
+                .execute()
+            )
+            known.update(row["id"] for row in resp.data)
+        return known
+
+    def save_many(self, rows: list[dict], outbox: list[dict] | None = None) -> None:
+        """Upsert unico do lote; ids existentes sao ignorados (ignore-duplicates)."""
+        if outbox:
+            raise NotImplementedError("Backend supabase nao suporta outbox")
+        if not rows:
+            return
+        self.client.table(self.table).upsert(
+            rows,
+            on_conflict="id",
+            ignore_duplicates=True,
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    def search(self, query: str, since=None, source: str | None = None, limit: int = 50) -> list[dict]:
+        """Busca via filtro wfts do PostgREST; sem ts_rank, ordena pelos mais recentes."""
+        req = (
+            self.client.table(self.table)
+            .select("id, source, title, org, obj, url, published, total_itens, found_at")
+            .filter("search_tsv", "wfts(portuguese)", query)
+        )
+        if since is not None:
+            req = req.gte("found_at", since.isoformat() if hasattr(since, "isoformat") else since)
+        if source:
+            req = req.eq("source", source)
+        return req.order("found_at", desc=True).limit(limit).execute().data
+
+    def get_notice(self, notice_id: str) -> dict | None:
+        resp = (
+            self.client.table(self.table)
+            .select("id, source, title, org, url, published, obj, itens, total_itens, details")
+            .eq("id", notice_id)
+            .limit(1)
+            .execute()
+        )
+        return resp.data[0] if resp.data else None
+
+    def save_details(self, notice_id: str, details: dict) -> None:
+        self.client.table(self.table).update(
+            {"details": details, "details_at": datetime.now(timezone.utc).isoformat()}, returning=ReturnMethod.minimal
+        ).eq("id", notice_id).execute()
+
+    def save_runs(self, runs: list[dict]) -> None:
+        """Insert unico do lote; a tabela scrape_runs e criada pelo painel (mesmo schema do Postgres)."""
+        if not runs:
+            return
+        rows = [
+            {**run, "started_at": run["started_at"].isoformat(), "finished_at": run["finished_at"].isoformat()}
+            for run in runs
+        ]
+        self.client.table(_SCRAPE_RUNS_TABLE).insert(rows, returning=ReturnMethod.minimal).execute()
+
+    def get_subscriptions(self) -> list[dict]:
+        return (
+            self.client.table(_SUBSCRIPTIONS_TABLE)
+            .select("chat_id, name, keywords, sources, min_score")
+            .eq("active", True)
+            .order("chat_id")
+            .execute()
+            .data
+        )
+
+    def upsert_subscription(self, subscription: dict) -> None:
+        self.client.table(_SUBSCRIPTIONS_TABLE).upsert(
+            {**subscription, "active": True},
+            on_conflict="chat_id,name",
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    def delete_subscription(self, chat_id: str, name: str) -> None:
+        (
+            self.client.table(_SUBSCRIPTIONS_TABLE)
+            .delete(returning=ReturnMethod.minimal)
+            .eq("chat_id", chat_id)
+            .eq("name", name)
+            .execute()
+        )
@@ -0,0 +1,209 @@
+"""
+Assinaturas: cada chat do Telegram recebe as licitacoes que batem com o seu
+perfil de palavras-chave, opcionalmente restrito a algumas fontes. Uma unica
+execucao dos scrapers atende qualquer numero de equipes.
+
+Gerenciamento:
+    python subscriptions.py list
+    python subscriptions.py add <chat_id> [--name NOME] [--keywords a,b] [--sources FIEMS,BNC]
+    python subscriptions.py remove <chat_id> [--name NOME]
+
+Sem nenhuma assinatura cadastrada, vale a configuracao antiga do .env
+(TELEGRAM_CHAT_ID + FILTER_KEYWORDS).
+"""
+import argparse
+import logging
+from collections import defaultdict
+
+from config import FILTER_KEYWORDS, FILTER_MIN_SCORE, TELEGRAM_CHAT_ID
+from db import init_db
+from matcher import KeywordMatcher, normalize, parse_term
+from storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+def _notice_text(item: dict) -> str:
+    itens_text = " ".join(i.get("descricao", "") for i in item.get("itens") or [])
+    return normalize(f"{item.get('title', '')} {item.get('obj') or ''} {itens_text}")
+
+
+class SubscriptionIndex:
+    """Indice invertido termo -> assinaturas, montado uma vez por ciclo.
+
+    Os termos de todos os perfis formam um unico KeywordMatcher, entao cada
+    licitacao e percorrida uma so vez. Assinaturas sem termos positivos recebem
+    tudo (menos o que casar com os seus termos negativos). Assinaturas com
+    min_score usam a relevancia (scoring.py) no lugar do casamento exato.
+    """
+
+    def __init__(self, subscriptions: list[dict]):
+        self.subscriptions = subscriptions
+        self._by_term: dict[str, set[int]] = defaultdict(set)
+        self._negative: dict[str, set[int]] = defaultdict(set)
+        self._catch_all: set[int] = set()
+        for idx, sub in enumerate(subscriptions):
+            positives = 0
+            for raw in sub.get("keywords") or []:
+                pattern, negative, _ = parse_term(raw)
+                if not pattern:
+                    continue
+                if negative:
+                    self._negative[raw.strip()].add(idx)
+                else:
+                    self._by_term[raw.strip()].add(idx)
+                    positives += 1
+            if not positives:
+                self._catch_all.add(idx)
+        self.matcher = KeywordMatcher([*self._by_term, *self._negative])
+        self._min_score = {
+            idx: float(sub["min_score"])
+            for idx, sub in enumerate(subscriptions)
+            if sub.get("min_score") is not None
+        }
+        self._scorer = None
+
+    def _allows_source(self, idx: int, source: str | None) -> bool:
+        sources = self.subscriptions[idx].get("sources")
+        return not sources or source is None or source in sources
+
+    def matched_terms(self, item: dict) -> set[str]:
+        """Termos (positivos e negativos) encontrados na licitacao."""
+        return self.matcher.find(_notice_text(item), normalized=True)
+
+    def score(self, items: list[dict]):
+        """Matriz de relevancia (licitacoes x assinaturas) do lote inteiro.
+
+        None se nenhuma assinatura usa min_score (numpy/scipy nem sao importados).
+        """
+        if not self._min_score:
+            return None
+        if self._scorer is None:
+            from scoring import RelevanceScorer, shared_corpus
+
+            self._scorer = RelevanceScorer(
+                [sub.get("keywords") or [] for sub in self.subscriptions], shared_corpus()
+            )
+        return self._scorer.score(items)
+
+    def resolve(
+        self,
+        item: dict,
+        source: str | None,
+        found: set[str] | None = None,
+        scores=None,
+    ) -> list[str]:
+        """Chats que devem receber a licitacao (sem repeticao, em ordem estavel).
+
+        scores e a linha da licitacao na matriz de score(); sem ela, assinaturas
+        com min_score nao recebem nada.
+        """
+        if found is None:
+            found = self.matched_terms(item)
+        matched = set(self._catch_all)
+        excluded = set()
+        for term in found:
+            matched |= self._by_term.get(term, set())
+            excluded |= self._negative.get(term, set())
+        for idx, min_score in self._min_score.items():
+            if scores is not None and scores[idx] >= min_score:
+                matched.add(idx)
+            else:
+                matched.discard(idx)
+        chats = []
+        for idx in sorted(matched - excluded):
+            chat_id = str(self.subscriptions[idx]["chat_id"])
+            if self._allows_source(idx, source) and chat_id not in chats:
+                chats.append(chat_id)
+        return chats
+
+    def resolve_many(self, items: list[dict], source: str | None) -> list[list[str]]:
+        """resolve() para um lote, com a matriz de relevancia calculada uma vez."""
+        scores = self.score(items)
+        return [
+            self.resolve(item, source, scores=scores[row] if scores is not None else None)
+            for row, item in enumerate(items)
+        ]
+
+    def fan_out(self, items: list[dict], source: str | None) -> dict[str, list[dict]]:
+        """Agrupa as licitacoes por chat destinatario: {chat_id: [itens]}."""
+        by_chat: dict[str, list[dict]] = defaultdict(list)
+        for item, chats in zip(items, self.resolve_many(items, source)):
+            for chat_id in chats:
+                by_chat[chat_id].append(item)
+        return dict(by_chat)
+
+
+def load_subscriptions() -> list[dict]:
+    """Assinaturas do banco; sem nenhuma, a assinatura implicita do .env."""
+    try:
+        subscriptions = get_storage().get_subscriptions()
+    except NotImplementedError:
+        subscriptions = []
+    if not subscriptions and TELEGRAM_CHAT_ID:
+        subscriptions = [{
+            "chat_id": TELEGRAM_CHAT_ID,
+            "name": "padrao",
+            "keywords": FILTER_KEYWORDS,
+            "sources": None,
+            "min_score": FILTER_MIN_SCORE,
+        }]
+    return subscriptions
+
+
+def load_index() -> SubscriptionIndex:
+    return SubscriptionIndex(load_subscriptions())
+
+
+def _split(raw: str | None) -> list[str]:
+    return [part.strip() for part in (raw or "").split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerencia assinaturas de alertas por chat")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    add = sub.add_parser("add")
+    add.add_argument("chat_id")
+    add.add_argument("--name", default="padrao")
+    add.add_argument(
+        "--keywords",
+        help='termos separados por virgula (vazio = todas); "palavra" inteira, -termo exclui',
+    )
+    add.add_argument("--sources", help="fontes separadas por virgula (vazio = todas)")
+    add.add_argument(
+        "--min-score",
+        type=float,
+        help="relevancia minima de 0 a 1 (sem ela, vale so o casamento de palavras-chave)",
+    )
+    remove = sub.add_parser("remove")
+    remove.add_argument("chat_id")
+    remove.add_argument("--name", default="padrao")
+    args = parser.parse_args()
+
+    init_db()
+    storage = get_storage()
+    if args.command == "add":
+        storage.upsert_subscription({
+            "chat_id": args.chat_id,
+            "name": args.name,
+            "keywords": _split(args.keywords),
+            "sources": _split(args.sources) or None,
+            "min_score": args.min_score,
+        })
+        print(f"Assinatura {args.chat_id}/{args.name} salva.")
+    elif args.command == "remove":
+        storage.delete_subscription(args.chat_id, args.name)
+        print(f"Assinatura {args.chat_id}/{args.name} removida.")
+    else:
+        for s in storage.get_subscriptions():
+            print(
+                f"{s['chat_id']:>15}  {s['name']:<15} "
+                f"fontes={','.join(s['sources'] or ['todas'])}  "
+                f"palavras={','.join(s['keywords']) or 'todas'}"
+                + (f"  relevancia>={s['min_score']}" if s.get("min_score") is not None else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
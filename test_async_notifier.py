@@ -0,0 +1,71 @@
+"""
+Teste isolado do notificador assincrono contra um Telegram falso (sem rede).
+Simula uma rajada de 100 licitacoes novas da FIEMS distribuidas entre chats.
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from async_notifier import AsyncTelegramNotifier, BackgroundNotifier
+from fake_telegram import FakeTelegramServer
+from notifier import format_message
+
+TOTAL = 100
+CHATS = ["1001", "1002", "1003", "1004", "1005"]
+CHAT_RATE = 1.0
+GLOBAL_RATE = 30.0
+
+
+def _itens_fiems():
+    return [
+        {
+            "title": f"PE {i:03d}/2026",
+            "org": "SESI/MS",
+            "obj": f"Aquisicao de materiais de manutencao predial - lote {i}",
+            "url": f"https://compras.fiems.com.br/Portal/Detalhe.aspx?id={9000 + i}",
+            "published": "19/10/2026",
+        }
+        for i in range(TOTAL)
+    ]
+
+
+def main():
+    print("\n=== TESTE NOTIFICADOR ASSINCRONO ===\n")
+    server = FakeTelegramServer(global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE).start()
+    print(f"[1/3] Telegram falso em {server.url}")
+
+    notifier = AsyncTelegramNotifier(
+        token="TESTE", api_url=server.url, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+    )
+    background = BackgroundNotifier(notifier)
+    background.start()
+
+    messages = [
+        (CHATS[i % len(CHATS)], format_message(item, "FIEMS"))
+        for i, item in enumerate(_itens_fiems())
+    ]
+
+    start = time.monotonic()
+    for chat_id, text in messages:
+        background.submit(chat_id, text)
+    enqueue_ms = (time.monotonic() - start) * 1000
+    print(f"[2/3] {TOTAL} mensagens enfileiradas em {enqueue_ms:.1f} ms (loop dos scrapers livre)")
+
+    background.stop(timeout=120)
+    elapsed = time.monotonic() - start
+    server.stop()
+
+    per_chat = TOTAL / len(CHATS)
+    minimum = max((per_chat - 1) / CHAT_RATE, (TOTAL - 1) / GLOBAL_RATE)
+    print(f"[3/3] Entregues: {len(server.messages)}/{TOTAL} em {elapsed:.1f}s "
+          f"(minimo teorico {minimum:.1f}s)")
+    print(f"      429 recebidos pelo cliente: {notifier.rate_limited} | rejeitados pelo servidor: {server.rejected}")
+
+    ok = len(server.messages) == TOTAL and server.rejected == 0
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
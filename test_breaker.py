@@ -0,0 +1,92 @@
+"""
+Teste do circuit breaker (breaker.py): maquina de estados pura, com o relogio
+adiantado manualmente. Nao acessa a rede nem abre navegador.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import breaker
+from breaker import CLOSED, HALF_OPEN, OPEN, BreakerBoard, CircuitBreaker, backoff
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+class _Scraper:
+    name = "FAKE"
+
+    def __init__(self):
+        self.up = True
+        self.probes = 0
+
+    def probe(self, timeout: float = 10) -> bool:
+        self.probes += 1
+        return self.up
+
+
+def main():
+    print("\n=== TESTE CIRCUIT BREAKER ===\n")
+    clock = _Clock()
+    breaker.time = clock  # breaker.py so usa time.time()
+    checks = {}
+
+    print("[1/4] Listagem vazia nao abre; falhas seguidas abrem...")
+    b = CircuitBreaker("FAKE", failures=3, base_delay=100, max_delay=1000)
+    for _ in range(10):
+        b.record(True)  # ano sem editais: execucao ok com 0 itens
+    b.record(False)
+    b.record(False)
+    checks["fechado apos 2 falhas"] = b.state == CLOSED
+    b.record(True)
+    b.record(False)
+    b.record(False)
+    checks["sucesso zera a contagem"] = b.state == CLOSED
+    b.record(False)
+    checks["aberto apos 3 falhas"] = b.state == OPEN
+    first_wait = b.open_until - clock.now
+    checks["backoff 1 em [50, 100]"] = 50 <= first_wait <= 100
+
+    print("[2/4] Aberto pula sem checagem; checagem falha reabre com o dobro...")
+    probes = []
+    checks["pula enquanto aberto"] = not b.allow(lambda: probes.append(1) or True) and not probes
+    clock.now = b.open_until + 1
+    checks["checagem falha mantem aberto"] = not b.allow(lambda: False) and b.state == OPEN
+    checks["backoff 2 em [100, 200]"] = 100 <= b.open_until - clock.now <= 200
+    clock.now = b.open_until + 1
+    checks["checagem com excecao reabre"] = not b.allow(lambda: 1 / 0) and b.opens == 3
+
+    print("[3/4] Meio-aberto: falha reabre, sucesso fecha...")
+    clock.now = b.open_until + 1
+    checks["checagem ok -> meio-aberto"] = b.allow(lambda: True) and b.state == HALF_OPEN
+    b.record(False)
+    checks["falha no meio-aberto reabre"] = b.state == OPEN and b.opens == 4
+    clock.now = b.open_until + 1
+    b.allow(lambda: True)
+    b.record(True)
+    checks["sucesso fecha e zera"] = b.state == CLOSED and b.opens == 0 and b.failures == 0
+
+    print("[4/4] Backoff limitado e BreakerBoard...")
+    checks["backoff respeita o maximo"] = all(500 <= backoff(n, 100, 1000) <= 1000 for n in range(5, 30))
+    board = BreakerBoard()
+    scraper = _Scraper()
+    for _ in range(breaker.BREAKER_FAILURES):
+        board.record(scraper, False)
+    scraper.up = False
+    clock.now += breaker.BREAKER_MAX_DELAY + 1
+    checks["board usa scraper.probe"] = not board.allow(scraper) and scraper.probes == 1
+    checks["board conta abertos"] = board.open_count() == 1
+
+    for name, ok in checks.items():
+        print(f"  {'ok' if ok else 'FALHOU'}: {name}")
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if all(checks.values()) else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
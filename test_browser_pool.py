@@ -0,0 +1,114 @@
+"""
+Teste da escolha de endpoint (browsers.py, least_loaded): servidores HTTP
+locais fazem o papel do /json/list de cada Chromium remoto e um Playwright
+falso registra as conexoes. Nao precisa do Chromium nem acessa a rede.
+"""
+import sys
+import os
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+from browsers import EndpointPool
+
+PORTS = (9351, 9352, 9353)
+PAGES = {port: 0 for port in PORTS}  # abas abertas em cada "Chromium", de qualquer processo
+
+
+class _JsonList(BaseHTTPRequestHandler):
+    def do_GET(self):
+        port = self.server.server_address[1]
+        targets = [{"type": "page"}] * PAGES[port] + [{"type": "service_worker"}]
+        body = json.dumps(targets).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Browser:
+    def __init__(self, url: str):
+        self.url = url
+        self._handlers = []
+
+    def on(self, event: str, handler) -> None:
+        self._handlers.append(handler)
+
+    def close(self) -> None:
+        for handler in self._handlers:
+            handler(self)
+
+
+class _Chromium:
+    def connect_over_cdp(self, url: str, timeout: float) -> _Browser:
+        return _Browser(url)
+
+    def connect(self, url: str, timeout: float) -> _Browser:
+        return _Browser(url)
+
+
+class _Playwright:
+    chromium = _Chromium()
+
+
+def _port(browser: _Browser) -> int:
+    return int(browser.url.rsplit(":", 1)[1])
+
+
+def main():
+    print("\n=== TESTE ESCOLHA DE ENDPOINT ===\n")
+    servers = [ThreadingHTTPServer(("127.0.0.1", port), _JsonList) for port in PORTS]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    p = _Playwright()
+    endpoints = [f"http://127.0.0.1:{port}" for port in PORTS]
+    checks = {}
+    try:
+        print("[1/4] Carga vinda de outros processos...")
+        PAGES.update({9351: 5, 9352: 1, 9353: 3})
+        pool = EndpointPool(endpoints, "least_loaded", local_fallback=False)
+        checks["vai para o endpoint com menos abas"] = _port(pool.launch(p)) == 9352
+
+        print("[2/4] Empate: rodizio em vez de sempre o primeiro...")
+        PAGES.update({port: 0 for port in PORTS})
+        pool = EndpointPool(endpoints, "least_loaded", local_fallback=False)
+        picks = []
+        for _ in range(6):  # scrapers em sequencia: cada um fecha antes do proximo
+            browser = pool.launch(p)
+            picks.append(_port(browser))
+            browser.close()
+        checks["empates se espalham"] = Counter(picks) == {port: 2 for port in PORTS}
+
+        print("[3/4] Carga sobe conforme os lancamentos...")
+        pool = EndpointPool(endpoints, "least_loaded", local_fallback=False)
+        for _ in range(9):
+            PAGES[_port(pool.launch(p))] += 1  # cada navegador abre uma aba no remoto
+        checks["carga equilibrada"] = sorted(PAGES.values()) == [3, 3, 3]
+
+        print("[4/4] Sem /json/list: conta os navegadores deste processo...")
+        dead = ["http://127.0.0.1:9", "ws://127.0.0.1:9/"]  # porta fechada e servidor Playwright
+        pool = EndpointPool(dead, "least_loaded", local_fallback=False)
+        held = [pool.launch(p) for _ in range(4)]
+        checks["fallback por in_use"] = [e.in_use for e in pool.endpoints] == [2, 2]
+        for browser in held:
+            browser.close()
+        checks["close libera"] = pool.in_use() == 0
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    for name, ok in checks.items():
+        print(f"  {'ok' if ok else 'FALHOU'}: {name}")
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if all(checks.values()) else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Teste da fita de trafego (cassette.py): grava um scraper de teste contra um
+servidor HTTP local (pagina + XHR + requests), derruba o servidor e reproduz.
+A reproducao precisa devolver os mesmos itens sem rede, e a senha configurada
+(ME_PASSWORD) nao pode aparecer na fita. Precisa do Chromium do
+Playwright; nao acessa os portais.
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+PORT = 8766
+BASE = f"http://127.0.0.1:{PORT}"
+SECRET = "senha-teste-123"  # ME_PASSWORD: nao pode ir para a fita
+
+_PAGE = b"""<html><body><table id="lista"></table><script>
+fetch("/api/itens").then(r => r.json()).then(itens => {
+  for (const i of itens) document.querySelector("#lista").insertAdjacentHTML(
+    "beforeend", `<tr><td class="titulo">${i}</td></tr>`);
+  document.body.insertAdjacentHTML("beforeend", "<p id='pronto'></p>");
+});
+</script></body></html>"""
+
+
+class _Portal(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_GET(self):
+        _Portal.calls += 1
+        if self.path == "/":
+            body, kind = _PAGE, "text/html"
+        elif self.path == "/api/itens":
+            body, kind = json.dumps([f"PE {i:03d}/2026" for i in range(5)]).encode(), "application/json"
+        else:
+            body, kind = f"objeto {self.path} chamada {_Portal.calls}".encode(), "text/plain"
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def scrape() -> dict:
+    """Roda no subprocesso, com CASSETTE_MODE ja no ambiente."""
+    from bs4 import BeautifulSoup
+
+    from scrapers.base import BaseScraper
+
+    class PortalLocal(BaseScraper):
+        name = "Portal Local"
+        url = BASE + "/"
+
+        def fetch(self) -> str:
+            return self._fetch_playwright(self.url, "#pronto")
+
+        def parse(self, html: str) -> list[dict]:
+            return [{"title": td.get_text()} for td in BeautifulSoup(html, "lxml").select("td.titulo")]
+
+    scraper = PortalLocal()
+    items = [i["title"] for i in scraper.run()]
+    details = [scraper._http().get(f"{BASE}/detalhe/{i}", timeout=5).text for i in range(2)]
+    details.append(scraper._http().get(f"{BASE}/detalhe/login?senha={SECRET}", timeout=5).text)
+    return {"items": items, "details": details}
+
+
+def _run(mode: str, directory: str) -> dict:
+    env = {**os.environ, "CASSETTE_MODE": mode, "CASSETTE_DIR": directory, "ME_PASSWORD": SECRET}
+    out = subprocess.run(
+        [sys.executable, __file__, "--scrape"], env=env, capture_output=True, text=True, timeout=120
+    )
+    if out.returncode != 0:
+        print(out.stderr)
+        return {}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("\n=== TESTE CASSETTE ===\n")
+    directory = tempfile.mkdtemp()
+
+    print("[1/3] Gravando contra o servidor local...")
+    server = HTTPServer(("127.0.0.1", PORT), _Portal)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    recorded = _run("record", directory)
+    server.shutdown()
+    server.server_close()
+    tape = os.path.join(directory, "Portal_Local")
+    files = sorted(os.listdir(tape)) if os.path.isdir(tape) else []
+    leaked = any(SECRET in open(os.path.join(tape, name), encoding="utf-8").read() for name in files)
+    print(f"  {recorded.get('items')} | arquivos: {files}")
+
+    print("[2/3] Reproduzindo com o servidor desligado...")
+    replayed = _run("replay", directory)
+    print(f"  {replayed.get('items')}")
+
+    print("[3/3] Comparando...")
+    ok = (
+        len(recorded.get("items", [])) == 5
+        and recorded == replayed
+        and files == ["browser-1.har", "http.har"]
+        and not leaked
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    if "--scrape" in sys.argv:
+        print(json.dumps(scrape()))
+    else:
+        main()
@@ -0,0 +1,104 @@
+"""
+Teste isolado do botao "Ver detalhes" (LAZY_DETAILS): salva uma licitacao sem
+enriquecimento, simula dois cliques no Telegram falso e confere que o portal
+foi consultado uma unica vez (o segundo clique vem do cache). Depois a
+licitacao muda no portal e o proximo clique busca de novo. Por fim, com o
+getUpdates recusado (ok: false), o loop espera em vez de repetir sem pausa.
+SQLite temporario, sem rede nem navegador.
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+_tmp = tempfile.mkdtemp()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "detalhes_teste.db")
+
+from bot import DetailsBot
+from db import generate_id, init_db, save_many, update_changed
+from fake_telegram import FakeTelegramServer
+from notifier import details_markup
+
+CHAT = 1001
+ITEM = {"title": "PE 042/2026", "org": "SESI/MS", "url": "https://exemplo.com/edital/42", "obj": "Resumo"}
+
+
+class PortalFalso:
+    """Scraper de mentira: conta as buscas de detalhes em vez de abrir o navegador."""
+
+    name = "TESTE"
+    lazy_details = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch_details(self, item):
+        self.calls += 1
+        return {
+            "obj": "Objeto completo da licitacao (pagina de detalhes)",
+            "itens": [{"descricao": f"Item {i}", "quantidade": "1", "unidade": "UN"} for i in range(12)],
+            "total_itens": 12,
+        }
+
+
+def main():
+    print("\n=== TESTE DETALHES SOB DEMANDA ===\n")
+    server = FakeTelegramServer().start()
+    init_db()
+    save_many([ITEM], "TESTE")
+    uid = generate_id(ITEM)
+    callback = details_markup(uid)["inline_keyboard"][0][0]["callback_data"]
+
+    portal = PortalFalso()
+    bot = DetailsBot(scrapers=[portal], token="TESTE", api_url=server.url, poll_timeout=0)
+
+    print("[1/4] Dois cliques no botao do alerta 7...")
+    server.push_callback(CHAT, 7, callback)
+    bot.poll_once()
+    server.push_callback(CHAT, 7, callback)
+    bot.poll_once()
+    cached_calls = portal.calls
+
+    print("[2/4] Licitacao alterada no portal; terceiro clique...")
+    changed = update_changed([{**ITEM, "obj": "Resumo retificado"}], "TESTE")
+    time.sleep(1.1)  # Telegram falso: 1 mensagem/s por chat
+    server.push_callback(CHAT, 7, callback)
+    bot.poll_once()
+
+    print("[3/4] getUpdates recusado por 1 s...")
+    server.fail_next = 1000
+    stop = threading.Event()
+    loop = threading.Thread(target=bot.run, args=(stop,))
+    loop.start()
+    time.sleep(1)
+    stop.set()
+    loop.join(timeout=5)
+    refused = 1000 - server.fail_next
+    server.stop()
+    print(f"      tentativas: {refused}")
+
+    replies = [m for m in server.messages if m["reply_to_message_id"] == 7]
+    print(f"[4/4] Respostas: {len(replies)} | buscas no portal: {portal.calls} | "
+          f"cliques respondidos: {len(server.callback_answers)}")
+    if replies:
+        print(f"      {replies[0]['text'][:90]!r}...")
+
+    ok = (
+        len(replies) == 3
+        and cached_calls == 1
+        and len(changed) == 1
+        and portal.calls == 2  # cache descartado pela alteracao
+        and len(server.callback_answers) == 3
+        and "Item 11" in replies[1]["text"]
+        and refused == 1  # espera _RETRY_DELAY antes de tentar de novo
+        and not loop.is_alive()
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
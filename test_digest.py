@@ -0,0 +1,84 @@
+"""
+Teste do modo resumo (notifier.format_digest): uma rajada de 60 licitacoes no
+formato da FIEMS vira poucas mensagens de ate 4096 caracteres, sem blocos
+partidos, e um bloco com campos enormes continua cabendo. Nao acessa a rede.
+"""
+import sys
+import os
+import re
+sys.path.insert(0, os.path.dirname(__file__))
+
+from notifier import MAX_MESSAGE_LEN, format_digest, format_digest_entry
+
+# Objetos de tamanhos variados, como na listagem real
+_OBJS = [
+    "Aquisicao de materiais de limpeza para a unidade do SESI Campo Grande",
+    "Contratacao de empresa para manutencao preventiva e corretiva de ar "
+    "condicionado das unidades do SENAI em Dourados",
+    "Registro de precos para eventual aquisicao de materiais de consumo (limpeza, "
+    "copa e cozinha) destinados as unidades do SESI/SENAI em Campo Grande, Dourados "
+    "e Tres Lagoas, conforme especificacoes do Termo de Referencia - Anexo I.",
+    "Servicos de buffet para evento institucional",
+]
+
+
+def _fiems(i: int) -> dict:
+    return {
+        "title": f"PREGAO ELETRONICO N. {i:03d}/2026 - SESI/MS",
+        "org": "SESI - Servico Social da Industria [MS]",
+        "obj": _OBJS[i % len(_OBJS)],
+        "url": f"https://compras.fiems.com.br/Portal/Detalhe.aspx?id={48000 + i}",
+        "published": "15/10/2026",
+        "total_itens": 12,
+    }
+
+
+def _unescaped(text: str, char: str) -> int:
+    """Ocorrencias de `char` sem a barra de escape antes (marcacao ativa)."""
+    return len(re.findall(r"(?<!\\)(?:\\\\)*" + re.escape(char), text))
+
+
+def main():
+    print("\n=== TESTE RESUMO ===\n")
+    checks = {}
+
+    print("[1/3] Rajada de 60 licitacoes da FIEMS...")
+    items = [_fiems(i) for i in range(60)]
+    entries = [format_digest_entry(item) for item in items]
+    texts = format_digest("Novas licitacoes: FIEMS", entries)
+    print(f"  {len(texts)} mensagens: {[len(t) for t in texts]}")
+    checks["60 licitacoes em 5 mensagens"] = len(texts) == 5
+    checks["todas dentro do limite"] = all(len(t) <= MAX_MESSAGE_LEN for t in texts)
+    checks["cada bloco inteiro em uma mensagem"] = all(
+        sum(entry in text for text in texts) == 1 for entry in entries
+    )
+    checks["cabecalho numera as partes"] = all(f"\\(parte {i}/5\\)" in t for i, t in enumerate(texts, 1))
+
+    print("[2/3] Bloco com todos os campos enormes e cheios de caracteres especiais...")
+    huge = {
+        "title": "PE-001/2026 (lote 1.2) [urgente] " * 40,
+        "org": "S.E.S.I. - Servico_Social*da*Industria " * 40,
+        "obj": "Aquisicao de itens (1.1-9.9) conforme T.R. #1 " * 40,
+        "url": "https://exemplo.com/edital?id=1&a=b_c-d.e" + "x" * 3000,
+        "published": "15/10/2026 " * 40,
+        "total_itens": 999,
+    }
+    entry = format_digest_entry(huge)
+    print(f"  bloco com {len(entry)} caracteres")
+    checks["bloco grande limitado"] = len(entry) <= 1400
+    checks["sem escape partido"] = all(_unescaped(line, c) == 0 for line in entry.split("\n")[1:] for c in ".-()[]_*#")
+    checks["titulo segue em negrito"] = _unescaped(entry.split("\n")[0], "*") == 2
+
+    print("[3/3] 20 blocos enormes...")
+    texts = format_digest("Novas licitacoes: FIEMS", [entry] * 20)
+    print(f"  {len(texts)} mensagens: {[len(t) for t in texts]}")
+    checks["mensagens de blocos enormes no limite"] = all(len(t) <= MAX_MESSAGE_LEN for t in texts)
+
+    for name, ok in checks.items():
+        print(f"  {'ok' if ok else 'FALHOU'}: {name}")
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if all(checks.values()) else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Teste isolado da edicao no lugar (EDIT_IN_PLACE): envia alertas pela outbox,
+altera uma licitacao e confere que a mensagem original foi editada em vez de
+receber um alerta novo. SQLite temporario + Telegram falso, sem rede.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+_tmp = tempfile.mkdtemp()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "edicao_teste.db")
+
+from async_notifier import AsyncTelegramNotifier
+from db import enqueue, generate_id, get_message_ids, init_db, outbox_message, save_many, update_changed
+from dispatcher import OutboxDispatcher
+from fake_telegram import FakeTelegramServer
+from notifier import format_edited_message, format_message
+
+CHAT = "1001"
+ITENS = [
+    {"title": f"PE {i:03d}/2026", "org": "SESI/MS", "url": f"https://exemplo.com/edital/{i}",
+     "published": "01/10/2026"}
+    for i in range(3)
+]
+
+
+async def _drain(dispatcher):
+    # Um event loop por fase: o cliente httpx e fechado ao final de cada uma
+    await dispatcher.drain_once()
+    await dispatcher.notifier.aclose()
+
+
+def main():
+    print("\n=== TESTE EDICAO NO LUGAR ===\n")
+    server = FakeTelegramServer(chat_rate=100, global_rate=100).start()
+    notifier = AsyncTelegramNotifier(token="TESTE", api_url=server.url, chat_rate=100, global_rate=100)
+    dispatcher = OutboxDispatcher(notifier=notifier)
+
+    print("[1/3] Enviando 3 alertas pela outbox...")
+    init_db()
+    save_many(ITENS, "TESTE", outbox=[
+        outbox_message("new", generate_id(item), CHAT, format_message(item, "TESTE")) for item in ITENS
+    ])
+    asyncio.run(_drain(dispatcher))
+    originals = get_message_ids(ITENS)
+    print(f"      mensagens registradas: {len(originals)}")
+
+    print("[2/3] Republicando PE 001 com nova data e editando...")
+    changed_item = {**ITENS[1], "published": "15/10/2026"}
+    alerts = []
+    for item, changes, version in update_changed([changed_item], "TESTE"):
+        uid = generate_id(item)
+        alerts.append(outbox_message(
+            "edit", uid, CHAT, format_edited_message(item, "TESTE", changes),
+            version=version, message_id=originals[(uid, CHAT)],
+        ))
+    # Mensagem que nao existe mais no Telegram: cai para um envio novo
+    alerts.append(outbox_message(
+        "edit", "inexistente", CHAT, format_message(ITENS[2], "TESTE"), version=1, message_id="999",
+    ))
+    enqueue(alerts)
+    asyncio.run(_drain(dispatcher))
+    server.stop()
+
+    edited = server.messages[int(originals[(generate_id(ITENS[1]), CHAT)]) - 1]
+    print(f"[3/3] Telegram: {len(server.messages)} mensagens, {server.edits} edicoes")
+    print(f"      texto editado: {edited['text'][:80]!r}...")
+
+    ok = (
+        len(originals) == 3
+        and server.edits == 1
+        and len(server.messages) == 4
+        and "15/10/2026" in edited["text"]
+        and dispatcher.dead == 0
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Teste do limite adaptativo por host (hostlimit.py): um servidor local aceita
+no maximo 4 requisicoes simultaneas e responde 503 acima disso; 8 threads
+batem nele pelo HostLimiter. O limite precisa convergir perto de 4, sem
+travar em 1, e a latencia de base nao pode ficar presa numa resposta rapida
+isolada. Nao acessa a rede.
+"""
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ["HOST_MIN_INTERVAL"] = "0"
+
+import requests
+
+from hostlimit import HostLimit, HostLimiter
+
+PORT = 8767
+CAPACITY = 4
+
+
+class _Capped(BaseHTTPRequestHandler):
+    active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with _Capped.lock:
+            _Capped.active += 1
+            over = _Capped.active > CAPACITY
+        try:
+            time.sleep(0.05)
+            self.send_response(503 if over else 200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        finally:
+            with _Capped.lock:
+                _Capped.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _release_after(limit: HostLimit, latency: float) -> None:
+    limit.acquire()
+    limit.release(time.monotonic() - latency, congested=False)
+
+
+def check_baseline() -> bool:
+    """Uma resposta de 0.05 s seguida de 500 normais de 0.30 s."""
+    limit = HostLimit("exemplo", limit=7.5)
+    _release_after(limit, 0.30)
+    _release_after(limit, 0.05)
+    for _ in range(500):
+        _release_after(limit, 0.30)
+    print(f"  base {limit.baseline:.3f}s, limite {limit.limit:.2f}")
+    return abs(limit.baseline - 0.30) < 0.01 and limit.limit >= 7.5
+
+
+def check_aimd(path: str) -> tuple[bool, Counter, list[float]]:
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), _Capped)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    limiter = HostLimiter(path)
+    url = f"http://127.0.0.1:{PORT}/"
+    statuses = Counter()
+    limits = []
+
+    def fetch(_):
+        with limiter.slot(url) as s:
+            resp = requests.get(url, timeout=5)
+            s.record(resp.status_code)
+        statuses[resp.status_code] += 1
+        limits.append(limiter.get(url).limit)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(fetch, range(400)))
+    server.shutdown()
+    server.server_close()
+    limiter.save()
+
+    tail = limits[-200:]
+    ok = 1.0 < min(tail) and max(tail) <= 2 * CAPACITY and statuses[503] < statuses[200] / 5
+    return ok, statuses, tail
+
+
+def main():
+    print("\n=== TESTE HOSTLIMIT ===\n")
+
+    print("[1/3] Base de latencia apos uma resposta rapida isolada...")
+    baseline_ok = check_baseline()
+
+    print(f"[2/3] 400 requisicoes, 8 threads, servidor com capacidade {CAPACITY}...")
+    path = os.path.join(tempfile.mkdtemp(), "host_limits.json")
+    aimd_ok, statuses, tail = check_aimd(path)
+    print(f"  status {dict(statuses)} | limite final {min(tail):.1f}-{max(tail):.1f}")
+
+    print("[3/3] Limite gravado e relido...")
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)[f"127.0.0.1:{PORT}"]
+    reloaded = HostLimiter(path).get(f"http://127.0.0.1:{PORT}/x")
+    persist_ok = reloaded.limit == saved["limit"] and reloaded.baseline == saved["baseline"]
+    print(f"  {saved}")
+
+    ok = baseline_ok and aimd_ok and persist_ok
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Teste do ciclo de vida (TRACK_LIFECYCLE + NOTIFY_VANISHED): uma fonte falsa com
+10 licitacoes tem a paginacao interrompida (listagem parcial) e depois perde
+2 licitacoes de verdade. So o segundo caso pode gerar "Saiu do portal". SQLite
+temporario; os alertas sao capturados em vez de enviados.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+_tmp = tempfile.mkdtemp()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "ciclo_teste.db")
+os.environ["TRACK_LIFECYCLE"] = "true"
+os.environ["NOTIFY_VANISHED"] = "true"
+os.environ["OUTBOX_ENABLED"] = "false"
+os.environ["DIGEST_THRESHOLD"] = "0"
+
+import main
+from db import init_db
+from scrapers.base import BaseScraper
+from storage import get_storage
+from subscriptions import SubscriptionIndex
+
+NOTICES = [
+    {"title": f"PE {i:03d}/2026", "org": "SESI", "url": f"https://exemplo.com/edital/{i}"}
+    for i in range(10)
+]
+
+
+class PortalPaginado(BaseScraper):
+    """Duas paginas de 5; `broken` simula a falha ao ir para a pagina 2."""
+
+    name = "TESTE"
+    url = "https://exemplo.com/"
+
+    def __init__(self):
+        self.listing = list(NOTICES)
+        self.broken = False
+
+    def fetch(self) -> str:
+        return ""
+
+    def parse(self, html: str) -> list[dict]:
+        return []
+
+    def run(self) -> list[dict]:
+        if self.broken:
+            self._partial("parou na pagina 1")
+            return self.listing[:5]
+        return list(self.listing)
+
+
+def _vanished_count() -> int:
+    return get_storage()._conn().execute(
+        "SELECT count(*) FROM notices WHERE vanished_at IS NOT NULL"
+    ).fetchone()[0]
+
+
+def main_test():
+    print("\n=== TESTE CICLO DE VIDA ===\n")
+    init_db()
+    sent = []
+    main.notifier.send_text = lambda text, chat_id=None, reply_markup=None: sent.append(text)
+    index = SubscriptionIndex([{"chat_id": 1, "keywords": []}])
+    portal = PortalPaginado()
+
+    print("[1/3] Primeira execucao: 10 novas...")
+    main.run_source(portal, index)
+    new_alerts = len(sent)
+
+    print("[2/3] Paginacao falha na pagina 2 (5 de 10 lidas)...")
+    sent.clear()
+    portal.broken = True
+    main.run_source(portal, index)
+    partial_alerts, partial_vanished = len(sent), _vanished_count()
+    print(f"      alertas: {partial_alerts} | encerradas: {partial_vanished}")
+
+    print("[3/3] Listagem completa sem 2 licitacoes...")
+    sent.clear()
+    portal.broken = False
+    portal.listing = NOTICES[:8]
+    main.run_source(portal, index)
+    gone = [t for t in sent if "PE 008" in t or "PE 009" in t]
+    print(f"      alertas: {len(sent)} | encerradas: {_vanished_count()} | complete: {portal.complete}")
+
+    ok = (
+        new_alerts == 10
+        and partial_alerts == 0
+        and partial_vanished == 0
+        and len(sent) == 2 and len(gone) == 2
+        and _vanished_count() == 2
+        and portal.complete
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main_test()
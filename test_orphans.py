@@ -0,0 +1,77 @@
+"""
+Teste da deteccao de Chromium orfao (procstats.orphan_browsers): processos
+falsos (uma copia do python chamada "chrome", com a linha de comando do
+Playwright) simulam um navegador cujo driver morreu, um com driver vivo, um
+renderer e um aberto com --remote-debugging-port. So o primeiro e orfao.
+Linux/macOS; nao abre navegador de verdade.
+"""
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import psutil
+
+import procstats
+
+_SLEEP = "import time; time.sleep(60)"
+
+
+def _spawner(chrome: str, *flags: str, driver: bool) -> subprocess.Popen:
+    """Processo pai que abre o "chrome" e, se nao for driver, morre em seguida."""
+    code = (
+        "import subprocess, sys, time; "
+        f"p = subprocess.Popen([{chrome!r}, '-c', {_SLEEP!r}, *sys.argv[1:]]); "
+        "print(p.pid, flush=True); "
+        + ("time.sleep(60)" if driver else "")
+    )
+    # run-driver na linha de comando faz o pai se passar pelo node do Playwright
+    args = [sys.executable, "-c", code, *flags] + (["run-driver"] if driver else [])
+    return subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
+
+
+def main():
+    print("\n=== TESTE CHROMIUM ORFAO ===\n")
+    chrome = os.path.join(tempfile.mkdtemp(), "chrome")
+    shutil.copy(sys.executable, chrome)
+    profile = "--user-data-dir=/tmp/playwright_chromiumdev_profile-teste"
+    pipe = "--remote-debugging-pipe"
+
+    print("[1/3] Subindo navegadores falsos...")
+    spawners = {
+        "driver morto": _spawner(chrome, pipe, profile, driver=False),
+        "driver vivo": _spawner(chrome, pipe, profile, driver=True),
+        "renderer": _spawner(chrome, "--type=renderer", pipe, profile, driver=False),
+        "porta de depuracao": _spawner(chrome, "--remote-debugging-port=9555", profile, driver=False),
+    }
+    pids = {name: int(s.stdout.readline()) for name, s in spawners.items()}
+    for name, s in spawners.items():
+        if name != "driver vivo":
+            s.wait()  # pai morre: o "chrome" fica com o init/subreaper (ou este processo)
+    time.sleep(0.3)
+
+    print("[2/3] Procurando orfaos...")
+    found = {proc.pid for proc in procstats.orphan_browsers()}
+    print(f"      orfaos: {sorted(name for name, pid in pids.items() if pid in found)}")
+    ok = found == {pids["driver morto"]}
+
+    print("[3/3] Encerrando...")
+    killed = procstats.kill_tree([psutil.Process(pid) for pid in found])
+    ok = ok and killed == 1
+    rest = []
+    for pid in [*pids.values(), spawners["driver vivo"].pid]:
+        try:
+            rest.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
+            pass
+    procstats.kill_tree(rest)
+
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
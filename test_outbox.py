@@ -0,0 +1,67 @@
+"""
+Teste isolado da outbox: grava licitacoes + alertas numa transacao (SQLite
+temporario) e drena com o dispatcher contra um Telegram falso que falha.
+Nao acessa rede nem o banco de producao.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+_tmp = tempfile.mkdtemp()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "outbox_teste.db")
+os.environ["OUTBOX_BASE_DELAY"] = "1"  # retries rapidos no teste
+
+from async_notifier import AsyncTelegramNotifier
+from db import generate_id, init_db, outbox_message, save_many
+from dispatcher import OutboxDispatcher
+from fake_telegram import FakeTelegramServer
+from notifier import format_message
+from storage import get_storage
+
+ITENS = [
+    {"title": f"PE {i:03d}/2026", "org": "SESI/MS", "url": f"https://exemplo.com/edital/{i}"}
+    for i in range(10)
+]
+
+
+async def _drain_until_empty(dispatcher, rounds=10):
+    for _ in range(rounds):
+        await dispatcher.drain_once()
+        await asyncio.sleep(1.2)
+
+
+def main():
+    print("\n=== TESTE OUTBOX ===\n")
+    server = FakeTelegramServer(chat_rate=100, global_rate=100).start()
+    server.fail_next = 3  # tres falhas transitorias (502)
+
+    print("[1/3] Gravando 10 licitacoes + alertas (mais 1 alerta invalido)...")
+    init_db()
+    alerts = [
+        outbox_message("new", generate_id(item), "1001", format_message(item, "TESTE"))
+        for item in ITENS
+    ]
+    alerts.append(outbox_message("new", generate_id(ITENS[0]), "1001", "", version="vazio"))
+    save_many(ITENS, "TESTE", outbox=alerts)
+    save_many(ITENS, "TESTE", outbox=alerts)  # reenfileirar e idempotente
+
+    print("[2/3] Drenando com falhas transitorias...")
+    notifier = AsyncTelegramNotifier(token="TESTE", api_url=server.url, chat_rate=100, global_rate=100)
+    dispatcher = OutboxDispatcher(notifier=notifier)
+    asyncio.run(_drain_until_empty(dispatcher))
+    server.stop()
+
+    conn = get_storage()._conn()
+    status = dict(conn.execute("SELECT status, count(*) FROM outbox GROUP BY status").fetchall())
+    print(f"[3/3] Telegram recebeu {len(server.messages)} mensagens | outbox: {status}")
+
+    ok = len(server.messages) == 10 and status.get("sent") == 10 and status.get("dead") == 1
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
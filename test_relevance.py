@@ -0,0 +1,83 @@
+"""
+Teste da relevancia (scoring.py): a nota de uma licitacao para um perfil nao
+pode depender das outras do lote (sozinha, numa rajada ou no lote de
+encerradas). O corpus do IDF vem de um SQLite temporario. Nao acessa a rede.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+_tmp = tempfile.mkdtemp()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "relevancia_teste.db")
+
+import numpy as np
+
+import scoring
+from db import init_db, save_many
+from scoring import DocumentFrequency, RelevanceScorer
+from subscriptions import SubscriptionIndex
+
+PROFILES = [["pavimentacao asfaltica", "recapeamento"], ["material de limpeza"]]
+TARGET = {
+    "title": "PE 010/2026 - Pavimentacao asfaltica de vias urbanas",
+    "obj": "Contratacao de empresa para pavimentacao e recapeamento asfaltico",
+    "url": "https://exemplo.com/edital/10",
+}
+
+
+def _corpus_item(i: int) -> dict:
+    objs = [
+        "Aquisicao de material de limpeza e higiene",
+        "Contratacao de empresa para manutencao predial",
+        "Servicos de pavimentacao em bloquetes",
+        "Aquisicao de equipamentos de informatica",
+    ]
+    return {"title": f"PE {i:03d}/2025", "obj": objs[i % len(objs)], "url": f"https://exemplo.com/c/{i}"}
+
+
+def main():
+    print("\n=== TESTE RELEVANCIA ===\n")
+    checks = {}
+    init_db()
+    save_many([_corpus_item(i) for i in range(200)], "TESTE")
+
+    print("[1/3] Corpus do IDF lido do banco...")
+    corpus = scoring.shared_corpus()
+    print(f"  {corpus.n_docs} licitacoes no corpus")
+    checks["corpus do banco"] = corpus.n_docs == 200
+    checks["corpus reaproveitado"] = scoring.shared_corpus() is corpus
+    checks["termo comum pesa menos"] = corpus.idf("aquisic") < corpus.idf("recapea")
+
+    print("[2/3] Mesma licitacao em lotes diferentes...")
+    scorer = RelevanceScorer(PROFILES, corpus)
+    alone = scorer.score([TARGET])[0]
+    burst = [{**TARGET, "title": f"PE {i:03d}/2026 - Pavimentacao asfaltica", "url": str(i)} for i in range(40)]
+    in_burst = scorer.score(burst + [TARGET] + [_corpus_item(i) for i in range(30)])[40]
+    vanished = {"id": "x", "title": TARGET["title"], "obj": TARGET["obj"], "org": None, "url": TARGET["url"]}
+    as_vanished = scorer.score([vanished, _corpus_item(1)])[0]
+    print(f"  sozinha {alone.round(4)} | na rajada {in_burst.round(4)} | encerrada {as_vanished.round(4)}")
+    checks["nota independe do lote"] = np.allclose(alone, in_burst) and np.allclose(alone, as_vanished)
+    checks["perfil certo pontua mais"] = alone[0] > 0.3 > alone[1]
+
+    # Backend sem corpus (Supabase): IDF uniforme, tambem sem depender do lote
+    uniform = RelevanceScorer(PROFILES).score([TARGET])[0]
+    checks["sem corpus, IDF uniforme e estavel"] = np.allclose(
+        uniform, RelevanceScorer(PROFILES, DocumentFrequency()).score(burst + [TARGET])[40]
+    )
+
+    print("[3/3] min_score igual para novas e encerradas...")
+    index = SubscriptionIndex([{"chat_id": 1, "keywords": PROFILES[0], "min_score": float(alone[0]) - 0.01}])
+    new_chats = index.resolve_many(burst + [TARGET], "TESTE")[-1]
+    vanished_chats = index.resolve_many([vanished], "TESTE")[0]
+    checks["mesmo destino"] = new_chats == vanished_chats == ["1"]
+
+    for name, ok in checks.items():
+        print(f"  {'ok' if ok else 'FALHOU'}: {name}")
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if all(checks.values()) else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
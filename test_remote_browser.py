@@ -0,0 +1,80 @@
+"""
+Teste dos navegadores remotos (browsers.py): sobe dois Chromium locais com
+--remote-debugging-port, faz o pool conectar por CDP em rodizio e abre uma
+pagina data: em cada um. Precisa do Chromium do Playwright instalado
+(playwright install chromium); nao acessa a rede.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import requests
+from playwright.sync_api import sync_playwright
+
+from browsers import EndpointPool
+
+PORTS = (9333, 9334)
+
+
+def _start_chromium(executable: str, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            executable,
+            "--headless=new",
+            f"--remote-debugging-port={port}",
+            f"--user-data-dir={tempfile.mkdtemp()}",
+            "about:blank",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(50):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/json/version", timeout=1)
+            return proc
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Chromium nao abriu a porta {port}")
+
+
+def main():
+    print("\n=== TESTE NAVEGADOR REMOTO ===\n")
+    with sync_playwright() as p:
+        print("[1/3] Subindo dois Chromium com porta de depuracao...")
+        procs = [_start_chromium(p.chromium.executable_path, port) for port in PORTS]
+        try:
+            endpoints = [f"http://127.0.0.1:{port}" for port in PORTS] + ["http://127.0.0.1:9"]
+            pool = EndpointPool(endpoints, "round_robin", cooldown=300, local_fallback=False)
+
+            print("[2/3] Conectando 4 vezes (um endpoint morto no rodizio)...")
+            titles = []
+            for i in range(4):
+                browser = pool.launch(p)
+                page = browser.new_context().new_page()
+                page.goto(f"data:text/html,<title>remoto {i}</title>")
+                titles.append(page.title())
+                in_use = pool.in_use()
+                browser.close()
+            print(f"[3/3] Titulos: {titles} | em uso antes do close: {in_use}, depois: {pool.in_use()}")
+            alive = all(proc.poll() is None for proc in procs)  # close so desconecta
+        finally:
+            for proc in procs:
+                proc.terminate()
+
+    dead = pool.endpoints[2]
+    ok = (
+        titles == [f"remoto {i}" for i in range(4)]
+        and in_use == 1
+        and pool.in_use() == 0
+        and alive
+        and dead.failed_until > time.time()
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Teste da fila de jobs (worker.py): dois workers em threads dividem tres fontes
+falsas pela tabela scrape_jobs. Precisa de um Postgres descartavel nas
+variaveis PG_* (a tabela scrape_jobs e esvaziada). Nao acessa os portais.
+
+    PG_HOST=localhost PG_DB=teste python test_worker_queue.py
+"""
+import sys
+import os
+import threading
+import time
+from collections import Counter
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ["STORAGE_BACKEND"] = "postgres"
+os.environ["BREAKER_FAILURES"] = "2"
+
+import profiling
+import worker
+from db import init_db
+from storage import get_storage
+from storage.postgres import _connect
+
+
+class FakeScraper:
+    def __init__(self, name: str):
+        self.name = name
+
+
+def main():
+    print("\n=== TESTE FILA DE JOBS ===\n")
+    init_db()
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM scrape_jobs")
+    storage = get_storage()
+
+    print("[1/3] Reserva, heartbeat e job abandonado...")
+    storage.ensure_jobs(["A", "B"])
+    first = storage.claim_job("w1", ["A", "B"], 60)
+    second = storage.claim_job("w2", ["A", "B"], 60)
+    none_left = storage.claim_job("w3", ["A", "B"], 60) is None
+    beat = storage.heartbeat_job(first["source"], "w1") and not storage.heartbeat_job(first["source"], "w2")
+    time.sleep(1.2)
+    taken = storage.claim_job("w3", ["A", "B"], 1)
+    stale = taken is not None and taken["previous_worker"] in ("w1", "w2")
+    ok_claims = first["source"] != second["source"] and none_left and beat and stale
+    print(f"  {first['source']}/{second['source']} reservados, assumido de {taken and taken['previous_worker']}")
+
+    # Worker que perdeu a reserva no meio da execucao nao conclui o job do novo dono
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM scrape_jobs")
+    storage.ensure_jobs(["L"])
+
+    def slow_process(scraper, subscriptions):
+        time.sleep(1.2)
+        storage.claim_job("novo", ["L"], 1)  # heartbeat de "lento" parou ha mais de 1 s
+
+    worker.load_index = lambda: None
+    slow = worker.JobWorker([FakeScraper("L")], slow_process, worker_id="lento", interval=0.3)
+    slow.run_once()
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("SELECT locked_by, runs FROM scrape_jobs WHERE source = 'L'")
+        lost_ok = cur.fetchone() == ("novo", 0) and slow.completed == 0
+    print(f"  reserva perdida respeitada: {lost_ok}")
+
+    # Poll sem job vencido nao consome o pedido de perfil (kill -USR1 / arquivo de flag)
+    profiling.request(1)
+    idle = worker.JobWorker([FakeScraper("L")], slow_process, worker_id="ocioso", poll_interval=0.1)
+    stop = threading.Event()
+    threading.Timer(0.5, stop.set).start()
+    idle.run(stop=stop)  # L segue reservado por "novo": so polls vazios
+    profile_kept = idle.completed == 0 and profiling._requested == 1
+    profiling._requested = 0
+    print(f"  pedido de perfil mantido em poll vazio: {profile_kept}")
+
+    print("[2/3] Dois workers, tres fontes (C sempre falha)...")
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM scrape_jobs")
+    running = Counter()
+    runs = Counter()
+    overlap = []
+    lock = threading.Lock()
+
+    def process(scraper, subscriptions):
+        with lock:
+            running[scraper.name] += 1
+            if running[scraper.name] > 1:
+                overlap.append(scraper.name)
+        time.sleep(0.2)
+        with lock:
+            running[scraper.name] -= 1
+            runs[scraper.name] += 1
+        if scraper.name == "C":
+            raise RuntimeError("portal fora do ar")
+        return 1
+
+    worker.load_index = lambda: None
+    scrapers = [FakeScraper(n) for n in "ABC"]
+    stop = threading.Event()
+    workers = [
+        worker.JobWorker(scrapers, process, worker_id=f"w{i}", interval=0.3, poll_interval=0.1)
+        for i in range(2)
+    ]
+    threads = [threading.Thread(target=w.run, kwargs={"stop": stop}) for w in workers]
+    for t in threads:
+        t.start()
+    time.sleep(3)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("SELECT source, failures, next_run_at > now() + interval '5 minutes' FROM scrape_jobs")
+        jobs = {source: (failures, backed_off) for source, failures, backed_off in cur.fetchall()}
+    print(f"[3/3] Execucoes: {dict(runs)} | jobs: {jobs}")
+
+    ok = (
+        ok_claims
+        and lost_ok
+        and profile_kept
+        and not overlap
+        and runs["A"] >= 2 and runs["B"] >= 2
+        and jobs["C"] == (2, True)  # backoff longo apos BREAKER_FAILURES falhas
+        and all(w.completed for w in workers)
+    )
+    print("\n=== RESULTADO ===")
+    print(f"  {'OK' if ok else 'FALHOU'}")
+
+
+if __name__ == "__main__":
+    main()
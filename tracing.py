@@ -0,0 +1,196 @@
+"""
+Medicao por etapa: spans com duracao, contagem de itens e bytes.
+
+    with span("db.save_many", source="FIEMS", items=len(rows)) as s:
+        ...
+        s.set(bytes=len(payload))
+
+Com TRACE_ENABLED=true cada span fechado vira uma linha JSON num arquivo
+rotativo (TRACE_FILE); spans abertos dentro de outro herdam o trace_id e o
+source, entao um ciclo inteiro pode ser remontado a partir do arquivo. Com
+TRACE_OTEL=true os spans tambem vao para o SDK do OpenTelemetry (exportador
+OTLP configurado pelas variaveis OTEL_* padrao). Desligado, span() devolve um
+objeto vazio compartilhado: o custo e uma chamada de funcao.
+
+Resumo por fonte e etapa de um arquivo de trace:
+
+    python tracing.py [traces/trace.jsonl]
+"""
+import contextvars
+import sys
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from config import TRACE_BACKUPS, TRACE_ENABLED, TRACE_FILE, TRACE_MAX_BYTES, TRACE_OTEL
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("span", default=None)
+_writer: logging.Logger | None = None
+_tracer = None  # tracer do OpenTelemetry, se TRACE_OTEL
+_listeners: list = []  # funcoes chamadas com cada span fechado (ex.: metrics.py)
+
+
+class _NoopSpan:
+    """Span desligado: aceita a mesma interface sem medir nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id", "_start", "_t0", "_token", "_otel")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self._otel = None
+
+    def set(self, **attrs) -> None:
+        """Acrescenta atributos (itens, bytes...) antes do span fechar."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.span_id = uuid.uuid4().hex[:16]
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            if "source" in parent.attrs:
+                self.attrs.setdefault("source", parent.attrs["source"])
+        else:
+            self.trace_id = uuid.uuid4().hex
+            self.parent_id = None
+        if _tracer is not None:
+            context = _tracer.start_as_current_span(self.name)
+            self._otel = (context, context.__enter__())
+        self._token = _current.set(self)
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self._start, timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 3),
+            **self.attrs,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"[:300]
+        if _writer is not None:
+            _writer.info(json.dumps(record, ensure_ascii=False, default=str))
+        for listener in _listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.debug("Listener de span falhou: %s", e)
+        if self._otel is not None:
+            context, otel_span = self._otel
+            for key, value in self.attrs.items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_span.set_attribute(key, value)
+            context.__exit__(exc_type, exc, tb)
+        return False
+
+
+def span(name: str, **attrs):
+    """Abre um span (use com `with`). Sem destino (trace, OTel ou listener), nao mede nada."""
+    if _writer is None and _tracer is None and not _listeners:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def add_listener(fn) -> None:
+    """Recebe cada span fechado (dict igual a linha do JSONL), mesmo sem TRACE_ENABLED."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def _setup_otel():
+    """Tracer do OpenTelemetry com exportador OTLP; None se o SDK nao estiver instalado."""
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning(
+            "TRACE_OTEL=true mas o OpenTelemetry nao esta instalado "
+            "(pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http)"
+        )
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": "python-scrapers"}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer(__name__)
+
+
+def setup(enabled: bool = TRACE_ENABLED, path: str = TRACE_FILE, otel: bool = TRACE_OTEL) -> None:
+    """Liga (ou desliga) a gravacao dos spans. Chamado uma vez no import."""
+    global _writer, _tracer
+    _writer = None
+    if enabled:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        writer = logging.getLogger("trace")
+        writer.handlers = [handler]
+        writer.setLevel(logging.INFO)
+        writer.propagate = False
+        _writer = writer
+    _tracer = _setup_otel() if otel else None
+
+
+def summarize(path: str) -> list[tuple]:
+    """[(source, etapa, chamadas, total_ms, media_ms, max_ms)] por tempo total."""
+    stats: dict[tuple, list[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            key = (record.get("source") or "-", record["name"])
+            stats.setdefault(key, []).append(record["duration_ms"])
+    rows = [
+        (source, name, len(durations), sum(durations), sum(durations) / len(durations), max(durations))
+        for (source, name), durations in stats.items()
+    ]
+    return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE
+    print(f"{'fonte':<14} {'etapa':<20} {'n':>6} {'total (s)':>10} {'media (ms)':>11} {'max (ms)':>10}")
+    for source, name, count, total, mean, worst in summarize(path):
+        print(f"{source:<14} {name:<20} {count:>6} {total / 1000:>10.1f} {mean:>11.1f} {worst:>10.1f}")
+
+
+setup()
+
+if __name__ == "__main__":
+    main()
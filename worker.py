@@ -0,0 +1,154 @@
+"""
+Modo worker (WORKER_MODE=true): as fontes viram jobs recorrentes na tabela
+scrape_jobs do Postgres e qualquer numero de nos os executa.
+
+    WORKER_MODE=true python main.py
+
+Cada worker reserva um job vencido com SELECT ... FOR UPDATE SKIP LOCKED (nunca
+dois nos na mesma fonte), renova um heartbeat a cada WORKER_HEARTBEAT s
+enquanto o scraper roda e, ao terminar, agenda a proxima execucao para
+CHECK_INTERVAL s depois (ou para o backoff do breaker.py, apos
+BREAKER_FAILURES falhas seguidas). Se um no cai, o heartbeat para e outro
+worker assume o job apos WORKER_STALE_AFTER s. As licitacoes e alertas vao
+para as mesmas tabelas notices e outbox do modo de no unico.
+
+WORKER_SOURCES restringe as fontes deste no (ex.: ME Compras so onde houver
+login configurado); vazio = todas.
+"""
+import logging
+import os
+import socket
+import threading
+
+import hostlimit
+import profiling
+import runstats
+from breaker import backoff
+from config import (
+    BREAKER_FAILURES,
+    CHECK_INTERVAL,
+    WORKER_HEARTBEAT,
+    WORKER_POLL_INTERVAL,
+    WORKER_SOURCES,
+    WORKER_STALE_AFTER,
+)
+from db import save_runs
+from storage import BaseStorage, get_storage
+from subscriptions import load_index
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """Renova a reserva do job em thread propria enquanto o scraper roda."""
+
+    def __init__(self, storage: BaseStorage, source: str, worker_id: str, interval: float = WORKER_HEARTBEAT):
+        self.storage = storage
+        self.source = source
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.storage.heartbeat_job(self.source, self.worker_id):
+                    self.lost = True
+                    logger.warning("[WORKER] [%s] Reserva perdida para outro worker", self.source)
+                    return
+            except Exception as e:
+                # Falha pontual do banco: tenta de novo no proximo intervalo
+                logger.warning("[WORKER] [%s] Heartbeat falhou: %s", self.source, e)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+class JobWorker:
+    def __init__(
+        self,
+        scrapers: list,
+        process,
+        storage: BaseStorage | None = None,
+        worker_id: str | None = None,
+        interval: float = CHECK_INTERVAL,
+        poll_interval: float = WORKER_POLL_INTERVAL,
+        stale_after: float = WORKER_STALE_AFTER,
+    ):
+        """process(scraper, subscriptions) processa uma fonte (main.run_source); excecao = falha."""
+        if WORKER_SOURCES:
+            scrapers = [s for s in scrapers if s.name in WORKER_SOURCES]
+        self.scrapers = {s.name: s for s in scrapers}
+        self.process = process
+        self.storage = storage or get_storage()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.completed = 0
+
+    def run_once(self) -> bool:
+        """Reserva e executa um job; False se nenhum estava vencido."""
+        job = self.storage.claim_job(self.worker_id, list(self.scrapers), self.stale_after)
+        if job is None:
+            return False
+        # So execucoes de verdade consomem um pedido de perfil (polls vazios nao)
+        with profiling.cycle():
+            self._run_job(job)
+        return True
+
+    def _run_job(self, job: dict) -> None:
+        source = job["source"]
+        if job["previous_worker"]:
+            logger.warning("[WORKER] [%s] Assumido de %s (heartbeat parado)", source, job["previous_worker"])
+        scraper = self.scrapers[source]
+
+        runs = []
+        error = None
+        with Heartbeat(self.storage, source, self.worker_id) as heartbeat:
+            try:
+                with runstats.record(source, runs), profiling.source(source):
+                    self.process(scraper, load_index())
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:300]
+                logger.error("Erro no scraper %s: %s", source, e, exc_info=True)
+
+        # Mesmo criterio do breaker.py: so excecao conta como falha (listagem vazia e valida)
+        ok = error is None
+        failures = 0 if ok else job["failures"] + 1
+        delay = self.interval if failures < BREAKER_FAILURES else backoff(failures - BREAKER_FAILURES + 1)
+        # Reserva perdida durante a execucao: o job ja e de outro worker, que o
+        # conclui e agenda. Com OUTBOX_ENABLED, alertas repetidos sao barrados pela
+        # chave de idempotencia da outbox
+        if heartbeat.lost or not self.storage.finish_job(source, self.worker_id, ok, error, delay):
+            logger.warning("[WORKER] [%s] Reserva perdida durante a execucao; job fica com o novo dono", source)
+        else:
+            self.completed += 1
+            logger.info("[WORKER] [%s] Concluido; proxima execucao em %.0fs", source, delay)
+
+        try:
+            save_runs(runs)
+        except Exception as e:
+            logger.warning("Falha ao gravar scrape_runs: %s", e)
+        hostlimit.save()
+
+    def run(self, watchdog=None, stop: threading.Event | None = None) -> bool:
+        """Loop do worker. Retorna True se o memwatch pediu reciclagem do processo."""
+        stop = stop or threading.Event()
+        self.storage.ensure_jobs(list(self.scrapers))
+        logger.info("[WORKER] %s pronto para: %s", self.worker_id, ", ".join(self.scrapers))
+        while not stop.is_set():
+            if self.run_once():
+                if watchdog is not None and watchdog.check():
+                    return True
+            else:
+                stop.wait(self.poll_interval)
+        return False